@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor de analytics vetorizado contra o caminho original do
+relatório completo (objetos ORM + laços Python com Counter).
+
+Uso: python src/benchmarks/bench_analytics_engine.py [quantidades...]
+"""
+
+import os
+import sys
+import time
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from src.extensions import db
+from src.models.user import User
+from src.models.humor import RegistroHumor
+from src.models.avaliacao import Avaliacao  # noqa: F401
+from src.models.compartilhamento import Compartilhamento  # noqa: F401
+from src.models.agendamento import Agendamento  # noqa: F401
+from src.models.resumo_humor import ResumoDiarioHumor  # noqa: F401
+from src.models.estatistica_tag import EstatisticaTag  # noqa: F401
+from src.utils.analytics_engine import analisar_periodo
+
+QUANTIDADES_PADRAO = [1_000, 100_000, 1_000_000]
+
+
+def criar_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def popular(quantidade):
+    """Cria um usuário com `quantidade` registros distribuídos no último ano"""
+    db.drop_all()
+    db.create_all()
+    usuario = User(nome='Benchmark', email='bench@menteleve.local', senha_hash='-', tipo_usuario='aluno')
+    db.session.add(usuario)
+    db.session.commit()
+
+    hoje = date.today()
+    aleatorio = random.Random(42)
+    lote = []
+    for _ in range(quantidade):
+        lote.append({
+            'usuario_id': usuario.id,
+            'nivel_humor': aleatorio.randint(1, 5),
+            'qualidade_sono': aleatorio.choice([None, 1, 2, 3, 4, 5]),
+            'nivel_estresse': aleatorio.choice([None, 1, 2, 3, 4, 5]),
+            'descricao': 'Registro gerado para benchmark',
+            'data_registro': hoje - timedelta(days=aleatorio.randint(0, 364)),
+        })
+        if len(lote) == 50_000:
+            db.session.execute(db.insert(RegistroHumor), lote)
+            lote = []
+    if lote:
+        db.session.execute(db.insert(RegistroHumor), lote)
+    db.session.commit()
+    return usuario.id
+
+
+def caminho_original(usuario_id, data_inicio):
+    """Estatísticas numéricas como eram calculadas na rota relatorio-completo"""
+    registros = RegistroHumor.query.filter(
+        RegistroHumor.usuario_id == usuario_id,
+        RegistroHumor.data_registro >= data_inicio
+    ).all()
+    humores = [r.nivel_humor for r in registros]
+    media_humor = sum(humores) / len(humores)
+    humor_mais_frequente = Counter(humores).most_common(1)[0][0]
+    distribuicao = Counter(humores)
+    distribuicao_percentual = {str(k): round((v / len(humores)) * 100, 1) for k, v in distribuicao.items()}
+    sono_dados = [r.qualidade_sono for r in registros if r.qualidade_sono]
+    media_sono = sum(sono_dados) / len(sono_dados) if sono_dados else None
+    estresse_dados = [r.nivel_estresse for r in registros if r.nivel_estresse]
+    media_estresse = sum(estresse_dados) / len(estresse_dados) if estresse_dados else None
+    return media_humor, humor_mais_frequente, distribuicao_percentual, media_sono, media_estresse
+
+
+def medir(funcao, *args, repeticoes=3):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    quantidades = [int(valor) for valor in sys.argv[1:]] or QUANTIDADES_PADRAO
+    app = criar_app()
+    with app.app_context():
+        print(f'{"registros":>10} {"original (s)":>14} {"vetorizado (s)":>16} {"ganho":>8}')
+        for quantidade in quantidades:
+            usuario_id = popular(quantidade)
+            data_inicio = date.today() - timedelta(days=365)
+            repeticoes = 1 if quantidade >= 1_000_000 else 3
+
+            original = medir(caminho_original, usuario_id, data_inicio, repeticoes=repeticoes)
+            vetorizado = medir(analisar_periodo, usuario_id, data_inicio, repeticoes=repeticoes)
+
+            # Conferir que os dois caminhos chegam aos mesmos números
+            media, _, percentual, media_sono, _ = caminho_original(usuario_id, data_inicio)
+            estatisticas = analisar_periodo(usuario_id, data_inicio)
+            assert abs(media - estatisticas['media']) < 1e-9
+            assert percentual == estatisticas['distribuicao_percentual']
+            assert abs(media_sono - estatisticas['media_sono']) < 1e-9
+
+            print(f'{quantidade:>10} {original:>14.3f} {vetorizado:>16.3f} {original / vetorizado:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
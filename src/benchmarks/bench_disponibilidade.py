@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark do motor de disponibilidade em lote contra o caminho original da
+rota GET /psicologos (uma consulta de agendamentos e um laço de 30 dias por
+psicólogo e dia da semana).
+
+Uso: python src/benchmarks/bench_disponibilidade.py [quantidades...]
+"""
+
+import os
+import sys
+import time
+import random
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from src.extensions import db
+from src.models.user import User
+from src.models.agendamento import Agendamento
+from src.models.avaliacao import Avaliacao  # noqa: F401
+from src.models.compartilhamento import Compartilhamento  # noqa: F401
+from src.models.humor import RegistroHumor  # noqa: F401
+from src.models.resumo_humor import ResumoDiarioHumor  # noqa: F401
+from src.models.estatistica_tag import EstatisticaTag  # noqa: F401
+from src.utils.disponibilidade import calcular_disponibilidades
+
+QUANTIDADES_PADRAO = [10, 100, 1_000]
+AGENDAMENTOS_POR_PSICOLOGO = 20
+HORARIOS = ["08:00", "09:00", "10:00", "11:00", "14:00", "15:00", "16:00", "17:00"]
+
+
+def criar_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def popular(quantidade):
+    """Cria `quantidade` psicólogos com agenda semanal e agendamentos nos próximos 30 dias"""
+    db.drop_all()
+    db.create_all()
+    aleatorio = random.Random(42)
+    dias = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+    psicologos = []
+    for i in range(quantidade):
+        psicologos.append({
+            'nome': f'Psicólogo {i}',
+            'email': f'psicologo{i}@menteleve.local',
+            'senha_hash': '-',
+            'tipo_usuario': 'psicologo',
+            'ativo': True,
+            'especialidades': ['Ansiedade'],
+            'modalidades_atendimento': ['online'],
+            'disponibilidade': {dia: aleatorio.sample(HORARIOS, 5) for dia in aleatorio.sample(dias, 4)},
+        })
+    db.session.execute(db.insert(User), psicologos)
+    # Um aluno por psicólogo: os índices únicos de horário ativo valem para os dois lados
+    db.session.execute(db.insert(User), [
+        {'nome': f'Aluno {i}', 'email': f'aluno{i}@menteleve.local', 'senha_hash': '-', 'tipo_usuario': 'aluno'}
+        for i in range(quantidade)
+    ])
+
+    hoje = date.today()
+    ids = [id_ for (id_,) in db.session.execute(db.select(User.id).where(User.tipo_usuario == 'psicologo'))]
+    ids_alunos = [id_ for (id_,) in db.session.execute(db.select(User.id).where(User.tipo_usuario == 'aluno'))]
+    agendamentos = []
+    for psicologo_id, aluno_id in zip(ids, ids_alunos):
+        horarios = set()
+        while len(horarios) < AGENDAMENTOS_POR_PSICOLOGO:
+            horarios.add((hoje + timedelta(days=aleatorio.randint(-10, 40)), aleatorio.choice(HORARIOS)))
+        for data_agendamento, hora in sorted(horarios):
+            agendamentos.append({
+                'aluno_id': aluno_id,
+                'psicologo_id': psicologo_id,
+                'data_agendamento': data_agendamento,
+                'hora_agendamento': datetime.strptime(hora, "%H:%M").time(),
+                'modalidade': 'online',
+                'status': aleatorio.choice(['Pendente', 'Confirmado', 'Cancelado', 'Finalizado']),
+            })
+    db.session.execute(db.insert(Agendamento), agendamentos)
+    db.session.commit()
+
+
+def disponibilidade_original(psicologo_id, disponibilidade):
+    """get_available_times_for_psicologo como era antes do motor em lote"""
+    agendamentos_ocupados = Agendamento.query.filter(
+        Agendamento.psicologo_id == psicologo_id,
+        Agendamento.status.in_(['Pendente', 'Confirmado']),
+        Agendamento.data_agendamento >= date.today()
+    ).all()
+    horarios_ocupados = set()
+    for agendamento in agendamentos_ocupados:
+        horarios_ocupados.add((agendamento.data_agendamento, agendamento.hora_agendamento.strftime("%H:%M")))
+
+    disponibilidade_filtrada = {}
+    dias_semana_map_weekday = {
+        'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+        'friday': 4, 'saturday': 5, 'sunday': 6
+    }
+    for dia_semana, horarios_do_dia in disponibilidade.items():
+        try:
+            target_weekday = dias_semana_map_weekday[dia_semana]
+        except KeyError:
+            continue
+        hoje = date.today()
+        horarios_disponiveis_por_data = {}
+        for i in range(30):
+            data_futura = hoje + timedelta(days=i)
+            if data_futura.weekday() == target_weekday:
+                horarios_disponiveis_na_data = []
+                for hora_str in horarios_do_dia:
+                    if (data_futura, hora_str) not in horarios_ocupados:
+                        horarios_disponiveis_na_data.append(hora_str)
+                if horarios_disponiveis_na_data:
+                    horarios_disponiveis_por_data[data_futura.isoformat()] = horarios_disponiveis_na_data
+        if horarios_disponiveis_por_data:
+            disponibilidade_filtrada[dia_semana] = horarios_disponiveis_por_data
+    return disponibilidade_filtrada
+
+
+def caminho_original():
+    psicologos = User.query.filter_by(tipo_usuario="psicologo", ativo=True).all()
+    return {p.id: disponibilidade_original(p.id, p.disponibilidade or {}) for p in psicologos}
+
+
+def caminho_lote():
+    psicologos = User.query.filter_by(tipo_usuario="psicologo", ativo=True).all()
+    return calcular_disponibilidades(psicologos)
+
+
+def medir(funcao, repeticoes=5):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    quantidades = [int(valor) for valor in sys.argv[1:]] or QUANTIDADES_PADRAO
+    app = criar_app()
+    with app.app_context():
+        print(f'{"psicólogos":>10} {"original (s)":>14} {"em lote (s)":>13} {"ganho":>8}')
+        for quantidade in quantidades:
+            popular(quantidade)
+
+            # Conferir que os dois caminhos produzem a mesma disponibilidade
+            assert caminho_original() == caminho_lote()
+
+            original = medir(caminho_original)
+            lote = medir(caminho_lote)
+            print(f'{quantidade:>10} {original:>14.4f} {lote:>13.4f} {original / lote:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escrita dos perfis de PRAGMA do SQLite (src/db_config.py).
+
+Para cada perfil, em um banco em arquivo: commits de uma linha (custo do
+journal/fsync isolado) e registros de humor gravados como a rota POST /humor
+(registro, tags, resumo diário e estatísticas por tag, um commit por registro),
+primeiro em sequência e depois com várias threads escrevendo enquanto outras leem.
+
+Uso: python src/benchmarks/bench_escrita.py [registros] [threads]
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import threading
+from datetime import date, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from src import db_config
+from src.extensions import db
+from src.models.user import User
+from src.models.agendamento import Agendamento  # noqa: F401
+from src.models.avaliacao import Avaliacao  # noqa: F401
+from src.models.compartilhamento import Compartilhamento  # noqa: F401
+from src.models.humor import RegistroHumor
+from src.models.resumo_humor import ResumoDiarioHumor
+from src.models.estatistica_tag import EstatisticaTag
+
+REGISTROS_PADRAO = 300
+THREADS_PADRAO = 4
+EMOCOES = ['feliz', 'calmo', 'ansioso', 'triste', 'cansado']
+ATIVIDADES = ['correr', 'ler', 'meditar', 'estudar']
+
+
+def criar_app(caminho, perfil):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{caminho}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PERFIL'] = perfil
+    db.init_app(app)
+    db_config.init_app(app)
+    return app
+
+
+def gravar_registro(usuario_id, aleatorio):
+    """Mesmo trabalho da rota POST /humor, com um commit por registro"""
+    registro = RegistroHumor(
+        usuario_id=usuario_id,
+        nivel_humor=aleatorio.randint(1, 5),
+        data_registro=date.today() - timedelta(days=aleatorio.randint(0, 60))
+    )
+    registro.set_emocoes(aleatorio.sample(EMOCOES, 2))
+    registro.set_atividades(aleatorio.sample(ATIVIDADES, 1))
+    db.session.add(registro)
+    ResumoDiarioHumor.acumular(registro)
+    EstatisticaTag.acumular(registro)
+    db.session.commit()
+
+
+def ler_resumos(usuario_id):
+    return ResumoDiarioHumor.por_dia(usuario_id)
+
+
+def commits_puros(app, quantidade):
+    """Commits de uma linha cada: isola o custo do journal/fsync do trabalho do ORM"""
+    with app.app_context():
+        inicio = time.perf_counter()
+        for i in range(quantidade):
+            with db.engine.begin() as conexao:
+                conexao.execute(db.text("INSERT INTO tags_humor (tipo, nome) VALUES ('bench', :nome)"), {"nome": str(i)})
+        return quantidade / (time.perf_counter() - inicio)
+
+
+def escrita_sequencial(app, usuario_id, registros):
+    aleatorio = random.Random(1)
+    with app.app_context():
+        inicio = time.perf_counter()
+        for _ in range(registros):
+            gravar_registro(usuario_id, aleatorio)
+        return registros / (time.perf_counter() - inicio)
+
+
+def escrita_concorrente(app, usuarios, registros, threads):
+    """Threads escritoras (um usuário cada) e o mesmo número de leitoras; retorna (escritas/s, leituras/s, erros)"""
+    por_thread = registros // threads
+    parar = threading.Event()
+    leituras = [0] * threads
+    erros = []
+
+    def escritora(i):
+        aleatorio = random.Random(i)
+        with app.app_context():
+            try:
+                for _ in range(por_thread):
+                    gravar_registro(usuarios[i], aleatorio)
+            except Exception as e:
+                db.session.rollback()
+                erros.append(str(e))
+
+    def leitora(i):
+        with app.app_context():
+            while not parar.is_set():
+                ler_resumos(usuarios[i])
+                db.session.rollback()
+                leituras[i] += 1
+
+    escritoras = [threading.Thread(target=escritora, args=(i,)) for i in range(threads)]
+    leitoras = [threading.Thread(target=leitora, args=(i,)) for i in range(threads)]
+    inicio = time.perf_counter()
+    for thread in leitoras + escritoras:
+        thread.start()
+    for thread in escritoras:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    for thread in leitoras:
+        thread.join()
+    return por_thread * threads / duracao, sum(leituras) / duracao, erros
+
+
+def main():
+    registros = int(sys.argv[1]) if len(sys.argv) > 1 else REGISTROS_PADRAO
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else THREADS_PADRAO
+
+    print(f'{"perfil":>11} {"commits/s":>10} {"seq (w/s)":>10} {"conc (w/s)":>11} {"leituras/s":>11} {"erros":>6}')
+    for perfil in db_config.PERFIS:
+        with tempfile.TemporaryDirectory() as diretorio:
+            app = criar_app(os.path.join(diretorio, 'bench.db'), perfil)
+            with app.app_context():
+                db.create_all()
+                usuarios = []
+                for i in range(threads):
+                    usuario = User(nome=f'Aluno {i}', email=f'aluno{i}@menteleve.local', senha_hash='-', tipo_usuario='aluno')
+                    db.session.add(usuario)
+                    db.session.flush()
+                    usuarios.append(usuario.id)
+                db.session.commit()
+
+            commits = commits_puros(app, registros)
+            sequencial = escrita_sequencial(app, usuarios[0], registros)
+            concorrente, leituras, erros = escrita_concorrente(app, usuarios, registros, threads)
+            print(f'{perfil:>11} {commits:>10.0f} {sequencial:>10.0f} {concorrente:>11.0f} {leituras:>11.0f} {len(erros):>6}')
+            with app.app_context():
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Teste de concorrência do agendamento: várias threads disputam o mesmo horário
+pela rota POST /agendamentos, liberadas ao mesmo tempo por uma barreira.
+
+- mesmo psicólogo e horário, um aluno por thread;
+- mesmo aluno e horário, um psicólogo por thread.
+
+Em cada cenário exatamente uma requisição deve receber 201 e as demais 409,
+restando um único agendamento ativo (garantido pelos índices únicos parciais
+de Agendamento). Roda em um banco SQLite temporário em arquivo.
+
+Uso: python src/benchmarks/concorrencia_agendamento.py [threads]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, RAIZ)
+
+THREADS_PADRAO = 30
+HORARIO = '09:00'
+DIAS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def disputar(app, requisicoes):
+    """Dispara as requisições (cabeçalhos, corpo) ao mesmo tempo; retorna (contagem de status, segundos)"""
+    barreira = threading.Barrier(len(requisicoes))
+    status = Counter()
+    lock = threading.Lock()
+
+    def agendar(cabecalhos, corpo):
+        cliente = app.test_client()
+        barreira.wait()
+        resposta = cliente.post('/api/agendamentos', json=corpo, headers=cabecalhos)
+        with lock:
+            status[resposta.status_code] += 1
+
+    threads = [threading.Thread(target=agendar, args=requisicao) for requisicao in requisicoes]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return status, time.perf_counter() - inicio
+
+
+def executar(threads, diretorio):
+    """Roda os cenários em um banco novo dentro do diretório; retorna a quantidade de falhas"""
+    # A configuração é lida na importação de src.main
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'concorrencia.db')}"
+    os.environ['CACHE_BACKEND'] = 'memoria'
+
+    from flask_jwt_extended import create_access_token
+    from src.main import app, db
+    from src.models.agendamento import Agendamento
+    from src.models.user import User
+
+    def criar(tipo, indice, **campos):
+        usuario = User(nome=f'{tipo} {indice}', email=f'{tipo}{indice}@menteleve.local', senha_hash='-',
+                       tipo_usuario=tipo, **campos)
+        db.session.add(usuario)
+        return usuario
+
+    with app.app_context():
+        alunos = [criar('aluno', i) for i in range(threads)]
+        psicologos = [
+            criar('psicologo', i, modalidades_atendimento=['online'], disponibilidade={dia: [HORARIO] for dia in DIAS})
+            for i in range(threads)
+        ]
+        db.session.commit()
+        tokens_alunos = [{'Authorization': f'Bearer {create_access_token(identity=str(a.id))}'} for a in alunos]
+        id_aluno = alunos[0].id
+        ids_psicologos = [p.id for p in psicologos]
+
+    data = (date.today() + timedelta(days=1)).isoformat()
+
+    def corpo(psicologo_id):
+        return {'psicologo_id': psicologo_id, 'data_agendamento': data, 'hora_agendamento': HORARIO, 'modalidade': 'online'}
+
+    cenarios = [
+        ('mesmo psicólogo', [(cabecalhos, corpo(ids_psicologos[0])) for cabecalhos in tokens_alunos],
+         Agendamento.psicologo_id == ids_psicologos[0]),
+        ('mesmo aluno', [(tokens_alunos[0], corpo(psicologo_id)) for psicologo_id in ids_psicologos],
+         Agendamento.aluno_id == id_aluno),
+    ]
+    falhas = 0
+    for nome, requisicoes, filtro in cenarios:
+        # Cada cenário começa sem agendamentos ativos (o anterior pode ter ocupado o horário do aluno 0)
+        with app.app_context():
+            db.session.execute(db.update(Agendamento).values(status='Cancelado'))
+            db.session.commit()
+        status, segundos = disputar(app, requisicoes)
+        with app.app_context():
+            ativos = Agendamento.query.filter(filtro, Agendamento.status.in_(['Pendente', 'Confirmado'])).count()
+        ok = status == Counter({201: 1, 409: threads - 1}) and ativos == 1
+        falhas += not ok
+        print(f'{"ok   " if ok else "FALHA"} {nome}: {threads} threads, status {dict(status)}, '
+              f'{ativos} ativo(s), {segundos * 1000:.0f} ms')
+    return falhas
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else THREADS_PADRAO
+    with tempfile.TemporaryDirectory() as diretorio:
+        falhas = executar(threads, diretorio)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
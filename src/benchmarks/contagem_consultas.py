@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Confere que as listagens de agendamentos executam um número constante de
+consultas SQL, independente da quantidade de agendamentos (sem N+1 ao montar
+aluno_nome/psicologo_nome de cada item).
+
+Conta os comandos enviados a todos os engines (primário e leitura) em
+GET /agendamentos/psicologo e GET /agendamentos/meus (psicólogo e aluno) com 2
+e com 52 agendamentos. Roda em um banco SQLite temporário em arquivo.
+
+Uso: python src/benchmarks/contagem_consultas.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, RAIZ)
+
+AGENDAMENTOS_INICIAIS = 2
+AGENDAMENTOS_ADICIONAIS = 50
+ALUNOS = 10
+
+
+def executar(diretorio):
+    """Retorna a quantidade de rotas cuja contagem de consultas variou"""
+    # A configuração é lida na importação de src.main
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'contagem.db')}"
+    os.environ['CACHE_BACKEND'] = 'memoria'
+
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from src.main import app, db
+    from src.models.agendamento import Agendamento
+    from src.models.user import User
+
+    with app.app_context():
+        psicologo = User(nome='Psicólogo', email='psicologo@menteleve.local', senha_hash='-',
+                         tipo_usuario='psicologo', modalidades_atendimento=['online'])
+        alunos = [
+            User(nome=f'Aluno {i}', email=f'aluno{i}@menteleve.local', senha_hash='-', tipo_usuario='aluno')
+            for i in range(ALUNOS)
+        ]
+        db.session.add_all([psicologo, *alunos])
+        db.session.commit()
+        id_psicologo, ids_alunos = psicologo.id, [aluno.id for aluno in alunos]
+        cabecalhos_psicologo = {'Authorization': f'Bearer {create_access_token(identity=str(id_psicologo))}'}
+        cabecalhos_aluno = {'Authorization': f'Bearer {create_access_token(identity=str(ids_alunos[0]))}'}
+        engines = list(db.engines.values())
+
+    dias = iter(range(1, AGENDAMENTOS_INICIAIS + AGENDAMENTOS_ADICIONAIS + 1))
+
+    def agendar(quantidade):
+        with app.app_context():
+            for i in range(quantidade):
+                db.session.add(Agendamento(
+                    aluno_id=ids_alunos[i % ALUNOS], psicologo_id=id_psicologo,
+                    data_agendamento=date.today() + timedelta(days=next(dias)),
+                    hora_agendamento=time(9, 0), modalidade='online'
+                ))
+            db.session.commit()
+
+    comandos = [0]
+
+    def contar(*_):
+        comandos[0] += 1
+
+    cliente = app.test_client()
+    rotas = [
+        ('/agendamentos/psicologo', '/api/agendamentos/psicologo', cabecalhos_psicologo),
+        ('/agendamentos/meus (psicólogo)', '/api/agendamentos/meus', cabecalhos_psicologo),
+        ('/agendamentos/meus (aluno)', '/api/agendamentos/meus', cabecalhos_aluno),
+    ]
+
+    def medir():
+        contagens = []
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', contar)
+        try:
+            for _, url, cabecalhos in rotas:
+                comandos[0] = 0
+                resposta = cliente.get(url, headers=cabecalhos)
+                assert resposta.status_code == 200, resposta.get_data(as_text=True)
+                contagens.append((comandos[0], len(resposta.get_json())))
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', contar)
+        return contagens
+
+    agendar(AGENDAMENTOS_INICIAIS)
+    antes = medir()
+    agendar(AGENDAMENTOS_ADICIONAIS)
+    depois = medir()
+
+    falhas = 0
+    for (nome, _, _), (consultas_antes, itens_antes), (consultas_depois, itens_depois) in zip(rotas, antes, depois):
+        ok = consultas_antes == consultas_depois and itens_depois > itens_antes
+        falhas += not ok
+        print(f'{"ok   " if ok else "FALHA"} {nome}: {consultas_antes} consultas com {itens_antes} itens, '
+              f'{consultas_depois} com {itens_depois}')
+    return falhas
+
+
+def main():
+    with tempfile.TemporaryDirectory() as diretorio:
+        falhas = executar(diretorio)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
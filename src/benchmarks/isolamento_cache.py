@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Verificação do índice de tags do cache (src/utils/cache.py): invalidar um
+usuário remove apenas as entradas dele.
+
+Para cada backend, cacheia resultados dos usuários 1, 11, 12 e 100, invalida o
+usuário 1 e confere que só ele é recalculado. Com ids 1, 11 e 100 a antiga
+invalidação por substring da chave também removia os outros usuários.
+
+Uso: python src/benchmarks/isolamento_cache.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from src.utils import cache
+
+USUARIOS = [1, 11, 12, 100]
+INVALIDADO = 1
+
+calculos = []
+
+
+@cache.cache_result(expiry_minutes=5)
+def estatisticas(user_id, dias=30):
+    calculos.append(user_id)
+    return {'usuario': user_id, 'dias': dias}
+
+
+def verificar(backend, diretorio):
+    app = Flask(__name__)
+    app.config['CACHE_BACKEND'] = backend
+    app.config['CACHE_SQLITE_PATH'] = os.path.join(diretorio, f'cache-{backend}.db')
+    cache.init_app(app)
+
+    for usuario in USUARIOS:
+        estatisticas(usuario)
+    calculos.clear()
+
+    removidas = cache.clear_user_cache(INVALIDADO)
+    for usuario in USUARIOS:
+        estatisticas(usuario)
+
+    assert removidas == 1, f'{removidas} entradas removidas, esperado 1'
+    assert calculos == [INVALIDADO], f'recalculados: {calculos}, esperado [{INVALIDADO}]'
+    calculos.clear()
+    cache.clear_cache()
+
+
+def main():
+    falhas = 0
+    with tempfile.TemporaryDirectory() as diretorio:
+        for backend in ('memoria', 'sqlite'):
+            try:
+                verificar(backend, diretorio)
+                print(f'ok    {backend}: usuário {INVALIDADO} invalidado, demais continuam em cache')
+            except AssertionError as e:
+                falhas += 1
+                print(f'FALHA {backend}: {e}')
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Confere com EXPLAIN QUERY PLAN que as consultas dos caminhos quentes usam os
+índices declarados nos modelos (nenhuma varre a tabela inteira nem ordena em
+uma B-tree temporária).
+
+Uso: python src/benchmarks/planos_consultas.py
+"""
+
+import os
+import sys
+from datetime import date, time, timedelta
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask
+from src.extensions import db
+from src.models.user import User  # noqa: F401
+from src.models.agendamento import Agendamento, STATUS_ATIVOS
+from src.models.avaliacao import Avaliacao
+from src.models.compartilhamento import Compartilhamento
+from src.models.humor import RegistroHumor
+from src.models.resumo_humor import ResumoDiarioHumor  # noqa: F401
+from src.models.tag import RegistroHumorTag  # noqa: F401
+from src.models.estatistica_tag import EstatisticaTag  # noqa: F401
+from src.utils.migracoes import aplicar_migracoes
+from src.utils.paginacao import _depois_do_cursor
+
+
+def criar_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def consultas_quentes():
+    """(descrição, consulta) das consultas filtradas/ordenadas nas rotas mais usadas"""
+    hoje = date.today()
+    ordem_agendamentos = (Agendamento.data_agendamento, Agendamento.hora_agendamento, Agendamento.id)
+    cursor_agendamentos = (hoje, time(9, 0), 10)
+    return [
+        ("agendamentos do psicólogo (página seguinte)", db.select(Agendamento).where(
+            Agendamento.psicologo_id == 1,
+            _depois_do_cursor(ordem_agendamentos, cursor_agendamentos, True)
+        ).order_by(*(coluna.desc() for coluna in ordem_agendamentos)).limit(20)),
+        ("agendamentos do aluno", db.select(Agendamento).where(Agendamento.aluno_id == 1).order_by(
+            *(coluna.desc() for coluna in ordem_agendamentos)).limit(20)),
+        ("horários ocupados da janela", db.select(
+            Agendamento.psicologo_id, Agendamento.data_agendamento, Agendamento.hora_agendamento
+        ).where(
+            Agendamento.status.in_(STATUS_ATIVOS),
+            Agendamento.data_agendamento >= hoje,
+            Agendamento.data_agendamento < hoje + timedelta(days=30)
+        )),
+        ("avaliações do usuário", db.select(Avaliacao).where(Avaliacao.usuario_id == 1).order_by(
+            Avaliacao.data_criacao.desc(), Avaliacao.id.desc()).limit(20)),
+        ("compartilhamentos recebidos", db.select(Compartilhamento).where(
+            Compartilhamento.psicologo_id == 1).order_by(
+            Compartilhamento.data_compartilhamento.desc(), Compartilhamento.id.desc()).limit(20)),
+        ("compartilhamentos enviados", db.select(Compartilhamento).where(
+            Compartilhamento.aluno_id == 1).order_by(
+            Compartilhamento.data_compartilhamento.desc(), Compartilhamento.id.desc()).limit(20)),
+        ("compartilhamentos não visualizados", db.select(db.func.count(Compartilhamento.id)).where(
+            Compartilhamento.psicologo_id == 1, Compartilhamento.visualizado.is_(False))),
+        ("registros de humor da janela", db.select(RegistroHumor).where(
+            RegistroHumor.usuario_id == 1, RegistroHumor.data_registro >= hoje - timedelta(days=30))),
+        ("registros de humor recentes", db.select(RegistroHumor).where(RegistroHumor.usuario_id == 1).order_by(
+            RegistroHumor.data_registro.desc(), RegistroHumor.id.desc()).limit(10)),
+    ]
+
+
+def plano(consulta):
+    sql = str(consulta.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    return [linha[-1] for linha in db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql))]
+
+
+def main():
+    app = criar_app()
+    with app.app_context():
+        db.create_all()
+        aplicar_migracoes()
+        falhas = 0
+        for descricao, consulta in consultas_quentes():
+            detalhes = plano(consulta)
+            ok = all("INDEX" in d or not d.startswith("SCAN") for d in detalhes) \
+                and not any("TEMP B-TREE" in d for d in detalhes)
+            falhas += not ok
+            print(f'{"ok   " if ok else "FALHA"} {descricao}: {" | ".join(detalhes)}')
+        sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
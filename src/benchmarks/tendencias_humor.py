@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Confere que as duas rotas de tendências de humor dão o mesmo resultado para os
+mesmos registros: GET /humor/tendencias agrega os registros brutos
+(RegistroHumor.agregar_por_periodo) e GET /analytics/tendencias-humor os
+resumos diários (ResumoDiarioHumor.por_periodo).
+
+Os registros incluem estresse e sono não preenchidos e com 0, que as duas
+rotas devem deixar fora das médias, mínimos e máximos. Roda em um banco
+SQLite temporário em arquivo.
+
+Uso: python src/benchmarks/tendencias_humor.py
+"""
+
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, RAIZ)
+
+# (dias atrás, humor, estresse, sono); None = campo não enviado
+REGISTROS = [
+    (2, 3, 0, 4),
+    (2, 4, None, None),
+    (2, 2, 3, 0),
+    (1, 5, 2, 5),
+    (1, 4, 4, None),
+    (0, 3, None, 0),
+]
+CAMPOS = [
+    'registros', 'humor', 'humor_min', 'humor_max',
+    'estresse', 'estresse_min', 'estresse_max', 'sono', 'sono_min', 'sono_max',
+]
+
+
+def executar(diretorio):
+    """Retorna a quantidade de granularidades em que as rotas divergem"""
+    # A configuração é lida na importação de src.main
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'tendencias.db')}"
+    os.environ['CACHE_BACKEND'] = 'memoria'
+
+    from flask_jwt_extended import create_access_token
+    from src.main import app, db
+    from src.models.user import User
+
+    with app.app_context():
+        aluno = User(nome='Aluno', email='aluno@menteleve.local', senha_hash='-', tipo_usuario='aluno')
+        db.session.add(aluno)
+        db.session.commit()
+        cabecalhos = {'Authorization': f'Bearer {create_access_token(identity=str(aluno.id))}'}
+
+    cliente = app.test_client()
+    for dias_atras, humor, estresse, sono in REGISTROS:
+        corpo = {'nivel_humor': humor, 'data_registro': (date.today() - timedelta(days=dias_atras)).isoformat()}
+        if estresse is not None:
+            corpo['nivel_estresse'] = estresse
+        if sono is not None:
+            corpo['qualidade_sono'] = sono
+        resposta = cliente.post('/api/humor', json=corpo, headers=cabecalhos)
+        assert resposta.status_code == 201, resposta.get_data(as_text=True)
+
+    falhas = 0
+    for granularidade in ('dia', 'semana', 'mes'):
+        brutos = cliente.get(f'/api/humor/tendencias?days=30&granularidade={granularidade}', headers=cabecalhos)
+        resumos = cliente.get(f'/api/analytics/tendencias-humor?dias=30&granularidade={granularidade}', headers=cabecalhos)
+        assert brutos.status_code == resumos.status_code == 200
+        esperado = [{campo: periodo[campo] for campo in CAMPOS} for periodo in brutos.get_json()['tendencias']]
+        obtido = [{campo: periodo[campo] for campo in CAMPOS} for periodo in resumos.get_json()['tendencias']]
+        ok = esperado == obtido
+        falhas += not ok
+        print(f'{"ok   " if ok else "FALHA"} {granularidade}: {len(esperado)} período(s)'
+              + ('' if ok else f'\n      /humor/tendencias: {esperado}\n      /analytics/tendencias-humor: {obtido}'))
+    return falhas
+
+
+def main():
+    with tempfile.TemporaryDirectory() as diretorio:
+        falhas = executar(diretorio)
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
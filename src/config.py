@@ -0,0 +1,153 @@
+"""
+Configuração da aplicação a partir do ambiente.
+
+Ordem de precedência: valores padrão (desenvolvimento local) < arquivo Python
+indicado em MENTE_LEVE_CONFIG < variáveis de ambiente. O banco é qualquer URL
+do SQLAlchemy em DATABASE_URL (padrão: o SQLite local em src/database/app.db) e
+SQLALCHEMY_ENGINE_OPTIONS é montado conforme o backend:
+
+- SQLite em memória: StaticPool (uma única conexão compartilhada pelas threads,
+  senão cada conexão veria um banco vazio diferente).
+- SQLite em arquivo: QueuePool com check_same_thread desligado, para que as
+  threads do servidor reaproveitem conexões já configuradas (PRAGMAs, mmap).
+- Demais bancos: QueuePool com pool_size, max_overflow, pool_timeout,
+  pool_recycle e pool_pre_ping (DB_POOL_*).
+
+Leituras (ver src/db_roteamento.py) usam o bind 'leitura' de SQLALCHEMY_BINDS:
+a réplica de DATABASE_READ_URL ou, para SQLite em arquivo, o mesmo arquivo
+aberto com mode=ro em conexões separadas. DB_ROTEAR_LEITURAS=0 desliga.
+"""
+import os
+from datetime import timedelta
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from src import db_config
+from src.db_roteamento import BIND_LEITURA
+
+DIRETORIO_BANCO = os.path.join(os.path.dirname(__file__), 'database')
+
+PADROES = {
+    'SECRET_KEY': 'mente-leve-secret-key-2024',
+    'JWT_SECRET_KEY': 'jwt-secret-key-mente-leve',
+    'JWT_ACCESS_TOKEN_EXPIRES': timedelta(hours=1),
+    'JWT_REFRESH_TOKEN_EXPIRES': timedelta(days=30),
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(DIRETORIO_BANCO, 'app.db')}",
+    'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+    # PRAGMAs aplicados a cada conexão SQLite: 'desempenho' (WAL + synchronous=NORMAL), 'seguro' ou 'padrao'
+    'SQLITE_PERFIL': db_config.PERFIL_PADRAO,
+    # Cache de resultados: 'memoria' (por processo) ou 'sqlite' (compartilhado entre os workers do host)
+    'CACHE_BACKEND': 'memoria',
+    'CACHE_SQLITE_PATH': os.path.join(DIRETORIO_BANCO, 'cache.db'),
+    # Pool de conexões (ignorado pelo SQLite em memória)
+    'DB_POOL_SIZE': 5,
+    'DB_MAX_OVERFLOW': 10,
+    'DB_POOL_TIMEOUT': 30,  # segundos esperando uma conexão livre
+    'DB_POOL_RECYCLE': 1800,  # segundos; abaixo do timeout de conexões ociosas do servidor
+    'DB_POOL_PRE_PING': True,
+    # Réplica de leitura; sem ela, SQLite em arquivo usa o próprio arquivo em modo somente leitura
+    'SQLALCHEMY_DATABASE_READ_URI': None,
+    'DB_ROTEAR_LEITURAS': True,
+}
+
+
+def _booleano(valor):
+    return str(valor).strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+
+# Variável de ambiente -> (chave do app.config, conversor)
+VARIAVEIS_AMBIENTE = {
+    'SECRET_KEY': ('SECRET_KEY', str),
+    'JWT_SECRET_KEY': ('JWT_SECRET_KEY', str),
+    'JWT_ACCESS_TOKEN_MINUTES': ('JWT_ACCESS_TOKEN_EXPIRES', lambda valor: timedelta(minutes=int(valor))),
+    'JWT_REFRESH_TOKEN_DAYS': ('JWT_REFRESH_TOKEN_EXPIRES', lambda valor: timedelta(days=int(valor))),
+    'DATABASE_URL': ('SQLALCHEMY_DATABASE_URI', str),
+    'DATABASE_READ_URL': ('SQLALCHEMY_DATABASE_READ_URI', str),
+    'DB_ROTEAR_LEITURAS': ('DB_ROTEAR_LEITURAS', _booleano),
+    'SQLITE_PERFIL': ('SQLITE_PERFIL', str),
+    'CACHE_BACKEND': ('CACHE_BACKEND', str),
+    'CACHE_SQLITE_PATH': ('CACHE_SQLITE_PATH', str),
+    'DB_POOL_SIZE': ('DB_POOL_SIZE', int),
+    'DB_MAX_OVERFLOW': ('DB_MAX_OVERFLOW', int),
+    'DB_POOL_TIMEOUT': ('DB_POOL_TIMEOUT', int),
+    'DB_POOL_RECYCLE': ('DB_POOL_RECYCLE', int),
+    'DB_POOL_PRE_PING': ('DB_POOL_PRE_PING', _booleano),
+}
+
+
+def sqlite_em_memoria(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and (
+        url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+    )
+
+
+def opcoes_engine(uri, config):
+    """SQLALCHEMY_ENGINE_OPTIONS adequadas ao backend da URL"""
+    backend = make_url(uri).get_backend_name()
+    if backend == 'sqlite':
+        if sqlite_em_memoria(uri):
+            return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+        return {
+            'poolclass': QueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'connect_args': {'check_same_thread': False},
+        }
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+
+def _normalizar_url(uri):
+    # Heroku e afins ainda publicam URLs postgres://, que o SQLAlchemy 2 não aceita
+    if uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def url_leitura(uri, config):
+    """URL do engine de leitura, ou None quando as leituras ficam no primário"""
+    if not config['DB_ROTEAR_LEITURAS']:
+        return None
+    if config.get('SQLALCHEMY_DATABASE_READ_URI'):
+        return _normalizar_url(config['SQLALCHEMY_DATABASE_READ_URI'])
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or sqlite_em_memoria(uri) or url.query.get('uri'):
+        return None
+    # Caminho relativo é resolvido na instance_path pelo Flask-SQLAlchemy, como o do primário
+    return f"sqlite:///file:{url.database}?mode=ro&uri=true"
+
+
+def configurar(app):
+    """Carrega padrões, o arquivo de MENTE_LEVE_CONFIG e o ambiente em app.config"""
+    app.config.update(PADROES)
+    app.config.from_envvar('MENTE_LEVE_CONFIG', silent=True)
+    for variavel, (chave, converter) in VARIAVEIS_AMBIENTE.items():
+        if variavel in os.environ:
+            app.config[chave] = converter(os.environ[variavel])
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI'] = _normalizar_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if make_url(uri).get_backend_name() == 'sqlite' and not sqlite_em_memoria(uri):
+        # Caminhos relativos ficam na instance_path (criada pelo Flask-SQLAlchemy)
+        caminho = make_url(uri).database
+        if os.path.isabs(caminho):
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    opcoes = opcoes_engine(uri, app.config)
+    # Opções explícitas (ex.: no arquivo de configuração) têm precedência
+    opcoes.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = opcoes
+
+    leitura = url_leitura(uri, app.config)
+    if leitura:
+        binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+        binds.setdefault(BIND_LEITURA, {'url': leitura, **opcoes_engine(leitura, app.config)})
+        app.config['SQLALCHEMY_BINDS'] = binds
+    return app.config
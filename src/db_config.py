@@ -0,0 +1,78 @@
+"""
+Perfis de PRAGMA do SQLite aplicados a cada nova conexão do engine.
+
+- desempenho (padrão): WAL (leitores não bloqueiam o escritor), synchronous=NORMAL
+  (um fsync por checkpoint em vez de um por commit; em WAL não corrompe o banco,
+  apenas os últimos commits podem se perder numa queda de energia), mmap, cache
+  maior e tabelas temporárias em memória.
+- seguro: WAL com synchronous=FULL (fsync em todo commit).
+- padrao: configuração original do SQLite (rollback journal).
+
+Todos ligam foreign_keys (sem isso os ondelete='CASCADE' dos modelos são
+ignorados) e busy_timeout (espera pelo lock em vez de falhar com
+"database is locked" sob escrita concorrente).
+
+O perfil vem de app.config['SQLITE_PERFIL'] (variável de ambiente SQLITE_PERFIL).
+"""
+from sqlalchemy import event
+
+from src.extensions import db
+
+PRAGMAS_BASE = {
+    "foreign_keys": "ON",
+    "busy_timeout": 5000,  # ms
+}
+
+PERFIS = {
+    "desempenho": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,  # bytes
+        "cache_size": -64 * 1024,  # negativo = KiB (64 MiB)
+        "temp_store": "MEMORY",
+    },
+    "seguro": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+    },
+    "padrao": {},
+}
+
+PERFIL_PADRAO = "desempenho"
+
+
+def pragmas_do_perfil(perfil):
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil SQLite desconhecido: {perfil}. Use um de: {', '.join(PERFIS)}")
+    return {**PRAGMAS_BASE, **PERFIS[perfil]}
+
+
+def aplicar_perfil(engine, perfil=PERFIL_PADRAO, somente_leitura=False):
+    """Registra no engine o listener que executa os PRAGMAs do perfil em cada nova conexão"""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = pragmas_do_perfil(perfil)
+    if somente_leitura:
+        # O modo do journal é do arquivo e só o primário o altera
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(engine, "connect")
+    def _configurar_conexao(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome}={valor}")
+        finally:
+            cursor.close()
+
+
+def init_app(app):
+    """Aplica o perfil de app.config['SQLITE_PERFIL'] aos engines do Flask-SQLAlchemy"""
+    from src.db_roteamento import BIND_LEITURA
+
+    perfil = app.config.get("SQLITE_PERFIL", PERFIL_PADRAO)
+    with app.app_context():
+        aplicar_perfil(db.engine, perfil)
+        if BIND_LEITURA in db.engines:
+            aplicar_perfil(db.engines[BIND_LEITURA], perfil, somente_leitura=True)
@@ -0,0 +1,91 @@
+"""
+Roteamento de leituras para um engine somente leitura.
+
+Quando há um engine de leitura (bind 'leitura', montado em src/config.py: para
+SQLite em arquivo, conexões separadas com mode=ro; para outros bancos, a URL de
+DATABASE_READ_URL), a sessão envia para ele as consultas de:
+
+- requisições GET/HEAD;
+- funções marcadas com @somente_leitura.
+
+Vão sempre para o primário: flushes e INSERT/UPDATE/DELETE, funções marcadas
+com @usar_primario e qualquer leitura feita depois de uma escrita na mesma
+requisição (read-your-writes). Sem engine de leitura tudo vai para o primário.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+BIND_LEITURA = "leitura"
+METODOS_LEITURA = ("GET", "HEAD")
+
+_LEITURA = "leitura"
+_PRIMARIO = "primario"
+
+# Rota forçada pelo decorator mais interno em execução
+_rota_forcada = ContextVar("rota_banco", default=None)
+
+
+def _forcar_rota(rota):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _rota_forcada.set(rota)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _rota_forcada.reset(token)
+        return wrapper
+    return decorator
+
+
+# Consultas da função vão para o engine de leitura (salvo depois de uma escrita na requisição)
+somente_leitura = _forcar_rota(_LEITURA)
+
+# Consultas da função vão para o primário, mesmo em requisições GET
+usar_primario = _forcar_rota(_PRIMARIO)
+
+
+def escreveu_na_requisicao():
+    return has_request_context() and g.get("escreveu_no_primario", False)
+
+
+def _marcar_escrita():
+    if has_request_context():
+        g.escreveu_no_primario = True
+
+
+def rota_atual():
+    """'leitura' ou 'primario' para a próxima consulta"""
+    forcada = _rota_forcada.get()
+    if forcada == _PRIMARIO or escreveu_na_requisicao():
+        return _PRIMARIO
+    if forcada == _LEITURA:
+        return _LEITURA
+    if has_request_context() and request.method in METODOS_LEITURA:
+        return _LEITURA
+    return _PRIMARIO
+
+
+class SessaoRoteada(Session):
+    """Sessão do Flask-SQLAlchemy que escolhe entre o primário e o engine de leitura"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            escrita = self._flushing or getattr(clause, "is_dml", False)
+            if escrita:
+                _marcar_escrita()
+            elif rota_atual() == _LEITURA:
+                engine = self._db.engines.get(BIND_LEITURA)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(SessaoRoteada, "after_flush")
+def _depois_do_flush(sessao, contexto):
+    # Leituras seguintes da requisição precisam ver o que acabou de ser gravado
+    _marcar_escrita()
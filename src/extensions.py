@@ -1,3 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from src.db_roteamento import SessaoRoteada
+
+# Sessão que envia leituras ao engine somente leitura, quando configurado (ver db_roteamento)
+db = SQLAlchemy(session_options={"class_": SessaoRoteada})
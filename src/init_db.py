@@ -7,9 +7,23 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.main import app, db
+from src.models.resumo_humor import ResumoDiarioHumor
+from src.models.tag import RegistroHumorTag
+from src.models.estatistica_tag import EstatisticaTag
+from src.utils.migracoes import (
+    agendamentos_ativos_duplicados,
+    aplicar_migracoes,
+    cancelar_agendamentos_duplicados,
+    migracoes_pendentes,
+    pendencias_do_banco,
+)
 
-def init_database():
-    """Inicializa o banco de dados criando todas as tabelas"""
+def init_database(cancelar_duplicados=False):
+    """
+    Inicializa o banco de dados criando todas as tabelas, aplica as migrações
+    pendentes e recalcula os agregados. Com cancelar_duplicados, cancela os
+    agendamentos ativos duplicados que impedem a migração dos índices únicos.
+    """
     with app.app_context():
         # Criar todas as tabelas
         db.create_all()
@@ -22,5 +36,39 @@ def init_database():
         for table in tables:
             print(f'  - {table}')
 
+        # Agendamentos ativos no mesmo horário impedem a criação dos índices únicos
+        if cancelar_duplicados:
+            cancelados = cancelar_agendamentos_duplicados()
+            print(f'Agendamentos duplicados cancelados: {cancelados or "nenhum"}')
+        else:
+            for mantido, duplicados in agendamentos_ativos_duplicados():
+                print(
+                    f'  Agendamentos {[a.id for a in duplicados]} repetem o horário do agendamento {mantido.id} '
+                    f'({mantido.data_agendamento} {mantido.hora_agendamento}); '
+                    'rode com --cancelar-duplicados para cancelá-los'
+                )
+
+        # Aplicar as migrações pendentes (índices e colunas em tabelas já existentes)
+        novas = aplicar_migracoes()
+        print(f'Migrações aplicadas: {novas or "nenhuma pendente"}')
+        for versao, descricao in migracoes_pendentes():
+            print(f'  Migração {versao} ({descricao}) continua pendente; ver o log acima')
+
+        # Recalcular os resumos diários de humor a partir dos registros existentes
+        ResumoDiarioHumor.reconstruir()
+        print('Resumos diários de humor recalculados.')
+
+        # Migrar as colunas JSON dos registros de humor para as tabelas de tags
+        RegistroHumorTag.reconstruir()
+        print('Tags dos registros de humor migradas.')
+
+        # Recalcular as estatísticas por tag usadas nas correlações
+        EstatisticaTag.reconstruir()
+        print('Estatísticas por tag recalculadas.')
+
+        # Mesma verificação feita na inicialização da aplicação (src/main.py)
+        pendencias = pendencias_do_banco()
+        print(f'Pendências: {"; ".join(pendencias)}' if pendencias else 'Banco em dia.')
+
 if __name__ == '__main__':
-    init_database()
\ No newline at end of file
+    init_database(cancelar_duplicados='--cancelar-duplicados' in sys.argv[1:])
\ No newline at end of file
@@ -3,18 +3,22 @@ import sys
 # DON\'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__ )))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from datetime import timedelta
 
 # Importar modelos
 from src.extensions import db
+from src import config, db_config
 from src.models.user import User
 from src.models.avaliacao import Avaliacao  # noqa: F401 (garante criação da tabela)
 from src.models.compartilhamento import Compartilhamento  # noqa: F401
 from src.models.humor import RegistroHumor  # noqa: F401
-from src.models.agendamento import Agendamento # noqa: F401
+from src.models.agendamento import Agendamento  # noqa: F401
+from src.models.resumo_humor import ResumoDiarioHumor  # noqa: F401
+from src.models.tag import RegistroHumorTag  # noqa: F401
+from src.models.estatistica_tag import EstatisticaTag  # noqa: F401
+from src.models.versao_dados import VersaoDados  # noqa: F401
 
 # Importar blueprints
 from src.routes.user import user_bp
@@ -24,23 +28,21 @@ from src.routes.compartilhamentos import compartilhamentos_bp
 from src.routes.humor import humor_bp
 from src.routes.agendamentos import agendamentos_bp
 from src.routes.avaliacoes_agendamento import avaliacoes_agendamento_bp # Importar o blueprint
+from src.utils import cache
+from src.utils.estaticos import ManifestoEstatico
+from src.utils.migracoes import pendencias_do_banco, registrar_migracoes_aplicadas
+from src.utils.snapshot_psicologos import aquecer_snapshot_psicologos
+from src.utils.paginacao import CABECALHO_CURSOR
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 
-# Configurações
-app.config['SECRET_KEY'] = 'mente-leve-secret-key-2024'
-app.config['JWT_SECRET_KEY'] = 'jwt-secret-key-mente-leve'
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
-app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
-
-# Configuração do banco de dados (SQLite local)
-db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
-os.makedirs(os.path.dirname(db_path), exist_ok=True)
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Configurações (segredos, JWT, banco, pool e cache) vindas do ambiente; ver src/config.py
+config.configurar(app)
 
 # Inicializar extensões
 db.init_app(app)
+db_config.init_app(app)
+cache.init_app(app)
 jwt = JWTManager(app)
 # CORS configurado para permitir todas as origens durante desenvolvimento
 # ATENÇÃO: Em produção, configure origens específicas por segurança
@@ -60,7 +62,7 @@ CORS(app, origins=[
     # Expressão Regular para permitir qualquer IP na rede 172.16.x.x a 172.31.x.x
     r'http://172\.(1[6-9]|2[0-9]|3[0-1])\..*'
     
-], supports_credentials=True )
+], supports_credentials=True, expose_headers=[CABECALHO_CURSOR] )
 
 # Registrar blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
@@ -82,29 +84,44 @@ app.register_blueprint(avaliacoes_agendamento_bp, url_prefix='/api')
 
 @app.after_request
 def add_header(response):
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    # Padrão: não armazenar (login e refresh trazem tokens). Rotas com ETag
+    # (src/utils/http_cache.py) e os arquivos estáticos definem o próprio cabeçalho.
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     return response
 
+# Manifesto dos arquivos do frontend, lido uma vez (recarregado por mtime em modo debug)
+estaticos = ManifestoEstatico(app.static_folder)
+
 @app.route('/')
 def index():
-    return send_from_directory(os.path.join(os.path.dirname(__file__), 'static'), 'index.html')
+    return estaticos.index() or ('index.html not found', 404)
 
 @app.route('/<path:path>')
 def serve_react_app(path):
-    static_folder_path = os.path.join(os.path.dirname(__file__), 'static')
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return 'index.html not found', 404
+    resposta = estaticos.servir(path)
+    if resposta is not None:
+        return resposta
+    # Rotas do SPA caem no index.html
+    return estaticos.index() or ('index.html not found', 404)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
 
 with app.app_context():
+    # Um banco criado do zero por create_all já nasce com o esquema de todas as migrações
+    banco_novo = not db.inspect(db.engine).get_table_names()
     db.create_all()
+    if banco_novo:
+        registrar_migracoes_aplicadas()
+    # Snapshot da lista pública de psicólogos pronto antes da primeira requisição
+    aquecer_snapshot_psicologos()
+    # Migrações de esquema e cargas iniciais de bancos já existentes ficam em
+    # src/init_db.py (rodado uma vez por implantação, não em cada worker). Aqui só
+    # se confere se ele já rodou: sem a migração 1, os agendamentos ficam protegidos
+    # apenas pela verificação prévia da rota, sem os índices únicos
+    pendencias = pendencias_do_banco()
+    if pendencias:
+        app.logger.error(
+            "Banco desatualizado, rode python src/init_db.py antes de servir: %s", "; ".join(pendencias)
+        )
@@ -1,8 +1,23 @@
 from datetime import datetime
+import sqlite3
 from src.extensions import db
 
+# Agendamentos 'Pendente' e 'Confirmado' ocupam o horário; 'Cancelado' e 'Finalizado' não
+STATUS_ATIVOS = ('Pendente', 'Confirmado')
+
+# Índices únicos parciais de horário ativo (declarados depois da classe, sobre Agendamento.status)
+INDICE_HORARIO_PSICOLOGO = 'uq_agendamentos_psicologo_horario_ativo'
+INDICE_HORARIO_ALUNO = 'uq_agendamentos_aluno_horario_ativo'
+
 class Agendamento(db.Model):
     __tablename__ = 'agendamentos'
+    __table_args__ = (
+        # Listagens do aluno e do psicólogo ordenadas por data e hora (paginação por chave)
+        db.Index('ix_agendamentos_aluno_data', 'aluno_id', 'data_agendamento', 'hora_agendamento', 'id'),
+        db.Index('ix_agendamentos_psicologo_data', 'psicologo_id', 'data_agendamento', 'hora_agendamento', 'id'),
+        # Horários ocupados da janela de disponibilidade (cobre a consulta: não lê a tabela)
+        db.Index('ix_agendamentos_data_status', 'data_agendamento', 'status', 'psicologo_id', 'hora_agendamento'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     aluno_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
@@ -39,5 +54,50 @@ class Agendamento(db.Model):
             'link_videoconferencia': self.link_videoconferencia
         }
 
+    @classmethod
+    def horario_ocupado(cls, coluna, valor, data, hora):
+        """Indica se já há agendamento ativo no horário para o psicólogo ou aluno (coluna == valor)"""
+        return db.session.query(db.exists().where(
+            coluna == valor,
+            cls.data_agendamento == data,
+            cls.hora_agendamento == hora,
+            cls.status.in_(STATUS_ATIVOS)
+        )).scalar()
+
+    @classmethod
+    def conflito_do_aluno(cls, erro):
+        """Indica se a violação de unicidade foi no horário do aluno (senão foi no do psicólogo)"""
+        original = erro.orig
+        # PostgreSQL (psycopg2 e psycopg 3): nome da restrição no diagnóstico do erro
+        diagnostico = getattr(original, 'diag', None)
+        if diagnostico is not None:
+            return diagnostico.constraint_name == INDICE_HORARIO_ALUNO
+        # SQLite não informa o nome do índice, só as colunas: "UNIQUE constraint failed: agendamentos.aluno_id, ..."
+        if isinstance(original, sqlite3.IntegrityError):
+            _, _, colunas = str(original).partition('UNIQUE constraint failed: ')
+            indice = next(indice for indice in cls.__table__.indexes if indice.name == INDICE_HORARIO_ALUNO)
+            return [coluna.strip() for coluna in colunas.split(',')] == [
+                f'{cls.__tablename__}.{coluna.name}' for coluna in indice.columns
+            ]
+        return False
+
     def __repr__(self):
-        return f'<Agendamento {self.id} - {self.data_agendamento} {self.hora_agendamento}>'
\ No newline at end of file
+        return f'<Agendamento {self.id} - {self.data_agendamento} {self.hora_agendamento}>'
+
+
+# Um único agendamento ativo por horário do psicólogo e por horário do aluno.
+# Índices parciais: agendamentos cancelados ou finalizados não bloqueiam o horário.
+db.Index(
+    INDICE_HORARIO_PSICOLOGO,
+    Agendamento.psicologo_id, Agendamento.data_agendamento, Agendamento.hora_agendamento,
+    unique=True,
+    sqlite_where=Agendamento.status.in_(STATUS_ATIVOS),
+    postgresql_where=Agendamento.status.in_(STATUS_ATIVOS)
+)
+db.Index(
+    INDICE_HORARIO_ALUNO,
+    Agendamento.aluno_id, Agendamento.data_agendamento, Agendamento.hora_agendamento,
+    unique=True,
+    sqlite_where=Agendamento.status.in_(STATUS_ATIVOS),
+    postgresql_where=Agendamento.status.in_(STATUS_ATIVOS)
+)
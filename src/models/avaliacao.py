@@ -4,6 +4,10 @@ import json
 
 class Avaliacao(db.Model):
     __tablename__ = 'avaliacoes'
+    __table_args__ = (
+        # Listagem do usuário ordenada por data (paginação por chave)
+        db.Index('ix_avaliacoes_usuario_data', 'usuario_id', 'data_criacao', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     usuario_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -137,5 +141,14 @@ class Avaliacao(db.Model):
             'compartilhada': self.compartilhada
         }
     
+    def to_dict_resumo(self):
+        """Resumo da avaliação (sem decodificar as colunas JSON)"""
+        return {
+            'id': self.id,
+            'nivel_risco': self.nivel_risco,
+            'pontuacao_total': self.pontuacao_total,
+            'data_criacao': self.data_criacao.isoformat() if self.data_criacao else None
+        }
+    
     def __repr__(self):
         return f'<Avaliacao {self.id} - {self.nivel_risco}>'
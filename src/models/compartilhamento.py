@@ -3,6 +3,13 @@ from datetime import datetime
 
 class Compartilhamento(db.Model):
     __tablename__ = 'compartilhamentos'
+    __table_args__ = (
+        # Listagens de enviados e recebidos ordenadas por data (paginação por chave)
+        db.Index('ix_compartilhamentos_aluno_data', 'aluno_id', 'data_compartilhamento', 'id'),
+        db.Index('ix_compartilhamentos_psicologo_data', 'psicologo_id', 'data_compartilhamento', 'id'),
+        # Compartilhamentos recebidos ainda não visualizados
+        db.Index('ix_compartilhamentos_psicologo_visualizado', 'psicologo_id', 'visualizado'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     avaliacao_id = db.Column(db.Integer, db.ForeignKey('avaliacoes.id'), nullable=False)
@@ -17,6 +24,10 @@ class Compartilhamento(db.Model):
     # Observações do psicólogo
     observacoes = db.Column(db.Text)
     
+    # Relacionamentos (carregados em lote nas listagens; exclusão em cascata com o usuário)
+    aluno = db.relationship('User', foreign_keys=[aluno_id], backref=db.backref('compartilhamentos_enviados', cascade="all, delete-orphan"))
+    psicologo = db.relationship('User', foreign_keys=[psicologo_id], backref=db.backref('compartilhamentos_recebidos', cascade="all, delete-orphan"))
+    
     def marcar_como_visualizado(self):
         """Marca o compartilhamento como visualizado"""
         self.visualizado = True
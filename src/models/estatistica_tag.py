@@ -0,0 +1,222 @@
+from src.extensions import db
+from src.models.tag import Tag, RegistroHumorTag
+from src.utils.upsert import inserir_ou_atualizar
+from datetime import datetime
+from itertools import combinations
+
+
+class EstatisticaTag(db.Model):
+    """Estatísticas suficientes do humor por usuário e tag (todo o histórico)"""
+    __tablename__ = 'estatisticas_tags'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'tag_id', name='uq_estatistica_tag_usuario_tag'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+
+    n = db.Column(db.Integer, nullable=False, default=0)  # Registros com a tag
+    soma = db.Column(db.Integer, nullable=False, default=0)  # Σ nivel_humor
+    soma_quadrados = db.Column(db.Integer, nullable=False, default=0)  # Σ nivel_humor²
+
+    @staticmethod
+    def _incrementar(modelo, filtros, humor):
+        """Soma uma observação à linha de estatísticas, criando-a se não existir (upsert)"""
+        inserir_ou_atualizar(
+            modelo,
+            {'n': 1, 'soma': humor, 'soma_quadrados': humor * humor, **filtros},
+            filtros,
+            {
+                modelo.n: modelo.n + 1,
+                modelo.soma: modelo.soma + humor,
+                modelo.soma_quadrados: modelo.soma_quadrados + humor * humor,
+            }
+        )
+
+    @classmethod
+    def acumular(cls, registro):
+        """
+        Atualiza as estatísticas e as coocorrências (total e bucket diário) com as
+        tags de um novo registro, na mesma transação do registro.
+        """
+        db.session.flush()  # Garante o id das tags criadas neste registro
+        data = registro.data_registro
+        data = data.date() if isinstance(data, datetime) else data
+        humor = int(registro.nivel_humor)
+        tag_ids = sorted({associacao.tag_id for associacao in registro.tags})
+
+        for tag_id in tag_ids:
+            cls._incrementar(cls, {'usuario_id': registro.usuario_id, 'tag_id': tag_id}, humor)
+            cls._incrementar(EstatisticaTagDiaria, {
+                'usuario_id': registro.usuario_id,
+                'tag_id': tag_id,
+                'data': data
+            }, humor)
+
+        for tag_a_id, tag_b_id in combinations(tag_ids, 2):
+            filtros = {'usuario_id': registro.usuario_id, 'tag_a_id': tag_a_id, 'tag_b_id': tag_b_id}
+            inserir_ou_atualizar(CoocorrenciaTag, {'n': 1, **filtros}, filtros, {CoocorrenciaTag.n: CoocorrenciaTag.n + 1})
+            filtros['data'] = data
+            inserir_ou_atualizar(
+                CoocorrenciaTagDiaria, {'n': 1, **filtros}, filtros, {CoocorrenciaTagDiaria.n: CoocorrenciaTagDiaria.n + 1}
+            )
+
+    @classmethod
+    def por_tipo(cls, usuario_id, tipo, data_inicio=None):
+        """
+        Retorna [(nome, n, soma, soma_quadrados)] das tags do tipo.
+        Sem data_inicio lê os totais; com data_inicio soma apenas os buckets diários da janela.
+        """
+        if data_inicio is None:
+            query = db.session.query(Tag.nome, cls.n, cls.soma, cls.soma_quadrados).join(
+                cls, cls.tag_id == Tag.id
+            ).filter(cls.usuario_id == usuario_id, Tag.tipo == tipo)
+        else:
+            diaria = EstatisticaTagDiaria
+            query = db.session.query(
+                Tag.nome,
+                db.func.sum(diaria.n),
+                db.func.sum(diaria.soma),
+                db.func.sum(diaria.soma_quadrados)
+            ).join(diaria, diaria.tag_id == Tag.id).filter(
+                diaria.usuario_id == usuario_id,
+                Tag.tipo == tipo,
+                diaria.data >= data_inicio
+            ).group_by(Tag.id, Tag.nome)
+        return [tuple(linha) for linha in query.all()]
+
+    @classmethod
+    def reconstruir(cls):
+        """Recalcula totais e buckets diários das estatísticas e coocorrências a partir das tags dos registros"""
+        associacao = RegistroHumorTag
+        quadrado = associacao.nivel_humor * associacao.nivel_humor
+
+        db.session.execute(db.delete(cls))
+        db.session.execute(db.delete(EstatisticaTagDiaria))
+        db.session.execute(db.delete(CoocorrenciaTag))
+        db.session.execute(db.delete(CoocorrenciaTagDiaria))
+
+        db.session.execute(db.insert(cls).from_select(
+            [cls.usuario_id, cls.tag_id, cls.n, cls.soma, cls.soma_quadrados],
+            db.select(
+                associacao.usuario_id, associacao.tag_id, db.func.count(),
+                db.func.sum(associacao.nivel_humor), db.func.sum(quadrado)
+            ).group_by(associacao.usuario_id, associacao.tag_id)
+        ))
+
+        diaria = EstatisticaTagDiaria
+        db.session.execute(db.insert(diaria).from_select(
+            [diaria.usuario_id, diaria.tag_id, diaria.data, diaria.n, diaria.soma, diaria.soma_quadrados],
+            db.select(
+                associacao.usuario_id, associacao.tag_id, associacao.data_registro, db.func.count(),
+                db.func.sum(associacao.nivel_humor), db.func.sum(quadrado)
+            ).group_by(associacao.usuario_id, associacao.tag_id, associacao.data_registro)
+        ))
+
+        a = db.aliased(associacao)
+        b = db.aliased(associacao)
+        db.session.execute(db.insert(CoocorrenciaTag).from_select(
+            [CoocorrenciaTag.usuario_id, CoocorrenciaTag.tag_a_id, CoocorrenciaTag.tag_b_id, CoocorrenciaTag.n],
+            db.select(a.usuario_id, a.tag_id, b.tag_id, db.func.count()).join(
+                b, db.and_(a.registro_id == b.registro_id, a.tag_id < b.tag_id)
+            ).group_by(a.usuario_id, a.tag_id, b.tag_id)
+        ))
+
+        diaria = CoocorrenciaTagDiaria
+        db.session.execute(db.insert(diaria).from_select(
+            [diaria.usuario_id, diaria.tag_a_id, diaria.tag_b_id, diaria.data, diaria.n],
+            db.select(a.usuario_id, a.tag_id, b.tag_id, a.data_registro, db.func.count()).join(
+                b, db.and_(a.registro_id == b.registro_id, a.tag_id < b.tag_id)
+            ).group_by(a.usuario_id, a.tag_id, b.tag_id, a.data_registro)
+        ))
+        db.session.commit()
+
+    def __repr__(self):
+        return f'<EstatisticaTag {self.usuario_id} - {self.tag_id}>'
+
+
+class EstatisticaTagDiaria(db.Model):
+    """Bucket diário das estatísticas por usuário e tag (usado nas janelas de tempo)"""
+    __tablename__ = 'estatisticas_tags_diarias'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'tag_id', 'data', name='uq_estatistica_tag_diaria_usuario_tag_data'),
+        db.Index('ix_estatisticas_tags_diarias_usuario_data', 'usuario_id', 'data'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+
+    n = db.Column(db.Integer, nullable=False, default=0)
+    soma = db.Column(db.Integer, nullable=False, default=0)
+    soma_quadrados = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<EstatisticaTagDiaria {self.usuario_id} - {self.tag_id} - {self.data}>'
+
+
+class CoocorrenciaTag(db.Model):
+    """Quantidade de registros em que duas tags aparecem juntas (tag_a_id < tag_b_id)"""
+    __tablename__ = 'coocorrencias_tags'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'tag_a_id', 'tag_b_id', name='uq_coocorrencia_tag_usuario_par'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tag_a_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+    tag_b_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+    n = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def mais_frequentes(cls, usuario_id, data_inicio=None, limite=5, min_ocorrencias=2):
+        """
+        Retorna [(nome_a, nome_b, n)] dos pares de tags que mais aparecem juntos.
+        Sem data_inicio lê os totais; com data_inicio soma apenas os buckets diários da janela.
+        """
+        tag_a = db.aliased(Tag)
+        tag_b = db.aliased(Tag)
+        if data_inicio is None:
+            origem, n = cls, cls.n
+            filtros = [cls.usuario_id == usuario_id, cls.n >= min_ocorrencias]
+            agrupamento = []
+        else:
+            origem = CoocorrenciaTagDiaria
+            n = db.func.sum(origem.n)
+            filtros = [origem.usuario_id == usuario_id, origem.data >= data_inicio]
+            agrupamento = [origem.tag_a_id, origem.tag_b_id, tag_a.nome, tag_b.nome]
+        query = db.session.query(tag_a.nome, tag_b.nome, n).join(
+            tag_a, tag_a.id == origem.tag_a_id
+        ).join(
+            tag_b, tag_b.id == origem.tag_b_id
+        ).filter(*filtros)
+        if agrupamento:
+            query = query.group_by(*agrupamento).having(n >= min_ocorrencias)
+        query = query.order_by(n.desc()).limit(limite)
+        return [tuple(linha) for linha in query.all()]
+
+    def __repr__(self):
+        return f'<CoocorrenciaTag {self.usuario_id} - {self.tag_a_id}/{self.tag_b_id}>'
+
+
+class CoocorrenciaTagDiaria(db.Model):
+    """Bucket diário das coocorrências de tags (usado nas janelas de tempo)"""
+    __tablename__ = 'coocorrencias_tags_diarias'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'usuario_id', 'tag_a_id', 'tag_b_id', 'data', name='uq_coocorrencia_tag_diaria_usuario_par_data'
+        ),
+        db.Index('ix_coocorrencias_tags_diarias_usuario_data', 'usuario_id', 'data'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    tag_a_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+    tag_b_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    n = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CoocorrenciaTagDiaria {self.usuario_id} - {self.tag_a_id}/{self.tag_b_id} - {self.data}>'
@@ -3,9 +3,14 @@ from datetime import datetime
 import json
 from src.models.user import User
 from src.models.user import User
+from src.models.tag import Tag, RegistroHumorTag
 
 class RegistroHumor(db.Model):
     __tablename__ = 'registros_humor'
+    __table_args__ = (
+        # Registros recentes do usuário (paginação por chave)
+        db.Index('ix_registros_humor_usuario_data', 'usuario_id', 'data_registro', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     # CORREÇÃO: Adicionado ondelete='CASCADE'
@@ -39,9 +44,23 @@ class RegistroHumor(db.Model):
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
     data_registro = db.Column(db.Date, nullable=False)  # Data do dia que está sendo registrado    # Relacionamento com usuário (definido em User.py para exclusão em cascata)
     # usuario = db.relationship('User', backref=db.backref('registros_humor', lazy=True, cascade="all, delete-orphan"))    
+
+    # Tags normalizadas (emoções, fatores e atividades) usadas nas agregações
+    tags = db.relationship('RegistroHumorTag', backref='registro', lazy=True, cascade="all, delete-orphan")
+
+    def _definir_tags(self, tipo, nomes):
+        """Substitui as tags de um tipo pelas da lista informada"""
+        mantidas = [associacao for associacao in self.tags if associacao.tag.tipo != tipo]
+        novas = [
+            RegistroHumorTag(tag=Tag.obter_ou_criar(tipo, nome))
+            for nome in (RegistroHumorTag.normalizar_nomes(nomes) if nomes else [])
+        ]
+        self.tags = mantidas + novas
+
     def set_emocoes(self, emocoes_list):
         """Define as emoções do registro"""
         self.emocoes = json.dumps(emocoes_list) if emocoes_list else None
+        self._definir_tags(Tag.EMOCAO, emocoes_list)
     
     def get_emocoes(self):
         """Obtém as emoções do registro"""
@@ -50,6 +69,7 @@ class RegistroHumor(db.Model):
     def set_fatores_influencia(self, fatores_list):
         """Define os fatores de influência"""
         self.fatores_influencia = json.dumps(fatores_list) if fatores_list else None
+        self._definir_tags(Tag.FATOR, fatores_list)
     
     def get_fatores_influencia(self):
         """Obtém os fatores de influência"""
@@ -58,6 +78,7 @@ class RegistroHumor(db.Model):
     def set_atividades(self, atividades_list):
         """Define as atividades realizadas"""
         self.atividades = json.dumps(atividades_list) if atividades_list else None
+        self._definir_tags(Tag.ATIVIDADE, atividades_list)
     
     def get_atividades(self):
         """Obtém as atividades realizadas"""
@@ -66,11 +87,61 @@ class RegistroHumor(db.Model):
     def set_atividades_planejadas(self, atividades_list):
         """Define as atividades planejadas"""
         self.atividades_planejadas = json.dumps(atividades_list) if atividades_list else None
+        self._definir_tags(Tag.ATIVIDADE_PLANEJADA, atividades_list)
     
     def get_atividades_planejadas(self):
         """Obtém as atividades planejadas"""
         return json.loads(self.atividades_planejadas) if self.atividades_planejadas else []
     
+    @classmethod
+    def agregar_por_periodo(cls, usuario_id, data_inicio=None, granularidade='dia'):
+        """
+        Agrupa os registros por dia, semana ou mês no banco, com contagem e
+        média/mínimo/máximo de humor, estresse e qualidade do sono. Estresse e
+        sono não preenchidos (ou 0) ficam fora das médias e extremos, como nos
+        resumos diários (ResumoDiarioHumor).
+        """
+        from src.utils.periodos import expressao_periodo, formatar_periodo
+
+        def informado(coluna):
+            # NULL quando o campo não foi preenchido (ou veio 0), ignorado por AVG, MIN e MAX
+            return db.case((coluna > 0, coluna))
+
+        estresse = informado(cls.nivel_estresse)
+        sono = informado(cls.qualidade_sono)
+        periodo = expressao_periodo(cls.data_registro, granularidade).label('periodo')
+        consulta = db.select(
+            periodo,
+            db.func.count(cls.id),
+            db.func.avg(cls.nivel_humor), db.func.min(cls.nivel_humor), db.func.max(cls.nivel_humor),
+            db.func.avg(estresse), db.func.min(estresse), db.func.max(estresse),
+            db.func.avg(sono), db.func.min(sono), db.func.max(sono)
+        ).where(cls.usuario_id == usuario_id)
+        if data_inicio is not None:
+            consulta = consulta.where(cls.data_registro >= data_inicio)
+        consulta = consulta.group_by(periodo).order_by(periodo)
+
+        def arredondar(valor):
+            return round(float(valor), 2) if valor is not None else None
+
+        periodos = []
+        for linha in db.session.execute(consulta).all():
+            inicio, total, humor, humor_min, humor_max, estresse, estresse_min, estresse_max, sono, sono_min, sono_max = linha
+            periodos.append({
+                'data': formatar_periodo(inicio),
+                'registros': total,
+                'humor': arredondar(humor),
+                'humor_min': humor_min,
+                'humor_max': humor_max,
+                'estresse': arredondar(estresse) or 0,
+                'estresse_min': estresse_min,
+                'estresse_max': estresse_max,
+                'sono': arredondar(sono) or 0,
+                'sono_min': sono_min,
+                'sono_max': sono_max
+            })
+        return periodos
+    
     def to_dict(self):
         """Converte o registro para dicionário"""
         return {
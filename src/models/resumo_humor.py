@@ -0,0 +1,239 @@
+from src.extensions import db
+from datetime import datetime
+
+
+class ResumoDiarioHumor(db.Model):
+    """Agregado diário dos registros de humor (uma linha por usuário por dia)"""
+    __tablename__ = 'resumos_diarios_humor'
+    __table_args__ = (
+        db.UniqueConstraint('usuario_id', 'data', name='uq_resumo_humor_usuario_data'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+
+    # Agregados do nível de humor
+    total_registros = db.Column(db.Integer, nullable=False, default=0)
+    soma_humor = db.Column(db.Integer, nullable=False, default=0)
+    soma_quadrados_humor = db.Column(db.Integer, nullable=False, default=0)
+    min_humor = db.Column(db.Integer)
+    max_humor = db.Column(db.Integer)
+
+    # Contagem por nível de humor (1-5), usada na distribuição e na moda
+    humor_1 = db.Column(db.Integer, nullable=False, default=0)
+    humor_2 = db.Column(db.Integer, nullable=False, default=0)
+    humor_3 = db.Column(db.Integer, nullable=False, default=0)
+    humor_4 = db.Column(db.Integer, nullable=False, default=0)
+    humor_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    # Qualidade do sono e estresse (campos opcionais, por isso com contagem própria)
+    soma_sono = db.Column(db.Integer, nullable=False, default=0)
+    registros_sono = db.Column(db.Integer, nullable=False, default=0)
+    min_sono = db.Column(db.Integer)
+    max_sono = db.Column(db.Integer)
+    soma_estresse = db.Column(db.Integer, nullable=False, default=0)
+    registros_estresse = db.Column(db.Integer, nullable=False, default=0)
+    min_estresse = db.Column(db.Integer)
+    max_estresse = db.Column(db.Integer)
+
+    NIVEIS_HUMOR = (1, 2, 3, 4, 5)
+
+    @staticmethod
+    def _data_do_registro(registro):
+        """Normaliza data_registro (a rota de humor pode gravar um datetime)"""
+        data = registro.data_registro
+        return data.date() if isinstance(data, datetime) else data
+
+    @classmethod
+    def acumular(cls, registro):
+        """
+        Soma um novo registro de humor ao resumo do dia, na mesma transação do registro.
+        Insere ou incrementa em um único comando (upsert), sem perder atualizações
+        concorrentes nem falhar quando duas primeiras escritas do dia chegam juntas.
+        """
+        from src.utils.upsert import inserir_ou_atualizar
+
+        data = cls._data_do_registro(registro)
+        humor = int(registro.nivel_humor)
+        sono = registro.qualidade_sono or 0
+        estresse = registro.nivel_estresse or 0
+
+        novo = {
+            'usuario_id': registro.usuario_id,
+            'data': data,
+            'total_registros': 1,
+            'soma_humor': humor,
+            'soma_quadrados_humor': humor * humor,
+            'min_humor': humor,
+            'max_humor': humor,
+            'soma_sono': sono,
+            'registros_sono': 1 if sono else 0,
+            'min_sono': sono or None,
+            'max_sono': sono or None,
+            'soma_estresse': estresse,
+            'registros_estresse': 1 if estresse else 0,
+            'min_estresse': estresse or None,
+            'max_estresse': estresse or None,
+        }
+        for nivel in cls.NIVEIS_HUMOR:
+            novo[f'humor_{nivel}'] = 1 if humor == nivel else 0
+
+        valores = {
+            cls.total_registros: cls.total_registros + 1,
+            cls.soma_humor: cls.soma_humor + humor,
+            cls.soma_quadrados_humor: cls.soma_quadrados_humor + humor * humor,
+            cls.min_humor: db.case((cls.min_humor > humor, humor), else_=cls.min_humor),
+            cls.max_humor: db.case((cls.max_humor < humor, humor), else_=cls.max_humor),
+            cls.soma_sono: cls.soma_sono + sono,
+            cls.registros_sono: cls.registros_sono + (1 if sono else 0),
+            cls.soma_estresse: cls.soma_estresse + estresse,
+            cls.registros_estresse: cls.registros_estresse + (1 if estresse else 0),
+        }
+        if humor in cls.NIVEIS_HUMOR:
+            coluna = getattr(cls, f'humor_{humor}')
+            valores[coluna] = coluna + 1
+        # Mínimo e máximo de sono e estresse só mudam quando o registro traz o campo
+        for valor, minimo, maximo in ((sono, cls.min_sono, cls.max_sono), (estresse, cls.min_estresse, cls.max_estresse)):
+            if valor:
+                valores[minimo] = db.case((db.or_(minimo.is_(None), minimo > valor), valor), else_=minimo)
+                valores[maximo] = db.case((db.or_(maximo.is_(None), maximo < valor), valor), else_=maximo)
+
+        inserir_ou_atualizar(cls, novo, ('usuario_id', 'data'), valores)
+
+    @classmethod
+    def reconstruir(cls, usuario_id=None):
+        """Recalcula os resumos a partir dos registros brutos (carga inicial ou correção)"""
+        from src.models.humor import RegistroHumor
+
+        def soma_se(condicao, valor):
+            return db.func.coalesce(db.func.sum(db.case((condicao, valor), else_=0)), 0)
+
+        def informado(coluna):
+            # NULL quando o campo não foi preenchido (ou veio 0), ignorado por MIN e MAX
+            return db.case((coluna > 0, coluna))
+
+        colunas = [
+            cls.usuario_id, cls.data, cls.total_registros, cls.soma_humor, cls.soma_quadrados_humor,
+            cls.min_humor, cls.max_humor,
+            cls.soma_sono, cls.registros_sono, cls.min_sono, cls.max_sono,
+            cls.soma_estresse, cls.registros_estresse, cls.min_estresse, cls.max_estresse,
+        ]
+        expressoes = [
+            RegistroHumor.usuario_id,
+            RegistroHumor.data_registro,
+            db.func.count(RegistroHumor.id),
+            db.func.sum(RegistroHumor.nivel_humor),
+            db.func.sum(RegistroHumor.nivel_humor * RegistroHumor.nivel_humor),
+            db.func.min(RegistroHumor.nivel_humor),
+            db.func.max(RegistroHumor.nivel_humor),
+            soma_se(RegistroHumor.qualidade_sono > 0, RegistroHumor.qualidade_sono),
+            soma_se(RegistroHumor.qualidade_sono > 0, 1),
+            db.func.min(informado(RegistroHumor.qualidade_sono)),
+            db.func.max(informado(RegistroHumor.qualidade_sono)),
+            soma_se(RegistroHumor.nivel_estresse > 0, RegistroHumor.nivel_estresse),
+            soma_se(RegistroHumor.nivel_estresse > 0, 1),
+            db.func.min(informado(RegistroHumor.nivel_estresse)),
+            db.func.max(informado(RegistroHumor.nivel_estresse)),
+        ]
+        for nivel in cls.NIVEIS_HUMOR:
+            colunas.append(getattr(cls, f'humor_{nivel}'))
+            expressoes.append(soma_se(RegistroHumor.nivel_humor == nivel, 1))
+
+        consulta = db.select(*expressoes).group_by(RegistroHumor.usuario_id, RegistroHumor.data_registro)
+        remocao = db.delete(cls)
+        if usuario_id is not None:
+            consulta = consulta.where(RegistroHumor.usuario_id == usuario_id)
+            remocao = remocao.where(cls.usuario_id == usuario_id)
+
+        db.session.execute(remocao)
+        db.session.execute(db.insert(cls).from_select(colunas, consulta))
+        db.session.commit()
+
+    @classmethod
+    def por_dia(cls, usuario_id, data_inicio=None):
+        """Resumos diários do usuário a partir de data_inicio, em ordem cronológica"""
+        query = cls.query.filter(cls.usuario_id == usuario_id)
+        if data_inicio is not None:
+            query = query.filter(cls.data >= data_inicio)
+        return query.order_by(cls.data.asc()).all()
+
+    @classmethod
+    def por_periodo(cls, usuario_id, data_inicio=None, granularidade='dia'):
+        """
+        Agrupa os resumos diários por dia, semana ou mês no banco.
+        Retorna [(inicio_periodo, total_registros, soma_humor, min_humor, max_humor,
+                  soma_estresse, registros_estresse, min_estresse, max_estresse,
+                  soma_sono, registros_sono, min_sono, max_sono)].
+        """
+        from src.utils.periodos import expressao_periodo
+
+        periodo = expressao_periodo(cls.data, granularidade).label('periodo')
+        consulta = db.select(
+            periodo,
+            db.func.sum(cls.total_registros),
+            db.func.sum(cls.soma_humor),
+            db.func.min(cls.min_humor),
+            db.func.max(cls.max_humor),
+            db.func.sum(cls.soma_estresse),
+            db.func.sum(cls.registros_estresse),
+            db.func.min(cls.min_estresse),
+            db.func.max(cls.max_estresse),
+            db.func.sum(cls.soma_sono),
+            db.func.sum(cls.registros_sono),
+            db.func.min(cls.min_sono),
+            db.func.max(cls.max_sono)
+        ).where(cls.usuario_id == usuario_id)
+        if data_inicio is not None:
+            consulta = consulta.where(cls.data >= data_inicio)
+        consulta = consulta.group_by(periodo).order_by(periodo)
+        return [tuple(linha) for linha in db.session.execute(consulta).all()]
+
+    @classmethod
+    def agregar_periodo(cls, usuario_id, data_inicio=None):
+        """
+        Soma os resumos diários do período em uma única consulta.
+        Retorna totais, somas, média, distribuição por nível e médias de sono e estresse.
+        """
+        expressoes = [
+            db.func.coalesce(db.func.sum(cls.total_registros), 0),
+            db.func.coalesce(db.func.sum(cls.soma_humor), 0),
+            db.func.coalesce(db.func.sum(cls.soma_quadrados_humor), 0),
+            db.func.coalesce(db.func.sum(cls.soma_sono), 0),
+            db.func.coalesce(db.func.sum(cls.registros_sono), 0),
+            db.func.coalesce(db.func.sum(cls.soma_estresse), 0),
+            db.func.coalesce(db.func.sum(cls.registros_estresse), 0),
+            db.func.count(cls.id),
+        ] + [
+            db.func.coalesce(db.func.sum(getattr(cls, f'humor_{nivel}')), 0)
+            for nivel in cls.NIVEIS_HUMOR
+        ]
+        consulta = db.select(*expressoes).where(cls.usuario_id == usuario_id)
+        if data_inicio is not None:
+            consulta = consulta.where(cls.data >= data_inicio)
+
+        linha = db.session.execute(consulta).one()
+        total, soma_humor, soma_quadrados, soma_sono, registros_sono, soma_estresse, registros_estresse, dias = linha[:8]
+        contagens = linha[8:]
+
+        return {
+            'total_registros': total,
+            'dias_com_registro': dias,
+            'soma_humor': soma_humor,
+            'soma_quadrados_humor': soma_quadrados,
+            'media_humor': soma_humor / total if total else None,
+            'distribuicao': {
+                nivel: contagem
+                for nivel, contagem in zip(cls.NIVEIS_HUMOR, contagens)
+                if contagem
+            },
+            'media_sono': soma_sono / registros_sono if registros_sono else None,
+            'media_estresse': soma_estresse / registros_estresse if registros_estresse else None,
+        }
+
+    @property
+    def media_humor(self):
+        return self.soma_humor / self.total_registros if self.total_registros else None
+
+    def __repr__(self):
+        return f'<ResumoDiarioHumor {self.usuario_id} - {self.data}>'
@@ -0,0 +1,182 @@
+from src.extensions import db
+from sqlalchemy import event
+from src.utils.upsert import inserir_se_ausente
+from datetime import datetime
+import json
+
+
+class Tag(db.Model):
+    """Dicionário de emoções, fatores e atividades usados nos registros de humor"""
+    __tablename__ = 'tags_humor'
+    __table_args__ = (
+        db.UniqueConstraint('tipo', 'nome', name='uq_tag_humor_tipo_nome'),
+    )
+
+    EMOCAO = 'emocao'
+    FATOR = 'fator'
+    ATIVIDADE = 'atividade'
+    ATIVIDADE_PLANEJADA = 'atividade_planejada'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(30), nullable=False)
+    nome = db.Column(db.String(255), nullable=False)
+
+    @classmethod
+    def _buscar(cls, tipo, nome):
+        with db.session.no_autoflush:
+            return cls.query.filter_by(tipo=tipo, nome=nome).first()
+
+    @classmethod
+    def obter_ou_criar(cls, tipo, nome):
+        """Busca a tag pelo tipo e nome, criando-a se ainda não existir"""
+        tag = cls._buscar(tipo, nome)
+        if tag is not None:
+            return tag
+        # INSERT ... ON CONFLICT DO NOTHING na transação da requisição: se outra
+        # requisição criou a mesma tag entre a busca e o INSERT, a dela é usada, e
+        # um rollback da requisição desfaz a tag criada aqui junto com o registro
+        inserir_se_ausente(cls, {'tipo': tipo, 'nome': nome}, ('tipo', 'nome'))
+        return cls._buscar(tipo, nome)
+
+    def __repr__(self):
+        return f'<Tag {self.tipo}:{self.nome}>'
+
+
+class RegistroHumorTag(db.Model):
+    """Associação registro de humor ↔ tag, com os campos usados nas agregações"""
+    __tablename__ = 'registros_humor_tags'
+    __table_args__ = (
+        db.Index('ix_registros_humor_tags_usuario_tag_data', 'usuario_id', 'tag_id', 'data_registro'),
+    )
+
+    registro_id = db.Column(db.Integer, db.ForeignKey('registros_humor.id', ondelete='CASCADE'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags_humor.id'), primary_key=True)
+
+    # Copiados do registro (que não é alterado após criado) para agregar sem join
+    usuario_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    data_registro = db.Column(db.Date, nullable=False)
+    nivel_humor = db.Column(db.Integer, nullable=False)
+
+    tag = db.relationship('Tag', lazy='joined')
+
+    @staticmethod
+    def ler_lista(valor):
+        """Lê uma coluna JSON de lista, aceitando o formato antigo separado por vírgula"""
+        if not valor:
+            return []
+        try:
+            itens = json.loads(valor)
+        except ValueError:
+            itens = valor.split(',')
+        return RegistroHumorTag.normalizar_nomes(itens)
+
+    @staticmethod
+    def normalizar_nomes(itens):
+        """Converte os itens de uma lista de tags em nomes únicos, sem espaços extras"""
+        if not isinstance(itens, list):
+            itens = [itens]
+        nomes = (str(item).strip() for item in itens if item is not None)
+        return list(dict.fromkeys(nome for nome in nomes if nome))
+
+    @classmethod
+    def frequencias(cls, usuario_id, tipo, data_inicio=None, humor_minimo=None, limite=None):
+        """Retorna [(nome, frequencia)] das tags do tipo, da mais para a menos frequente"""
+        frequencia = db.func.count().label('frequencia')
+        query = db.session.query(Tag.nome, frequencia).join(cls, cls.tag_id == Tag.id).filter(
+            cls.usuario_id == usuario_id,
+            Tag.tipo == tipo
+        )
+        if data_inicio is not None:
+            query = query.filter(cls.data_registro >= data_inicio)
+        if humor_minimo is not None:
+            query = query.filter(cls.nivel_humor >= humor_minimo)
+        query = query.group_by(Tag.id, Tag.nome).order_by(frequencia.desc(), Tag.nome)
+        if limite:
+            query = query.limit(limite)
+        return [(nome, total) for nome, total in query.all()]
+
+    @classmethod
+    def medias_por_tag(cls, usuario_id, tipo, data_inicio=None, min_ocorrencias=1):
+        """Retorna [(nome, media_humor, frequencia)] das tags do tipo no período"""
+        frequencia = db.func.count()
+        query = db.session.query(
+            Tag.nome,
+            db.func.avg(cls.nivel_humor),
+            frequencia
+        ).join(cls, cls.tag_id == Tag.id).filter(
+            cls.usuario_id == usuario_id,
+            Tag.tipo == tipo
+        )
+        if data_inicio is not None:
+            query = query.filter(cls.data_registro >= data_inicio)
+        query = query.group_by(Tag.id, Tag.nome).having(frequencia >= min_ocorrencias)
+        return [(nome, float(media), total) for nome, media, total in query.all()]
+
+    @classmethod
+    def reconstruir(cls, tamanho_lote=1000):
+        """Migra as colunas JSON de todos os registros de humor para as tabelas de tags"""
+        from src.models.humor import RegistroHumor
+
+        colunas_por_tipo = {
+            Tag.EMOCAO: RegistroHumor.emocoes,
+            Tag.FATOR: RegistroHumor.fatores_influencia,
+            Tag.ATIVIDADE: RegistroHumor.atividades,
+            Tag.ATIVIDADE_PLANEJADA: RegistroHumor.atividades_planejadas,
+        }
+
+        db.session.execute(db.delete(cls))
+        tags = {(tag.tipo, tag.nome): tag.id for tag in Tag.query.all()}
+
+        def id_da_tag(tipo, nome):
+            if (tipo, nome) not in tags:
+                tag = Tag(tipo=tipo, nome=nome)
+                db.session.add(tag)
+                db.session.flush()
+                tags[(tipo, nome)] = tag.id
+            return tags[(tipo, nome)]
+
+        consulta = db.select(
+            RegistroHumor.id,
+            RegistroHumor.usuario_id,
+            RegistroHumor.data_registro,
+            RegistroHumor.nivel_humor,
+            *colunas_por_tipo.values()
+        )
+        registros = db.session.execute(consulta).all()
+
+        lote = []
+        for registro in registros:
+            registro_id, usuario_id, data_registro, nivel_humor = registro[:4]
+            tag_ids = set()
+            for tipo, valor in zip(colunas_por_tipo, registro[4:]):
+                for nome in cls.ler_lista(valor):
+                    tag_ids.add(id_da_tag(tipo, nome))
+            for tag_id in tag_ids:
+                lote.append({
+                    'registro_id': registro_id,
+                    'tag_id': tag_id,
+                    'usuario_id': usuario_id,
+                    'data_registro': data_registro,
+                    'nivel_humor': nivel_humor,
+                })
+            if len(lote) >= tamanho_lote:
+                db.session.execute(db.insert(cls), lote)
+                lote = []
+        if lote:
+            db.session.execute(db.insert(cls), lote)
+        db.session.commit()
+
+    def __repr__(self):
+        return f'<RegistroHumorTag {self.registro_id} - {self.tag_id}>'
+
+
+@event.listens_for(RegistroHumorTag, 'before_insert')
+def _copiar_campos_do_registro(mapper, connection, target):
+    """Preenche os campos copiados do registro de humor no momento da inserção"""
+    registro = target.registro
+    if registro is None:
+        return
+    data = registro.data_registro
+    target.usuario_id = registro.usuario_id
+    target.data_registro = data.date() if isinstance(data, datetime) else data
+    target.nivel_humor = registro.nivel_humor
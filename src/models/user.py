@@ -33,6 +33,12 @@ class User(db.Model):
     # Relacionamento com Registros de Humor (para exclusão em cascata)
     registros_humor = db.relationship('RegistroHumor', backref='usuario', lazy=True, cascade="all, delete-orphan")
 
+    # Resumos diários de humor (para exclusão em cascata)
+    resumos_humor = db.relationship('ResumoDiarioHumor', lazy=True, cascade="all, delete-orphan")
+
+    # Autoavaliações (para exclusão em cascata; a FK não declara ondelete)
+    avaliacoes = db.relationship('Avaliacao', lazy=True, cascade="all, delete-orphan")
+
     # Campos de consentimento
     consentimento_termos = db.Column(db.Boolean, default=False, nullable=False)
     consentimento_politica = db.Column(db.Boolean, default=False, nullable=False)
@@ -0,0 +1,44 @@
+from src.extensions import db
+
+
+class VersaoDados(db.Model):
+    """
+    Contadores de versão de conjuntos de dados derivados (ex: a lista pública
+    de psicólogos). São incrementados na mesma transação da escrita, então
+    todos os workers enxergam a nova versão assim que ela é confirmada.
+    """
+    __tablename__ = 'versoes_dados'
+
+    PSICOLOGOS = 'psicologos'
+    # Subconjuntos de PSICOLOGOS: cadastro dos psicólogos e agendamentos de cada um
+    PERFIS_PSICOLOGOS = 'perfis_psicologos'
+    PREFIXO_AGENDA = 'agenda:'
+
+    nome = db.Column(db.String(50), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def ler(cls, nome):
+        """Versão atual do conjunto (0 se ainda não houve escrita)"""
+        versao = db.session.execute(db.select(cls.versao).where(cls.nome == nome)).scalar()
+        return versao or 0
+
+    @classmethod
+    def ler_todas(cls):
+        """{nome: versão} de todos os contadores, em uma consulta"""
+        return dict(db.session.execute(db.select(cls.nome, cls.versao)).all())
+
+    @classmethod
+    def agenda(cls, psicologo_id):
+        """Nome do contador dos agendamentos de um psicólogo"""
+        return f'{cls.PREFIXO_AGENDA}{psicologo_id}'
+
+    @classmethod
+    def incrementar(cls, nome, sessao=None):
+        """Incrementa a versão na transação da sessão (não faz commit)"""
+        from src.utils.upsert import inserir_ou_atualizar
+
+        inserir_ou_atualizar(cls, {'nome': nome, 'versao': 1}, ('nome',), {cls.versao: cls.versao + 1}, sessao)
+
+    def __repr__(self):
+        return f'<VersaoDados {self.nome}={self.versao}>'
@@ -1,75 +1,42 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from src.extensions import db
 from src.models.agendamento import Agendamento
 from src.models.user import User
+from src.utils.http_cache import etag_condicional, versao_colecao
+from src.utils.snapshot_psicologos import resposta_psicologos
+from src.utils.agenda_bits import horario_para_slot, obter_indice, primeiro_slot, slot_para_horario
+from src.utils.paginacao import CursorInvalido, com_cursor, paginar, parametros_paginacao
 from datetime import datetime, timedelta, date, time
 import uuid
 
 agendamentos_bp = Blueprint("agendamentos", __name__)
 
-def get_available_times_for_psicologo(psicologo_id, disponibilidade):
-    """
-    Filtra os horários de disponibilidade de um psicólogo, removendo aqueles que já estão agendados.
-    A disponibilidade retornada é um dicionário onde a chave é o dia da semana (ex: 'monday')
-    e o valor é um dicionário de datas (ISO format) e seus horários disponíveis.
-    """
-    
-    # 1. Obter todos os agendamentos futuros confirmados ou pendentes para este psicólogo
-    # Consideramos 'Pendente' e 'Confirmado' como horários ocupados.
-    # Agendamentos 'Cancelado' ou 'Finalizado' não ocupam o horário.
-    agendamentos_ocupados = Agendamento.query.filter(
-        Agendamento.psicologo_id == psicologo_id,
-        Agendamento.status.in_(['Pendente', 'Confirmado']),
-        Agendamento.data_agendamento >= date.today() # Apenas agendamentos futuros ou de hoje
-    ).all()
-
-    # 2. Criar um conjunto de (data, hora) dos agendamentos ocupados para consulta rápida
-    horarios_ocupados = set()
-    for agendamento in agendamentos_ocupados:
-        # Converte a hora para o formato de string "HH:MM" que está na disponibilidade
-        hora_str = agendamento.hora_agendamento.strftime("%H:%M")
-        horarios_ocupados.add((agendamento.data_agendamento, hora_str))
-
-    # 3. Filtrar a disponibilidade
-    disponibilidade_filtrada = {}
-    
-    # Mapeamento de dia da semana (string em inglês) para o weekday() (0=Segunda, 6=Domingo)
-    dias_semana_map_weekday = {
-        'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 
-        'friday': 4, 'saturday': 5, 'sunday': 6
-    }
-    
-    for dia_semana, horarios_do_dia in disponibilidade.items():
-        try:
-            target_weekday = dias_semana_map_weekday[dia_semana]
-        except KeyError:
-            continue
+# Ordem das listagens (mais recentes primeiro); o id desempata na paginação por chave
+ORDEM_AGENDAMENTOS = (Agendamento.data_agendamento, Agendamento.hora_agendamento, Agendamento.id)
 
-        hoje = date.today()
-        horarios_disponiveis_por_data = {}
-        
-        # Vamos procurar por datas futuras (ex: 30 dias à frente)
-        for i in range(30): # Limitar a 30 dias para evitar processamento excessivo
-            data_futura = hoje + timedelta(days=i)
-            
-            # O weekday() retorna 0 para Segunda, 6 para Domingo
-            if data_futura.weekday() == target_weekday:
-                
-                horarios_disponiveis_na_data = []
-                for hora_str in horarios_do_dia:
-                    # Verificar se o horário já está ocupado
-                    if (data_futura, hora_str) not in horarios_ocupados:
-                        horarios_disponiveis_na_data.append(hora_str)
-                
-                if horarios_disponiveis_na_data:
-                    # Adicionar a lista de horários disponíveis para esta data
-                    horarios_disponiveis_por_data[data_futura.isoformat()] = horarios_disponiveis_na_data
-        
-        if horarios_disponiveis_por_data:
-            disponibilidade_filtrada[dia_semana] = horarios_disponiveis_por_data
-            
-    return disponibilidade_filtrada
+MENSAGEM_HORARIO_PSICOLOGO = "Horário indisponível. Já existe um agendamento ativo para este psicólogo neste horário."
+MENSAGEM_HORARIO_ALUNO = "Você já possui consulta agendada para esse mesmo dia e horário. Tente novamente com outra data ou horário."
+
+def versao_meus_agendamentos():
+    """Versão dos agendamentos do usuário autenticado e dos nomes exibidos (para ETag)"""
+    user_id = int(get_jwt_identity())
+    # Só os usuários que aparecem nos agendamentos (o próprio e as contrapartes), não a tabela inteira
+    contrapartes = db.union(
+        db.select(Agendamento.psicologo_id).where(Agendamento.aluno_id == user_id),
+        db.select(Agendamento.aluno_id).where(Agendamento.psicologo_id == user_id)
+    )
+    return (
+        user_id,
+        versao_colecao(
+            Agendamento,
+            db.or_(Agendamento.aluno_id == user_id, Agendamento.psicologo_id == user_id),
+            coluna_tempo=Agendamento.data_atualizacao
+        ),
+        versao_colecao(User, db.or_(User.id == user_id, User.id.in_(contrapartes)), coluna_tempo=User.data_atualizacao)
+    )
 
 @agendamentos_bp.route("/agendamentos", methods=["POST"])
 @jwt_required()
@@ -124,34 +91,13 @@ def create_agendamento():
     else:
         return jsonify({"message": "Psicólogo não tem disponibilidade para o dia selecionado."}), 400
 
-    # Verificar se já existe um agendamento para o mesmo psicólogo, data e hora
-    # 1. Verificar se já existe um agendamento para o mesmo psicólogo, data e hora (evita duplicidade)
-    agendamento_psicologo_existente = Agendamento.query.filter_by(
-        psicologo_id=psicologo_id,
-        data_agendamento=data_agendamento,
-        hora_agendamento=hora_agendamento
-    ).filter(
-        Agendamento.status.in_(['Pendente', 'Confirmado']) # Apenas agendamentos ativos
-    ).first()
-
-    if agendamento_psicologo_existente:
-        return jsonify({"message": "Horário indisponível. Já existe um agendamento ativo para este psicólogo neste horário."}), 409
-
-    # 2. Validação: Verificar se o aluno já tem um agendamento com qualquer psicólogo na mesma data e hora
-    agendamento_aluno_existente = Agendamento.query.filter(
-        Agendamento.aluno_id == aluno.id,
-        Agendamento.data_agendamento == data_agendamento,
-        Agendamento.hora_agendamento == hora_agendamento,
-        Agendamento.status.in_(['Pendente', 'Confirmado']) # Considerar apenas agendamentos ativos
-    ).first()
-
-    if agendamento_aluno_existente:
-        # Se o agendamento existente for com um psicólogo diferente do que está sendo agendado
-        psicologo_agendado = User.query.get(agendamento_aluno_existente.psicologo_id)
-        psicologo_nome = psicologo_agendado.nome if psicologo_agendado else "outro psicólogo"
-        return jsonify({
-            "message": "Você já possui consulta agendada para esse mesmo dia e horário. Tente novamente com outra data ou horário.",
-        }), 409
+    # Verificação prévia dos horários ativos do psicólogo e do aluno. Não é atômica: a
+    # garantia vem dos índices únicos abaixo, mas ela continua valendo em bancos em que a
+    # migração desses índices ainda não foi aplicada (ver src/init_db.py)
+    if Agendamento.horario_ocupado(Agendamento.psicologo_id, psicologo.id, data_agendamento, hora_agendamento):
+        return jsonify({"message": MENSAGEM_HORARIO_PSICOLOGO}), 409
+    if Agendamento.horario_ocupado(Agendamento.aluno_id, aluno.id, data_agendamento, hora_agendamento):
+        return jsonify({"message": MENSAGEM_HORARIO_ALUNO}), 409
 
     link_videoconferencia = None
     if modalidade == 'online':
@@ -172,13 +118,22 @@ def create_agendamento():
     )
 
 
-    db.session.add(novo_agendamento)
-    db.session.commit()
+    # Os índices únicos parciais garantem um único agendamento ativo por horário do
+    # psicólogo e do aluno: a inserção falha de forma atômica em caso de conflito concorrente
+    try:
+        db.session.add(novo_agendamento)
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if Agendamento.conflito_do_aluno(e):
+            return jsonify({"message": MENSAGEM_HORARIO_ALUNO}), 409
+        return jsonify({"message": MENSAGEM_HORARIO_PSICOLOGO}), 409
 
     return jsonify({"message": "Agendamento criado com sucesso", "agendamento": novo_agendamento.to_dict()}), 201
 
 @agendamentos_bp.route("/agendamentos/meus", methods=["GET"])
 @jwt_required()
+@etag_condicional(versao_meus_agendamentos)
 def get_my_agendamentos():
     current_user_id = get_jwt_identity()
     user = User.query.get(current_user_id)
@@ -186,23 +141,32 @@ def get_my_agendamentos():
     if not user:
         return jsonify({"message": "Usuário não encontrado"}), 404
 
+    # Aluno e psicólogo carregados no mesmo SELECT (JOIN), sem uma consulta por agendamento
+    consulta = Agendamento.query.options(
+        joinedload(Agendamento.aluno), joinedload(Agendamento.psicologo)
+    )
     if user.tipo_usuario == "aluno":
-        agendamentos = Agendamento.query.filter_by(aluno_id=user.id).order_by(Agendamento.data_agendamento.desc(), Agendamento.hora_agendamento.desc()).all()
+        consulta = consulta.filter_by(aluno_id=user.id)
     elif user.tipo_usuario == "psicologo":
-        agendamentos = Agendamento.query.filter_by(psicologo_id=user.id).order_by(Agendamento.data_agendamento.desc(), Agendamento.hora_agendamento.desc()).all()
+        consulta = consulta.filter_by(psicologo_id=user.id)
     else:
         return jsonify({"message": "Tipo de usuário inválido para agendamentos"}), 403
 
+    try:
+        agendamentos, proximo_cursor = paginar(consulta, ORDEM_AGENDAMENTOS, *parametros_paginacao())
+    except CursorInvalido as e:
+        return jsonify({"message": str(e)}), 400
+
     agendamentos_list = []
     for agendamento in agendamentos:
         agendamento_dict = agendamento.to_dict()
-        aluno = User.query.get(agendamento.aluno_id)
-        psicologo = User.query.get(agendamento.psicologo_id)
+        aluno = agendamento.aluno
+        psicologo = agendamento.psicologo
         agendamento_dict["aluno_nome"] = aluno.nome if aluno else "Desconhecido"
         agendamento_dict["psicologo_nome"] = psicologo.nome if psicologo else "Desconhecido"
         agendamentos_list.append(agendamento_dict)
 
-    return jsonify(agendamentos_list), 200
+    return com_cursor((jsonify(agendamentos_list), 200), proximo_cursor)
 
 @agendamentos_bp.route("/agendamentos/psicologo", methods=["GET"])
 @jwt_required()
@@ -214,40 +178,88 @@ def get_agendamentos_psicologo():
     if not user or user.tipo_usuario != "psicologo":
         return jsonify({"message": "Apenas psicólogos podem acessar esta rota"}), 403
 
-    agendamentos = Agendamento.query.filter_by(psicologo_id=user.id).order_by(
-        Agendamento.data_agendamento.desc(), 
-        Agendamento.hora_agendamento.desc()
-    ).all()
+    consulta = Agendamento.query.options(joinedload(Agendamento.aluno)).filter_by(psicologo_id=user.id)
+    try:
+        agendamentos, proximo_cursor = paginar(consulta, ORDEM_AGENDAMENTOS, *parametros_paginacao())
+    except CursorInvalido as e:
+        return jsonify({"message": str(e)}), 400
 
     agendamentos_list = []
     for agendamento in agendamentos:
         agendamento_dict = agendamento.to_dict()
-        aluno = User.query.get(agendamento.aluno_id)
+        aluno = agendamento.aluno
         agendamento_dict["aluno_nome"] = aluno.nome if aluno else "Desconhecido"
         agendamento_dict["psicologo_nome"] = user.nome
         agendamentos_list.append(agendamento_dict)
 
-    return jsonify(agendamentos_list), 200
+    return com_cursor((jsonify(agendamentos_list), 200), proximo_cursor)
 
 @agendamentos_bp.route("/psicologos", methods=["GET"])
 def get_psicologos_api():
-    psicologos = User.query.filter_by(tipo_usuario="psicologo", ativo=True).all()
-    
-    psicologos_list = []
-    for p in psicologos:
-        # Chama a nova função para obter a disponibilidade filtrada
-        disponibilidade_filtrada = get_available_times_for_psicologo(p.id, p.disponibilidade if p.disponibilidade else {})
-        
-        psicologos_list.append({
-            "id": p.id,
-            "name": p.nome,
-            "specialty": p.especialidades[0] if p.especialidades else "Geral", # Assumindo que especialidades é uma lista
-            "availability": disponibilidade_filtrada,
-            "description": "", # Será preenchido no frontend ou por outra lógica
-            "modes": p.modalidades_atendimento if p.modalidades_atendimento else []
-        })
-    
-    return jsonify(psicologos_list), 200
+    # Corpo pré-serializado, refeito apenas quando a versão muda ou o dia vira
+    return resposta_psicologos()
+
+
+@agendamentos_bp.route("/agendamentos/busca", methods=["GET"])
+def buscar_horarios():
+    """
+    Busca na agenda em bits:
+    - data e hora: psicólogos livres no horário
+    - psicologos (ids separados por vírgula) e data: horários livres em comum
+    - sem data: primeiro horário livre a partir de agora
+    Filtros opcionais: especialidade e modalidade.
+    """
+    try:
+        data_str = request.args.get("data")
+        hora = request.args.get("hora")
+        ids = request.args.get("psicologos")
+
+        try:
+            data = datetime.strptime(data_str, "%Y-%m-%d").date() if data_str else None
+            psicologo_ids = [int(valor) for valor in ids.split(",") if valor.strip()] if ids else []
+        except ValueError:
+            return jsonify({"message": "Parâmetros inválidos. Use data=YYYY-MM-DD e psicologos=1,2,..."}), 400
+
+        indice = obter_indice()
+        filtro = indice.filtro(request.args.get("especialidade"), request.args.get("modalidade"))
+        agora = datetime.now()
+
+        if psicologo_ids:
+            if not data:
+                return jsonify({"message": "Informe a data para buscar horários em comum"}), 400
+            return jsonify({
+                "data": data.isoformat(),
+                "psicologos": psicologo_ids,
+                "horarios": indice.horarios_em_comum(psicologo_ids, data, agora)
+            }), 200
+
+        if hora:
+            slot = horario_para_slot(hora)
+            if not data or slot is None:
+                return jsonify({"message": "Informe data e hora (HH:MM)"}), 400
+            # Horário que já começou não pode mais ser agendado (como em proximo_horario)
+            livres = indice.livres(data, slot, filtro) if slot >= primeiro_slot(data, agora) else 0
+            return jsonify({
+                "data": data.isoformat(),
+                "hora": slot_para_horario(slot),
+                "psicologos": indice.listar(livres)
+            }), 200
+
+        a_partir = agora
+        if data and data > a_partir.date():
+            a_partir = datetime.combine(data, time.min)
+        proximo = indice.proximo_horario(a_partir, filtro)
+        if not proximo:
+            return jsonify({"message": "Nenhum horário disponível nos próximos dias"}), 404
+        data_livre, slot, bits = proximo
+        return jsonify({
+            "data": data_livre.isoformat(),
+            "hora": slot_para_horario(slot),
+            "psicologos": indice.listar(bits)
+        }), 200
+
+    except Exception as e:
+        return jsonify({"message": "Erro ao buscar horários", "error": str(e)}), 500
 
 
 @agendamentos_bp.route("/agendamentos/<int:agendamento_id>/status", methods=["PUT"])
@@ -23,7 +23,7 @@ def validar_senha_forte(senha):
     if not re.search(r"[!@#$%^&*()_+=\-{}\[\]:;\"'<>,.?/\\|]", senha):
         return False, "A senha deve conter pelo menos um caractere especial."
     return True, ""
-from datetime import timedelta, datetime
+from datetime import datetime
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -81,12 +81,10 @@ def registro_aluno():
         
         # Criar tokens
         access_token = create_access_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(hours=1)
+            identity=str(user.id)  # Converter para string; validade em JWT_ACCESS_TOKEN_EXPIRES
         )
         refresh_token = create_refresh_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(days=30)
+            identity=str(user.id)  # Converter para string; validade em JWT_REFRESH_TOKEN_EXPIRES
         )
         
         return jsonify({
@@ -155,12 +153,10 @@ def registro_psicologo():
         
         # Criar tokens
         access_token = create_access_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(hours=1)
+            identity=str(user.id)  # Converter para string; validade em JWT_ACCESS_TOKEN_EXPIRES
         )
         refresh_token = create_refresh_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(days=30)
+            identity=str(user.id)  # Converter para string; validade em JWT_REFRESH_TOKEN_EXPIRES
         )
         
         return jsonify({
@@ -193,12 +189,10 @@ def login():
         
         # Criar tokens
         access_token = create_access_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(hours=1)
+            identity=str(user.id)  # Converter para string; validade em JWT_ACCESS_TOKEN_EXPIRES
         )
         refresh_token = create_refresh_token(
-            identity=str(user.id),  # Converter para string
-            expires_delta=timedelta(days=30)
+            identity=str(user.id)  # Converter para string; validade em JWT_REFRESH_TOKEN_EXPIRES
         )
         
         return jsonify({
@@ -223,8 +217,7 @@ def refresh():
             return jsonify({"message": "Usuário não encontrado ou inativo"}), 404
         
         new_token = create_access_token(
-            identity=current_user_id,
-            expires_delta=timedelta(hours=1)
+            identity=current_user_id
         )
         
         return jsonify({
@@ -251,7 +244,7 @@ def refresh_with_body():
         if not user or not user.ativo:
             return jsonify({"message": "Usuário não encontrado ou inativo"}), 404
 
-        new_token = create_access_token(identity=user_id, expires_delta=timedelta(hours=1))
+        new_token = create_access_token(identity=user_id)
         return jsonify({"access_token": new_token}), 200
 
     except Exception as e:
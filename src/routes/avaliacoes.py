@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
 from src.models.avaliacao import Avaliacao
+from src.utils.paginacao import CursorInvalido, paginar, parametros_paginacao
 import json
 
 avaliacoes_bp = Blueprint("avaliacoes", __name__)
@@ -39,7 +40,16 @@ def criar_avaliacao():
 def get_avaliacoes():
     try:
         user_id = get_jwt_identity()
-        avaliacoes = Avaliacao.query.filter_by(usuario_id=user_id).order_by(Avaliacao.data_criacao.desc()).all()
-        return jsonify({"avaliacoes": [avaliacao.to_dict() for avaliacao in avaliacoes]}), 200
+        limite, cursor = parametros_paginacao()
+        avaliacoes, proximo_cursor = paginar(
+            Avaliacao.query.filter_by(usuario_id=user_id),
+            (Avaliacao.data_criacao, Avaliacao.id), limite, cursor
+        )
+        corpo = {"avaliacoes": [avaliacao.to_dict() for avaliacao in avaliacoes]}
+        if limite is not None:
+            corpo["next_cursor"] = proximo_cursor
+        return jsonify(corpo), 200
+    except CursorInvalido as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": "Erro ao buscar avaliações", "error": str(e)}), 500
\ No newline at end of file
@@ -4,6 +4,7 @@ from src.extensions import db
 from src.models.agendamento import Agendamento
 from src.models.user import User
 from src.models.avaliacao import Avaliacao
+from src.utils.paginacao import CursorInvalido, paginar, parametros_paginacao
 
 avaliacoes_agendamento_bp = Blueprint("avaliacoes_agendamento", __name__)
 
@@ -34,15 +35,25 @@ def get_avaliacoes_por_agendamento(agendamento_id):
         return jsonify({"message": "O aluno não permitiu o acesso às suas autoavaliações para esta consulta"}), 403
 
     # Buscar as autoavaliações do aluno
-    avaliacoes = Avaliacao.query.filter_by(usuario_id=agendamento.aluno_id).order_by(Avaliacao.data_criacao.desc()).all()
+    try:
+        limite, cursor = parametros_paginacao()
+        avaliacoes, proximo_cursor = paginar(
+            Avaliacao.query.filter_by(usuario_id=agendamento.aluno_id),
+            (Avaliacao.data_criacao, Avaliacao.id), limite, cursor
+        )
+    except CursorInvalido as e:
+        return jsonify({"message": str(e)}), 400
     
     avaliacoes_list = []
     for avaliacao in avaliacoes:
         avaliacao_dict = avaliacao.to_dict()
         avaliacoes_list.append(avaliacao_dict)
 
-    return jsonify({
+    corpo = {
         "agendamento_id": agendamento_id,
         "aluno_nome": agendamento.aluno.nome if agendamento.aluno else "Desconhecido",
         "avaliacoes": avaliacoes_list
-    }), 200
\ No newline at end of file
+    }
+    if limite is not None:
+        corpo["next_cursor"] = proximo_cursor
+    return jsonify(corpo), 200
\ No newline at end of file
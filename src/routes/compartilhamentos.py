@@ -1,11 +1,53 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import joinedload
 from src.models.user import db, User
 from src.models.avaliacao import Avaliacao
 from src.models.compartilhamento import Compartilhamento
+from src.utils.paginacao import CursorInvalido, paginar, parametros_paginacao
 
 compartilhamentos_bp = Blueprint('compartilhamentos', __name__)
 
+# Colunas do resumo da avaliação (modo compacto não carrega as colunas JSON)
+COLUNAS_RESUMO_AVALIACAO = (Avaliacao.id, Avaliacao.nivel_risco, Avaliacao.pontuacao_total, Avaliacao.data_criacao)
+
+def _listar_compartilhamentos(filtro, relacao):
+    """
+    Lista compartilhamentos com o outro usuário (relacao: 'aluno' ou 'psicologo')
+    e a avaliação carregados no mesmo SELECT. Aceita limit/cursor (paginação por
+    chave) e compacto=true (apenas nome do usuário e resumo da avaliação).
+    """
+    limite, cursor = parametros_paginacao()
+    compacto = request.args.get('compacto', 'false').lower() in ('1', 'true')
+
+    carregar_avaliacao = joinedload(Compartilhamento.avaliacao)
+    if compacto:
+        carregar_avaliacao = carregar_avaliacao.load_only(*COLUNAS_RESUMO_AVALIACAO)
+    consulta = Compartilhamento.query.options(
+        joinedload(getattr(Compartilhamento, relacao)), carregar_avaliacao
+    ).filter(filtro)
+    compartilhamentos, proximo_cursor = paginar(
+        consulta, (Compartilhamento.data_compartilhamento, Compartilhamento.id), limite, cursor
+    )
+
+    resultado = []
+    for comp in compartilhamentos:
+        comp_dict = comp.to_dict()
+        usuario = getattr(comp, relacao)
+        avaliacao = comp.avaliacao
+        if compacto:
+            comp_dict[relacao] = {'id': usuario.id, 'nome': usuario.nome} if usuario else None
+            comp_dict['avaliacao'] = avaliacao.to_dict_resumo() if avaliacao else None
+        else:
+            comp_dict[relacao] = usuario.to_dict() if usuario else None
+            comp_dict['avaliacao'] = avaliacao.to_dict() if avaliacao else None
+        resultado.append(comp_dict)
+
+    corpo = {'compartilhamentos': resultado}
+    if limite is not None:
+        corpo['next_cursor'] = proximo_cursor
+    return jsonify(corpo), 200
+
 @compartilhamentos_bp.route('', methods=['POST'])
 @jwt_required()
 def compartilhar_avaliacao():
@@ -82,21 +124,10 @@ def listar_compartilhamentos_enviados():
         if not user or user.tipo_usuario != 'aluno':
             return jsonify({'message': 'Apenas alunos podem ver compartilhamentos enviados'}), 403
         
-        compartilhamentos = Compartilhamento.query.filter_by(aluno_id=current_user_id).all()
-        
-        resultado = []
-        for comp in compartilhamentos:
-            comp_dict = comp.to_dict()
-            # Adicionar informações do psicólogo
-            psicologo = User.query.get(comp.psicologo_id)
-            comp_dict['psicologo'] = psicologo.to_dict() if psicologo else None
-            # Adicionar informações da avaliação
-            avaliacao = Avaliacao.query.get(comp.avaliacao_id)
-            comp_dict['avaliacao'] = avaliacao.to_dict() if avaliacao else None
-            resultado.append(comp_dict)
-        
-        return jsonify({'compartilhamentos': resultado}), 200
+        return _listar_compartilhamentos(Compartilhamento.aluno_id == user.id, 'psicologo')
         
+    except CursorInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
@@ -111,21 +142,10 @@ def listar_compartilhamentos_recebidos():
         if not user or user.tipo_usuario != 'psicologo':
             return jsonify({'message': 'Apenas psicólogos podem ver compartilhamentos recebidos'}), 403
         
-        compartilhamentos = Compartilhamento.query.filter_by(psicologo_id=current_user_id).all()
-        
-        resultado = []
-        for comp in compartilhamentos:
-            comp_dict = comp.to_dict()
-            # Adicionar informações do aluno
-            aluno = User.query.get(comp.aluno_id)
-            comp_dict['aluno'] = aluno.to_dict() if aluno else None
-            # Adicionar informações da avaliação
-            avaliacao = Avaliacao.query.get(comp.avaliacao_id)
-            comp_dict['avaliacao'] = avaliacao.to_dict() if avaliacao else None
-            resultado.append(comp_dict)
-        
-        return jsonify({'compartilhamentos': resultado}), 200
+        return _listar_compartilhamentos(Compartilhamento.psicologo_id == user.id, 'aluno')
         
+    except CursorInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
@@ -171,12 +191,18 @@ def listar_psicologos():
         if not user or user.tipo_usuario != 'aluno':
             return jsonify({'message': 'Apenas alunos podem ver lista de psicólogos'}), 403
         
-        psicologos = User.query.filter_by(tipo_usuario='psicologo', ativo=True).all()
+        limite, cursor = parametros_paginacao()
+        psicologos, proximo_cursor = paginar(
+            User.query.filter_by(tipo_usuario='psicologo', ativo=True), (User.id,), limite, cursor, descendente=False
+        )
         
-        return jsonify({
-            'psicologos': [psicologo.to_dict() for psicologo in psicologos]
-        }), 200
+        corpo = {'psicologos': [psicologo.to_dict() for psicologo in psicologos]}
+        if limite is not None:
+            corpo['next_cursor'] = proximo_cursor
+        return jsonify(corpo), 200
         
+    except CursorInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': f'Erro interno: {str(e)}'}), 500
 
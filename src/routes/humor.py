@@ -1,13 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import db
 from src.models.humor import RegistroHumor
-from src.utils.cache import HumorCache
+from src.models.resumo_humor import ResumoDiarioHumor
+from src.models.estatistica_tag import EstatisticaTag
+from src.utils.cache import HumorCache, AnalyticsCache
+from src.utils.periodos import GRANULARIDADES
+from src.utils.http_cache import etag_condicional, versao_colecao
+from src.utils.paginacao import CursorInvalido, paginar, parametros_paginacao
 import json
 from datetime import datetime, date
 
 humor_bp = Blueprint("humor", __name__)
 
+def versao_registros_humor():
+    """Versão dos registros de humor do usuário autenticado (para ETag)"""
+    user_id = int(get_jwt_identity())
+    return user_id, versao_colecao(RegistroHumor, RegistroHumor.usuario_id == user_id)
+
 @humor_bp.route("/humor", methods=["POST"])
 @jwt_required()
 def registrar_humor():
@@ -22,20 +32,25 @@ def registrar_humor():
             usuario_id=user_id,
             nivel_humor=data["nivel_humor"],
             descricao=data.get("descricao"),
-            emocoes=json.dumps(data.get("emocoes")) if data.get("emocoes") else None,
-            fatores_influencia=json.dumps(data.get("fatores_influencia")) if data.get("fatores_influencia") else None,
-            atividades=json.dumps(data.get("atividades")) if data.get("atividades") else None,
-            atividades_planejadas=json.dumps(data.get("atividades_planejadas")) if data.get("atividades_planejadas") else None,
             horas_sono=data.get("horas_sono"),
             qualidade_sono=data.get("qualidade_sono"),
             nivel_estresse=data.get("nivel_estresse"),
             notas=data.get("notas"),
             data_registro=datetime.fromisoformat(data.get("data_registro").replace('Z', '+00:00')) if data.get("data_registro") else datetime.now()        )
+        # Os setters gravam o JSON e as tags normalizadas do registro
+        novo_registro.set_emocoes(data.get("emocoes"))
+        novo_registro.set_fatores_influencia(data.get("fatores_influencia"))
+        novo_registro.set_atividades(data.get("atividades"))
+        novo_registro.set_atividades_planejadas(data.get("atividades_planejadas"))
         db.session.add(novo_registro)
+        # Atualizar o resumo diário e as estatísticas por tag na mesma transação do registro
+        ResumoDiarioHumor.acumular(novo_registro)
+        EstatisticaTag.acumular(novo_registro)
         db.session.commit()
         
-        # Invalidar cache do usuário após novo registro
+        # Invalidar cache do usuário e as janelas de analytics que contêm o novo registro
         HumorCache.invalidate_user_cache(user_id)
+        AnalyticsCache.invalidate_windows(user_id, novo_registro.data_registro)
         
         return jsonify({"message": "Registro de humor salvo com sucesso!", "registro": novo_registro.to_dict()}), 201
     except Exception as e:
@@ -44,10 +59,26 @@ def registrar_humor():
 
 @humor_bp.route("/humor", methods=["GET"])
 @jwt_required()
+@etag_condicional(versao_registros_humor)
 def get_registros_humor():
     user_id = int(get_jwt_identity())
     limite = request.args.get("limite", 10, type=int)
 
+    if "limit" in request.args or "cursor" in request.args:
+        # Histórico paginado por chave (data do registro, id), sem passar pelo cache
+        try:
+            registros, proximo_cursor = paginar(
+                RegistroHumor.query.filter_by(usuario_id=user_id),
+                (RegistroHumor.data_registro, RegistroHumor.id),
+                *parametros_paginacao()
+            )
+        except CursorInvalido as e:
+            return jsonify({"message": str(e)}), 400
+        return jsonify({
+            "registros": [registro.to_dict() for registro in registros],
+            "next_cursor": proximo_cursor
+        }), 200
+
     try:
         # Usar cache para registros recentes
         registros = HumorCache.get_recent_records(user_id, limite)
@@ -63,6 +94,7 @@ def get_registros_humor():
 
 @humor_bp.route("/humor/estatisticas", methods=["GET"])
 @jwt_required()
+@etag_condicional(versao_registros_humor)
 def get_estatisticas_humor():
     user_id = int(get_jwt_identity())
     
@@ -117,27 +149,17 @@ def get_tendencias_humor():
     try:
         user_id = int(get_jwt_identity())
         days = request.args.get("days", 30, type=int)
+        granularidade = request.args.get("granularidade", "dia")
+        
+        if granularidade not in GRANULARIDADES:
+            return jsonify({'error': f"Granularidade inválida. Use: {', '.join(GRANULARIDADES)}"}), 400
         
-        # Consulta otimizada com limite de data
+        # Agregação feita no banco: uma linha por período, não por registro
         from datetime import datetime, date, timedelta
         data_limite = datetime.now().date() - timedelta(days=days)
+        tendencias = RegistroHumor.agregar_por_periodo(user_id, data_limite, granularidade)
         
-        registros = RegistroHumor.query.filter(
-            RegistroHumor.usuario_id == user_id,
-            RegistroHumor.data_registro >= data_limite
-        ).order_by(RegistroHumor.data_registro.asc()).all()
-        
-        # Processar dados para gráfico de tendências
-        tendencias = []
-        for registro in registros:
-            tendencias.append({
-                'data': registro.data_registro.strftime('%Y-%m-%d'),
-                'humor': registro.nivel_humor,
-                'estresse': registro.nivel_estresse or 0,
-                'sono': registro.qualidade_sono or 0
-            })
-        
-        return jsonify({'tendencias': tendencias}), 200
+        return jsonify({'tendencias': tendencias, 'granularidade': granularidade}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -149,8 +171,17 @@ def get_cache_stats():
     try:
         user_id = int(get_jwt_identity()) # Adicionado para evitar erro de lint, embora não seja usado
         from src.utils.cache import get_cache_stats
-        from src.utils.cache import get_cache_stats
         stats = get_cache_stats()
         return jsonify(stats), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@humor_bp.route("/humor/cache/metrics", methods=["GET"])
+@jwt_required()
+def get_cache_metrics():
+    """Métricas do cache no formato texto do Prometheus"""
+    try:
+        from src.utils.cache import get_cache_metrics
+        return Response(get_cache_metrics(), mimetype="text/plain; version=0.0.4")
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import db
 from src.models.user import User
 from src.models.humor import RegistroHumor
+from src.utils.cache import AnalyticsCache
 from datetime import datetime, timedelta
 import json
 
@@ -91,73 +92,8 @@ def sugestoes_baseadas_historico():
     user_id = get_jwt_identity()
     
     try:
-        # Buscar registros dos últimos 7 dias
-        data_limite = datetime.now().date() - timedelta(days=7)
-        registros = RegistroHumor.query.filter(
-            RegistroHumor.usuario_id == user_id,
-            RegistroHumor.data_registro >= data_limite
-        ).all()
-        
-        if not registros:
-            return jsonify({
-                "sugestoes": [
-                    "Que tal começar registrando como você se sente hoje?",
-                    "Registrar seu humor diariamente pode ajudar no autoconhecimento.",
-                    "Experimente anotar uma atividade que planeja fazer amanhã!"
-                ]
-            }), 200
-        
-        # Analisar padrões
-        atividades_positivas = []
-        emocoes_frequentes = []
-        
-        for registro in registros:
-            if registro.nivel_humor >= 4:  # Humor bom ou muito bom
-                if registro.atividades:
-                    try:
-                        atividades = json.loads(registro.atividades)
-                        atividades_positivas.extend(atividades)
-                    except:
-                        pass
-            
-            if registro.emocoes:
-                try:
-                    emocoes = json.loads(registro.emocoes)
-                    emocoes_frequentes.extend(emocoes)
-                except:
-                    pass
-        
-        # Contar frequências
-        from collections import Counter
-        atividades_counter = Counter(atividades_positivas)
-        emocoes_counter = Counter(emocoes_frequentes)
-        
-        sugestoes = []
-        
-        if atividades_counter:
-            atividade_top = atividades_counter.most_common(1)[0][0]
-            sugestoes.append(f"Você costuma se sentir bem quando faz: {atividade_top}. Que tal planejar isso para hoje?")
-        
-        if emocoes_counter:
-            emocao_top = emocoes_counter.most_common(1)[0][0]
-            sugestoes.append(f"Você tem se sentido {emocao_top.lower()} frequentemente. Como está se sentindo hoje?")
-        
-        if len(registros) >= 3:
-            media_humor = sum(r.nivel_humor for r in registros) / len(registros)
-            if media_humor >= 4:
-                sugestoes.append("Seu humor tem estado ótimo! Continue assim!")
-            elif media_humor <= 2:
-                sugestoes.append("Notamos que seu humor tem estado baixo. Lembre-se de que é normal e você pode buscar ajuda se precisar.")
-        
-        if not sugestoes:
-            sugestoes = [
-                "Continue registrando seu humor para obtermos insights personalizados!",
-                "Que tal experimentar uma nova atividade hoje?",
-                "Lembre-se de cuidar do seu bem-estar mental."
-            ]
-        
-        return jsonify({"sugestoes": sugestoes}), 200
+        # Sugestões a partir dos últimos 7 dias (cacheadas por usuário e dia)
+        return jsonify(AnalyticsCache.get_suggestions(user_id, 7)), 200
         
     except Exception as e:
         return jsonify({"message": "Erro ao gerar sugestões", "error": str(e)}), 500
-
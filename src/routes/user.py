@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import db, User
+from src.utils.paginacao import CursorInvalido, com_cursor, paginar, parametros_paginacao
 
 user_bp = Blueprint('user', __name__)
 
@@ -101,8 +102,11 @@ def atualizar_perfil():
 
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    try:
+        users, proximo_cursor = paginar(User.query, (User.id,), *parametros_paginacao(), descendente=False)
+    except CursorInvalido as e:
+        return jsonify({'message': str(e)}), 400
+    return com_cursor(jsonify([user.to_dict() for user in users]), proximo_cursor)
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
@@ -0,0 +1,245 @@
+"""
+Representação compacta das agendas dos psicólogos em bits.
+
+Cada dia é dividido em slots de 1 minuto (1440 por dia), então qualquer horário
+"HH:MM" da disponibilidade tem o seu slot. Para cada dia da semana e slot oferecido
+há um inteiro cujos bits indicam quais psicólogos atendem naquele horário; para
+cada data e slot, outro inteiro indica quem já está ocupado. "Quem está livre em X"
+vira uma operação AND/NOT sobre todos os psicólogos de uma vez, e as buscas
+percorrem apenas os slots que algum psicólogo oferece naquele dia da semana.
+
+O índice fica em memória e acompanha os contadores de versão mantidos por
+snapshot_psicologos: é refeito por inteiro (duas consultas) na primeira vez,
+quando o cadastro de algum psicólogo muda ou quando o dia vira; quando só
+agendamentos mudam, apenas os horários ocupados dos psicólogos afetados são
+recarregados.
+"""
+import copy
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models.agendamento import Agendamento, STATUS_ATIVOS
+from src.models.versao_dados import VersaoDados
+from src.utils.disponibilidade import DIAS_SEMANA, JANELA_DIAS
+
+SLOT_MINUTOS = 1
+SLOTS_POR_DIA = 24 * 60 // SLOT_MINUTOS
+
+
+def horario_para_slot(hora):
+    """"HH:MM" -> índice do slot (None se não for um horário válido)"""
+    try:
+        horas, minutos = (int(parte) for parte in hora.split(":"))
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= horas < 24 and 0 <= minutos < 60) or minutos % SLOT_MINUTOS:
+        return None
+    return (horas * 60 + minutos) // SLOT_MINUTOS
+
+
+def primeiro_slot(data, agora):
+    """Primeiro slot da data que ainda não começou (SLOTS_POR_DIA se a data já passou)"""
+    if data > agora.date():
+        return 0
+    if data < agora.date():
+        return SLOTS_POR_DIA
+    # Um slot que começa exatamente agora ainda pode ser agendado (como em create_agendamento)
+    minutos = agora.hour * 60 + agora.minute + (1 if agora.second or agora.microsecond else 0)
+    return -(-minutos // SLOT_MINUTOS)
+
+
+def slot_para_horario(slot):
+    minutos = slot * SLOT_MINUTOS
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _posicoes(bits):
+    """Índices dos bits ligados, do menor para o maior"""
+    posicoes = []
+    while bits:
+        menor = bits & -bits
+        posicoes.append(menor.bit_length() - 1)
+        bits ^= menor
+    return posicoes
+
+
+class IndiceAgenda:
+    """Índice imutável das agendas; uma nova instância é criada a cada atualização"""
+
+    def __init__(self, versoes, hoje):
+        self.versoes = versoes  # {nome: versão} dos contadores de VersaoDados refletidos no índice
+        self.versao = versoes.get(VersaoDados.PSICOLOGOS, 0)
+        self.hoje = hoje
+        self.psicologos = []  # posição -> {"id", "name", "specialty"}
+        self.posicao = {}  # psicologo_id -> posição
+        self.todos = 0
+        # weekday -> {slot: bits dos psicólogos que atendem}
+        self.atendem = [defaultdict(int) for _ in range(7)]
+        # weekday -> slots oferecidos por algum psicólogo, em ordem
+        self.slots = [[] for _ in range(7)]
+        # (data, slot) -> bits dos psicólogos ocupados
+        self.ocupados = defaultdict(int)
+        self.por_especialidade = defaultdict(int)
+        self.por_modalidade = defaultdict(int)
+
+    @classmethod
+    def construir(cls, versoes, hoje):
+        from src.models.user import User
+
+        indice = cls(versoes, hoje)
+        psicologos = User.query.filter_by(tipo_usuario="psicologo", ativo=True).order_by(User.id).all()
+        for posicao, p in enumerate(psicologos):
+            bit = 1 << posicao
+            indice.posicao[p.id] = posicao
+            indice.todos |= bit
+            indice.psicologos.append({
+                "id": p.id,
+                "name": p.nome,
+                "specialty": p.especialidades[0] if p.especialidades else "Geral"
+            })
+            for especialidade in p.especialidades or []:
+                if isinstance(especialidade, str):
+                    indice.por_especialidade[especialidade.strip().lower()] |= bit
+            for modalidade in p.modalidades_atendimento or []:
+                indice.por_modalidade[modalidade] |= bit
+            disponibilidade = p.disponibilidade if isinstance(p.disponibilidade, dict) else {}
+            for dia_semana, horarios in disponibilidade.items():
+                weekday = DIAS_SEMANA.get(dia_semana)
+                if weekday is None:
+                    continue
+                for hora in horarios:
+                    slot = horario_para_slot(hora)
+                    if slot is not None:
+                        indice.atendem[weekday][slot] |= bit
+        indice.slots = [sorted(atendem) for atendem in indice.atendem]
+        indice._marcar_ocupados()
+        return indice
+
+    def atualizar(self, versoes):
+        """
+        Novo índice com as versões informadas, recarregando só os horários ocupados
+        dos psicólogos cuja agenda mudou; o cadastro e os demais horários são reaproveitados.
+        """
+        prefixo = VersaoDados.PREFIXO_AGENDA
+        alterados = [
+            int(nome[len(prefixo):]) for nome, versao in versoes.items()
+            if nome.startswith(prefixo) and self.versoes.get(nome) != versao
+        ]
+        alterados = [psicologo_id for psicologo_id in alterados if psicologo_id in self.posicao]
+
+        indice = copy.copy(self)
+        indice.versoes = versoes
+        indice.versao = versoes.get(VersaoDados.PSICOLOGOS, 0)
+        if alterados:
+            mascara = 0
+            for psicologo_id in alterados:
+                mascara |= 1 << self.posicao[psicologo_id]
+            indice.ocupados = defaultdict(int)
+            for chave, bits in self.ocupados.items():
+                if bits & ~mascara:
+                    indice.ocupados[chave] = bits & ~mascara
+            indice._marcar_ocupados(alterados)
+        return indice
+
+    def _marcar_ocupados(self, psicologo_ids=None):
+        """Marca os horários da janela com agendamento ativo, de todos os psicólogos ou só dos informados"""
+        consulta = db.select(
+            Agendamento.psicologo_id,
+            Agendamento.data_agendamento,
+            Agendamento.hora_agendamento
+        ).where(
+            Agendamento.status.in_(STATUS_ATIVOS),
+            Agendamento.data_agendamento >= self.hoje,
+            Agendamento.data_agendamento < self.hoje + timedelta(days=JANELA_DIAS)
+        )
+        if psicologo_ids is not None:
+            consulta = consulta.where(Agendamento.psicologo_id.in_(psicologo_ids))
+        for psicologo_id, data, hora in db.session.execute(consulta):
+            posicao = self.posicao.get(psicologo_id)
+            slot = horario_para_slot(hora.strftime("%H:%M"))
+            if posicao is not None and slot is not None:
+                self.ocupados[(data, slot)] |= 1 << posicao
+
+    def filtro(self, especialidade=None, modalidade=None):
+        """Bits dos psicólogos que atendem a especialidade e a modalidade (quando informadas)"""
+        bits = self.todos
+        if especialidade:
+            bits &= self.por_especialidade.get(especialidade.strip().lower(), 0)
+        if modalidade:
+            bits &= self.por_modalidade.get(modalidade, 0)
+        return bits
+
+    def livres(self, data, slot, filtro=None):
+        """Bits dos psicólogos livres na data e slot"""
+        if not 0 <= (data - self.hoje).days < JANELA_DIAS:
+            return 0
+        bits = self.atendem[data.weekday()].get(slot, 0) & ~self.ocupados.get((data, slot), 0)
+        return bits & filtro if filtro is not None else bits
+
+    def listar(self, bits):
+        return [self.psicologos[posicao] for posicao in _posicoes(bits)]
+
+    def proximo_horario(self, a_partir, filtro):
+        """Primeiro (data, slot, bits) com algum psicólogo livre a partir do instante informado"""
+        primeiro_dia = max(a_partir.date(), self.hoje)
+        for i in range((self.hoje + timedelta(days=JANELA_DIAS) - primeiro_dia).days):
+            data = primeiro_dia + timedelta(days=i)
+            # Slots que já começaram não podem ser agendados
+            slots = self.slots[data.weekday()]
+            for slot in slots[bisect_left(slots, primeiro_slot(data, a_partir)):]:
+                bits = self.livres(data, slot, filtro)
+                if bits:
+                    return data, slot, bits
+        return None
+
+    def horarios_livres(self, psicologo_id, data):
+        """Bits dos slots livres de um psicólogo na data (bit i = slot i)"""
+        posicao = self.posicao.get(psicologo_id)
+        if posicao is None:
+            return 0
+        bit = 1 << posicao
+        slots = 0
+        for slot in self.slots[data.weekday()]:
+            if self.livres(data, slot) & bit:
+                slots |= 1 << slot
+        return slots
+
+    def horarios_em_comum(self, psicologo_ids, data, agora):
+        """Horários ("HH:MM") ainda não iniciados em que todos os psicólogos informados estão livres na data"""
+        slots = ((1 << SLOTS_POR_DIA) - 1) & ~((1 << primeiro_slot(data, agora)) - 1)
+        for psicologo_id in psicologo_ids:
+            slots &= self.horarios_livres(psicologo_id, data)
+        return [slot_para_horario(slot) for slot in _posicoes(slots)]
+
+
+_lock = threading.Lock()
+_indice = None
+
+
+def obter_indice():
+    """
+    Índice atual. Se a versão dos dados de psicólogos mudou, recarrega só as agendas
+    alteradas; refaz tudo se o cadastro de algum psicólogo mudou ou se o dia virou.
+    """
+    global _indice
+    from src.utils.snapshot_psicologos import versao_psicologos
+
+    versao, hoje = versao_psicologos(), date.today()
+    indice = _indice
+    if indice is not None and indice.versao == versao and indice.hoje == hoje:
+        return indice
+    with _lock:
+        indice = _indice
+        if indice is not None and indice.versao == versao and indice.hoje == hoje:
+            return indice
+        # Lidas antes dos agendamentos: uma escrita concorrente gera outra versão e é recarregada depois
+        versoes = VersaoDados.ler_todas()
+        perfis = VersaoDados.PERFIS_PSICOLOGOS
+        if indice is None or indice.hoje != hoje or indice.versoes.get(perfis) != versoes.get(perfis):
+            _indice = IndiceAgenda.construir(versoes, hoje)
+        else:
+            _indice = indice.atualizar(versoes)
+        return _indice
@@ -0,0 +1,269 @@
+"""
+Cálculos das rotas de analytics e das sugestões de lembretes.
+
+Cada função recebe o usuário, a janela em dias e a data de referência e
+devolve o corpo JSON da resposta, para que o resultado possa ser cacheado
+por (usuário, janela, dia) em AnalyticsCache.
+"""
+from datetime import datetime, timedelta
+
+from src.models.estatistica_tag import CoocorrenciaTag
+from src.models.resumo_humor import ResumoDiarioHumor
+from src.models.tag import Tag, RegistroHumorTag
+from src.utils.analytics_engine import analisar_periodo
+from src.utils.correlacoes import calcular_correlacoes
+from src.utils.periodos import formatar_periodo
+
+# Quantidade de períodos comparados no cálculo da tendência (primeira x última semana)
+PERIODOS_TENDENCIA = {"dia": 7, "semana": 1, "mes": 1}
+
+
+def _arredondar(valor):
+    return round(valor, 2) if valor is not None else None
+
+
+def _media(soma, registros):
+    return round(soma / registros, 2) if registros else 0
+
+
+def analisar_correlacoes(user_id, dias, hoje):
+    """Correlação entre humor e atividades, emoções e fatores na janela"""
+    data_limite = hoje - timedelta(days=dias)
+    resumo = ResumoDiarioHumor.agregar_periodo(user_id, data_limite)
+
+    if not resumo["total_registros"]:
+        return {
+            "message": "Não há dados suficientes para análise",
+            "correlacoes": [],
+            "resumo": {
+                "total_registros": 0,
+                "periodo_dias": dias
+            }
+        }
+
+    # Efeito de cada tag sobre o humor (estatísticas suficientes por tag)
+    correlacoes = calcular_correlacoes(user_id, data_limite)
+    correlacoes_atividades = correlacoes["atividades"]
+    correlacoes_fatores = correlacoes["fatores_influencia"]
+
+    # Estatísticas gerais (a partir dos resumos diários)
+    media_geral = resumo["media_humor"]
+
+    # Insights automáticos
+    insights = []
+
+    # Atividades mais positivas
+    if correlacoes_atividades:
+        melhor_atividade = correlacoes_atividades[0]
+        if melhor_atividade["media_humor"] >= 4:
+            insights.append(f"A atividade '{melhor_atividade['item']}' está associada ao seu melhor humor (média {melhor_atividade['media_humor']}).")
+
+    # Fatores mais negativos
+    fatores_negativos = [f for f in correlacoes_fatores if f["impacto"] == "negativo"]
+    if fatores_negativos:
+        pior_fator = fatores_negativos[-1]  # Último da lista ordenada
+        insights.append(f"O fator '{pior_fator['item']}' parece impactar negativamente seu humor (média {pior_fator['media_humor']}).")
+
+    # Padrões de humor
+    if media_geral >= 4:
+        insights.append("Seu humor tem estado consistentemente positivo no período analisado!")
+    elif media_geral <= 2:
+        insights.append("Seu humor tem estado baixo. Considere buscar atividades que te fazem bem.")
+
+    return {
+        "correlacoes": correlacoes,
+        "resumo": {
+            "total_registros": resumo["total_registros"],
+            "periodo_dias": dias,
+            "media_humor_geral": round(media_geral, 2),
+            "data_inicio": data_limite.isoformat(),
+            "data_fim": hoje.isoformat()
+        },
+        # Tags que costumam aparecer juntas nos registros da janela
+        "coocorrencias": coocorrencias(user_id, data_limite),
+        "insights": insights
+    }
+
+
+def coocorrencias(user_id, data_limite):
+    """Tags que costumam aparecer juntas nos registros da janela"""
+    return [
+        {"itens": [item_a, item_b], "frequencia": frequencia}
+        for item_a, item_b, frequencia in CoocorrenciaTag.mais_frequentes(user_id, data_limite)
+    ]
+
+
+def analisar_tendencias(user_id, dias, granularidade, hoje):
+    """Média, mínimo, máximo e contagem de humor, estresse e sono por dia, semana ou mês na janela"""
+    # Resumos diários agrupados por período no banco
+    data_limite = hoje - timedelta(days=dias)
+    periodos = ResumoDiarioHumor.por_periodo(user_id, data_limite, granularidade)
+
+    if not periodos:
+        return {
+            "message": "Não há dados suficientes",
+            "tendencias": []
+        }
+
+    medias = [soma / total for _, total, soma, *_ in periodos]
+
+    # Calcular tendência (simples: comparar primeira e última semana)
+    tamanho = PERIODOS_TENDENCIA[granularidade]
+
+    tendencia = "estável"
+    if len(medias) >= tamanho:
+        media_primeira = sum(medias[:tamanho]) / tamanho
+        media_ultima = sum(medias[-tamanho:]) / tamanho
+
+        diferenca = media_ultima - media_primeira
+        if diferenca > 0.5:
+            tendencia = "melhorando"
+        elif diferenca < -0.5:
+            tendencia = "piorando"
+
+    # Preparar dados para gráfico
+    formato = "%m/%Y" if granularidade == "mes" else "%d/%m"
+    dados_grafico = []
+    for periodo, media in zip(periodos, medias):
+        inicio, total, _, humor_min, humor_max = periodo[:5]
+        soma_estresse, registros_estresse, estresse_min, estresse_max = periodo[5:9]
+        soma_sono, registros_sono, sono_min, sono_max = periodo[9:]
+        data = formatar_periodo(inicio)
+        dados_grafico.append({
+            "data": data,
+            "humor": round(media, 2),
+            "humor_min": humor_min,
+            "humor_max": humor_max,
+            "registros": total,
+            "estresse": _media(soma_estresse, registros_estresse),
+            "estresse_min": estresse_min,
+            "estresse_max": estresse_max,
+            "registros_estresse": registros_estresse,
+            "sono": _media(soma_sono, registros_sono),
+            "sono_min": sono_min,
+            "sono_max": sono_max,
+            "registros_sono": registros_sono,
+            "data_formatada": datetime.fromisoformat(data).strftime(formato)
+        })
+
+    return {
+        "tendencias": dados_grafico,
+        "resumo": {
+            "tendencia_geral": tendencia,
+            "granularidade": granularidade,
+            "total_dias": len(dados_grafico),
+            "media_periodo": round(sum(medias) / len(medias), 2)
+        }
+    }
+
+
+def gerar_relatorio(user_id, dias, hoje):
+    """Relatório completo do humor na janela"""
+    # Estatísticas numéricas do período (motor vetorizado, uma única consulta)
+    data_limite = hoje - timedelta(days=dias)
+    estatisticas = analisar_periodo(user_id, data_limite)
+
+    if not estatisticas:
+        return {
+            "message": "Não há dados suficientes para gerar relatório"
+        }
+
+    total_registros = estatisticas["total_registros"]
+    media_humor = estatisticas["media"]
+
+    # Atividades e fatores de influência mais frequentes
+    atividades_frequentes = RegistroHumorTag.frequencias(user_id, Tag.ATIVIDADE, data_limite, limite=5)
+    fatores_frequentes = RegistroHumorTag.frequencias(user_id, Tag.FATOR, data_limite, limite=5)
+
+    # Qualidade do sono e nível de estresse (se disponíveis)
+    media_sono = estatisticas["media_sono"]
+    media_estresse = estatisticas["media_estresse"]
+
+    relatorio = {
+        "periodo": {
+            "inicio": data_limite.isoformat(),
+            "fim": hoje.isoformat(),
+            "total_registros": total_registros
+        },
+        "estatisticas_humor": {
+            "media": round(media_humor, 2),
+            "mais_frequente": estatisticas["mais_frequente"],
+            "distribuicao_percentual": estatisticas["distribuicao_percentual"],
+            "tendencia": estatisticas["tendencia"],
+            "media_movel_7_dias": estatisticas["media_movel"]
+        },
+        "atividades_frequentes": [
+            {"atividade": ativ, "frequencia": freq}
+            for ativ, freq in atividades_frequentes
+        ],
+        "fatores_influencia_frequentes": [
+            {"fator": fator, "frequencia": freq}
+            for fator, freq in fatores_frequentes
+        ],
+        "qualidade_sono_media": round(media_sono, 2) if media_sono else None,
+        "nivel_estresse_medio": round(media_estresse, 2) if media_estresse else None,
+        "correlacoes": {
+            "sono_humor": _arredondar(estatisticas["correlacao_sono_humor"]),
+            "estresse_humor": _arredondar(estatisticas["correlacao_estresse_humor"])
+        },
+        "recomendacoes": []
+    }
+
+    # Gerar recomendações
+    if media_humor >= 4:
+        relatorio["recomendacoes"].append("Parabéns! Seu humor tem estado ótimo. Continue com as atividades que te fazem bem!")
+    elif media_humor <= 2:
+        relatorio["recomendacoes"].append("Seu humor tem estado baixo. Considere buscar ajuda profissional e praticar atividades que te trazem alegria.")
+
+    if media_sono and media_sono < 3:
+        relatorio["recomendacoes"].append("Sua qualidade de sono pode estar afetando seu humor. Tente melhorar sua higiene do sono.")
+
+    if media_estresse and media_estresse > 3:
+        relatorio["recomendacoes"].append("Seus níveis de estresse estão elevados. Considere técnicas de relaxamento e manejo do estresse.")
+
+    return relatorio
+
+
+def gerar_sugestoes(user_id, dias, hoje):
+    """Sugestões de lembretes a partir do histórico recente"""
+    data_limite = hoje - timedelta(days=dias)
+    resumo = ResumoDiarioHumor.agregar_periodo(user_id, data_limite)
+
+    if not resumo["total_registros"]:
+        return {
+            "sugestoes": [
+                "Que tal começar registrando como você se sente hoje?",
+                "Registrar seu humor diariamente pode ajudar no autoconhecimento.",
+                "Experimente anotar uma atividade que planeja fazer amanhã!"
+            ]
+        }
+
+    # Analisar padrões (atividades em dias de humor bom ou muito bom e emoções mais frequentes)
+    atividades_positivas = RegistroHumorTag.frequencias(user_id, Tag.ATIVIDADE, data_limite, humor_minimo=4, limite=1)
+    emocoes_frequentes = RegistroHumorTag.frequencias(user_id, Tag.EMOCAO, data_limite, limite=1)
+
+    sugestoes = []
+
+    if atividades_positivas:
+        atividade_top = atividades_positivas[0][0]
+        sugestoes.append(f"Você costuma se sentir bem quando faz: {atividade_top}. Que tal planejar isso para hoje?")
+
+    if emocoes_frequentes:
+        emocao_top = emocoes_frequentes[0][0]
+        sugestoes.append(f"Você tem se sentido {emocao_top.lower()} frequentemente. Como está se sentindo hoje?")
+
+    if resumo["total_registros"] >= 3:
+        media_humor = resumo["media_humor"]
+        if media_humor >= 4:
+            sugestoes.append("Seu humor tem estado ótimo! Continue assim!")
+        elif media_humor <= 2:
+            sugestoes.append("Notamos que seu humor tem estado baixo. Lembre-se de que é normal e você pode buscar ajuda se precisar.")
+
+    if not sugestoes:
+        sugestoes = [
+            "Continue registrando seu humor para obtermos insights personalizados!",
+            "Que tal experimentar uma nova atividade hoje?",
+            "Lembre-se de cuidar do seu bem-estar mental."
+        ]
+
+    return {"sugestoes": sugestoes}
@@ -0,0 +1,129 @@
+"""
+Motor de analytics vetorizado (NumPy) para os registros de humor.
+
+Carrega apenas as colunas numéricas do período em uma única consulta Core e
+calcula as estatísticas sobre arrays, sem acessar atributo por atributo.
+"""
+import numpy as np
+
+from src.extensions import db
+
+NIVEIS_HUMOR = np.arange(1, 6)
+
+
+def carregar_colunas(usuario_id, data_inicio=None):
+    """
+    Busca nivel_humor, qualidade_sono, nivel_estresse e data_registro do período.
+    Retorna um dicionário de arrays; as datas são dias desde a época (datetime64[D]).
+    """
+    from src.models.humor import RegistroHumor
+
+    consulta = db.select(
+        RegistroHumor.nivel_humor,
+        RegistroHumor.qualidade_sono,
+        RegistroHumor.nivel_estresse,
+        db.cast(RegistroHumor.data_registro, db.String)
+    ).where(RegistroHumor.usuario_id == usuario_id)
+    if data_inicio is not None:
+        consulta = consulta.where(RegistroHumor.data_registro >= data_inicio)
+
+    linhas = db.session.execute(consulta).all()
+    if not linhas:
+        vazio = np.array([], dtype=float)
+        return {"humor": vazio, "sono": vazio, "estresse": vazio, "dias": np.array([], dtype=np.int64)}
+
+    humor, sono, estresse, datas = zip(*linhas)
+    return {
+        "humor": np.array(humor, dtype=float),
+        "sono": np.array(sono, dtype=float),  # None vira NaN
+        "estresse": np.array(estresse, dtype=float),
+        "dias": np.array([data[:10] for data in datas], dtype="datetime64[D]").astype(np.int64)
+    }
+
+
+def _media_positivos(valores):
+    """Média dos valores preenchidos (ignora NaN e zero, como os campos opcionais do formulário)"""
+    validos = valores[valores > 0]
+    return float(validos.mean()) if validos.size else None
+
+
+def _correlacao(x, y):
+    """Correlação de Pearson entre humor e um campo opcional, apenas nos pares preenchidos"""
+    mascara = y > 0
+    if mascara.sum() < 3:
+        return None
+    x, y = x[mascara], y[mascara]
+    if x.std() == 0 or y.std() == 0:
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+def calcular_estatisticas(colunas, janela_media_movel=7):
+    """Calcula todas as estatísticas do período sobre os arrays de carregar_colunas"""
+    humor = colunas["humor"]
+    total = int(humor.size)
+    if not total:
+        return None
+
+    # Distribuição e moda via bincount (apenas níveis válidos 1-5)
+    niveis = humor[(humor >= 1) & (humor <= 5)].astype(np.int64)
+    contagens = np.bincount(niveis, minlength=6)[1:]
+    distribuicao = {
+        int(nivel): int(contagem)
+        for nivel, contagem in zip(NIVEIS_HUMOR, contagens)
+        if contagem
+    }
+    mais_frequente = int(NIVEIS_HUMOR[contagens.argmax()]) if contagens.any() else None
+
+    # Média diária: soma e contagem por dia do calendário
+    dias = colunas["dias"]
+    indice = dias - dias.min()
+    soma_dia = np.bincount(indice, weights=humor)
+    contagem_dia = np.bincount(indice)
+    com_registro = contagem_dia > 0
+    media_dia = soma_dia[com_registro] / contagem_dia[com_registro]
+    datas_com_registro = (dias.min() + np.flatnonzero(com_registro)).astype("datetime64[D]")
+
+    # Média móvel sobre os dias do calendário (dias sem registro não entram na média)
+    kernel = np.ones(janela_media_movel)
+    soma_movel = np.convolve(soma_dia, kernel)[:soma_dia.size]
+    contagem_movel = np.convolve(contagem_dia, kernel)[:contagem_dia.size]
+    media_movel = soma_movel[com_registro] / contagem_movel[com_registro]
+
+    # Tendência: primeira x última semana de dias com registro
+    tendencia = "estável"
+    if media_dia.size >= 7:
+        diferenca = media_dia[-7:].mean() - media_dia[:7].mean()
+        if diferenca > 0.5:
+            tendencia = "melhorando"
+        elif diferenca < -0.5:
+            tendencia = "piorando"
+
+    return {
+        "total_registros": total,
+        "media": float(humor.mean()),
+        "mais_frequente": mais_frequente,
+        "distribuicao": distribuicao,
+        "distribuicao_percentual": {
+            str(nivel): round(contagem / total * 100, 1)
+            for nivel, contagem in distribuicao.items()
+        },
+        "media_sono": _media_positivos(colunas["sono"]),
+        "media_estresse": _media_positivos(colunas["estresse"]),
+        "media_diaria": [
+            {"data": str(data), "media": round(float(media), 2)}
+            for data, media in zip(datas_com_registro, media_dia)
+        ],
+        "media_movel": [
+            {"data": str(data), "media": round(float(media), 2)}
+            for data, media in zip(datas_com_registro, media_movel)
+        ],
+        "tendencia": tendencia,
+        "correlacao_sono_humor": _correlacao(humor, colunas["sono"]),
+        "correlacao_estresse_humor": _correlacao(humor, colunas["estresse"])
+    }
+
+
+def analisar_periodo(usuario_id, data_inicio=None):
+    """Carrega as colunas do período e calcula as estatísticas (None se não houver registros)"""
+    return calcular_estatisticas(carregar_colunas(usuario_id, data_inicio))
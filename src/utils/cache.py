@@ -1,85 +1,298 @@
+from contextlib import contextmanager
+from datetime import date, datetime
 from functools import wraps
-from datetime import datetime, timedelta
-import json
+import inspect
+import math
+import os
+import random
+import threading
+import time
 
-# Cache simples em memória (para produção, usar Redis ou Memcached)
-_cache = {}
-_cache_expiry = {}
+from src.utils.cache_backends import CacheLRU, criar_backend
+from src.utils.janelas import janela_cacheavel, janelas_afetadas
 
-def cache_result(expiry_minutes=5):
+_AUSENTE = object()
+
+# Limites superiores (segundos) do histograma de tempo de cálculo
+BUCKETS_TEMPO_CALCULO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class MetricasCache:
+    """
+    Contadores por função decorada: acertos, falhas, valores expirados servidos,
+    renovações antecipadas (XFetch, antes de expirar), remoções e tempo de cálculo
+    """
+
+    EVENTOS = ('hits', 'misses', 'stale_hits', 'early_refreshes', 'evictions', 'invalidations')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._funcoes = {}
+
+    def _funcao(self, nome):
+        metricas = self._funcoes.get(nome)
+        if metricas is None:
+            metricas = self._funcoes[nome] = {
+                **{evento: 0 for evento in self.EVENTOS},
+                "compute_count": 0,
+                "compute_seconds_sum": 0.0,
+                "compute_buckets": [0] * len(BUCKETS_TEMPO_CALCULO)
+            }
+        return metricas
+
+    def contar(self, evento, nome, quantidade=1):
+        with self._lock:
+            self._funcao(nome)[evento] += quantidade
+
+    def registrar_calculo(self, nome, segundos):
+        with self._lock:
+            metricas = self._funcao(nome)
+            metricas["compute_count"] += 1
+            metricas["compute_seconds_sum"] += segundos
+            for i, limite in enumerate(BUCKETS_TEMPO_CALCULO):
+                if segundos <= limite:
+                    metricas["compute_buckets"][i] += 1
+                    break
+
+    def resumo(self):
+        """Métricas por função, com taxa de acerto e histograma cumulativo"""
+        with self._lock:
+            funcoes = {nome: {**m, "compute_buckets": list(m["compute_buckets"])} for nome, m in self._funcoes.items()}
+        resumo = {}
+        for nome, m in funcoes.items():
+            consultas = m["hits"] + m["stale_hits"] + m["misses"] + m["early_refreshes"]
+            acumulado = 0
+            histograma = {}
+            for limite, quantidade in zip(BUCKETS_TEMPO_CALCULO, m["compute_buckets"]):
+                acumulado += quantidade
+                histograma[str(limite)] = acumulado
+            histograma["+Inf"] = m["compute_count"]
+            resumo[nome] = {
+                **{evento: m[evento] for evento in self.EVENTOS},
+                "hit_ratio": round((m["hits"] + m["stale_hits"]) / consultas, 4) if consultas else None,
+                "compute_count": m["compute_count"],
+                "compute_seconds_sum": round(m["compute_seconds_sum"], 6),
+                "compute_seconds_avg": round(m["compute_seconds_sum"] / m["compute_count"], 6) if m["compute_count"] else None,
+                "compute_seconds_histogram": histograma
+            }
+        return resumo
+
+    def prometheus(self):
+        """Métricas no formato texto do Prometheus"""
+        linhas = []
+        resumo = self.resumo()
+        for evento in self.EVENTOS:
+            linhas.append(f"# TYPE cache_{evento}_total counter")
+            for nome, m in resumo.items():
+                linhas.append(f'cache_{evento}_total{{function="{nome}"}} {m[evento]}')
+        linhas.append("# TYPE cache_compute_seconds histogram")
+        for nome, m in resumo.items():
+            for limite, quantidade in m["compute_seconds_histogram"].items():
+                linhas.append(f'cache_compute_seconds_bucket{{function="{nome}",le="{limite}"}} {quantidade}')
+            linhas.append(f'cache_compute_seconds_sum{{function="{nome}"}} {m["compute_seconds_sum"]}')
+            linhas.append(f'cache_compute_seconds_count{{function="{nome}"}} {m["compute_count"]}')
+        return "\n".join(linhas) + "\n"
+
+_metricas = MetricasCache()
+
+# Backend padrão: memória do processo. init_app troca pelo backend configurado
+# (ex: CACHE_BACKEND='sqlite' para compartilhar o cache entre os workers).
+_cache = CacheLRU()
+_cache.observador = _metricas.contar
+
+def init_app(app):
+    """Configura o backend do cache a partir de app.config"""
+    global _cache
+    nome = app.config.get('CACHE_BACKEND', 'memoria')
+    opcoes = {}
+    if 'CACHE_MAX_ENTRADAS' in app.config:
+        opcoes['max_entradas'] = app.config['CACHE_MAX_ENTRADAS']
+    if 'CACHE_MAX_BYTES' in app.config:
+        opcoes['max_bytes'] = app.config['CACHE_MAX_BYTES']
+    if nome == 'sqlite':
+        opcoes['caminho'] = app.config.get(
+            'CACHE_SQLITE_PATH',
+            os.path.join(app.instance_path, 'cache.db')
+        )
+    _cache = criar_backend(nome, **opcoes)
+    _cache.observador = _metricas.contar
+    return _cache
+
+def _tag_usuario(user_id):
+    return f"user:{user_id}"
+
+class _Voos:
+    """
+    Locks por chave para o single-flight: apenas uma thread do processo recalcula
+    uma chave por vez; as demais esperam o resultado ou usam o valor antigo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}  # chave -> [lock, quantidade de threads usando]
+
+    @contextmanager
+    def voo(self, chave, esperar=True):
+        """Entra no voo da chave; produz False se esperar=False e outra thread já estiver calculando"""
+        with self._lock:
+            registro = self._locks.setdefault(chave, [threading.Lock(), 0])
+            registro[1] += 1
+        adquirido = registro[0].acquire(blocking=esperar)
+        try:
+            yield adquirido
+        finally:
+            if adquirido:
+                registro[0].release()
+            with self._lock:
+                registro[1] -= 1
+                if not registro[1]:
+                    del self._locks[chave]
+
+_voos = _Voos()
+
+def _deve_recalcular(expira_em, duracao, agora, beta):
+    """
+    Expiração probabilística antecipada (XFetch): quanto mais perto da expiração
+    e mais cara a função, maior a chance de recalcular antes do prazo.
+    """
+    if agora >= expira_em:
+        return True
+    if beta <= 0:
+        return False
+    return agora - duracao * beta * math.log(1.0 - random.random()) >= expira_em
+
+def cache_result(expiry_minutes=5, tags=None, stale_minutes=0, early_refresh_beta=0, single_flight=True):
     """
     Decorator para cache de resultados de funções
     
     Args:
         expiry_minutes (int): Tempo de expiração do cache em minutos
+        tags (iterable): Modelos de tag formatados com os argumentos da chamada
+            (ex: "user:{user_id}"). Por padrão, funções com parâmetro user_id
+            recebem a tag do usuário, usada por clear_user_cache.
+        stale_minutes (int): Por quanto tempo após expirar o valor antigo ainda
+            pode ser devolvido enquanto outra thread recalcula
+        early_refresh_beta (float): Intensidade da renovação antecipada (XFetch);
+            0 desativa, 1 é o valor usual
+        single_flight (bool): Recalcular cada chave em apenas uma thread por vez
     """
     def decorator(func):
+        nome = f"{func.__module__}.{func.__qualname__}"
+        assinatura = inspect.signature(func)
+        modelos_tags = tuple(tags) if tags is not None else (
+            (_tag_usuario("{user_id}"),) if "user_id" in assinatura.parameters else ()
+        )
+
+        def tags_da_chamada(args, kwargs):
+            if not modelos_tags:
+                return ()
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            return tuple(modelo.format(**argumentos.arguments) for modelo in modelos_tags)
+
+        def calcular(cache_key, args, kwargs):
+            tags_chamada = tags_da_chamada(args, kwargs)
+            # Lidas antes de calcular: se uma invalidação chegar durante o cálculo,
+            # o resultado (já desatualizado) não é gravado
+            geracoes = _cache.geracoes(tags_chamada)
+            inicio = time.perf_counter()
+            result = func(*args, **kwargs)
+            duracao = time.perf_counter() - inicio
+            _metricas.registrar_calculo(nome, duracao)
+            # A entrada guarda a expiração lógica; o backend a mantém por mais
+            # stale_minutes para que o valor antigo possa ser servido
+            _cache.set(
+                cache_key,
+                (result, time.time() + expiry_minutes * 60, duracao),
+                (expiry_minutes + stale_minutes) * 60,
+                tags_chamada,
+                geracoes
+            )
+            return result
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Criar chave única baseada na função e argumentos
-            cache_key = f"{func.__name__}:{hash(str(args) + str(sorted(kwargs.items())))}"
+            # Chave baseada na função e nos argumentos (sem hash de str, que colide)
+            cache_key = (nome, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(cache_key)
+            except TypeError:
+                # Argumentos não hasheáveis: executar sem cache
+                return func(*args, **kwargs)
             
             # Verificar se existe cache válido
-            if cache_key in _cache and cache_key in _cache_expiry:
-                if datetime.now() < _cache_expiry[cache_key]:
-                    return _cache[cache_key]
-                else:
-                    # Cache expirado, remover
-                    del _cache[cache_key]
-                    del _cache_expiry[cache_key]
+            entrada = _cache.get(cache_key, _AUSENTE)
+            expirado = True
+            if entrada is not _AUSENTE:
+                result, expira_em, duracao = entrada
+                agora = time.time()
+                if not _deve_recalcular(expira_em, duracao, agora, early_refresh_beta):
+                    _metricas.contar('hits', nome)
+                    return result
+                # Sorteado para renovação antecipada, mas o valor ainda está no prazo
+                expirado = agora >= expira_em
+            # Recálculo de um valor expirado (ou ausente) é falha; de um valor no prazo, renovação
+            evento_calculo = 'misses' if expirado else 'early_refreshes'
             
-            # Executar função e cachear resultado
-            result = func(*args, **kwargs)
-            _cache[cache_key] = result
-            _cache_expiry[cache_key] = datetime.now() + timedelta(minutes=expiry_minutes)
+            if not single_flight:
+                _metricas.contar(evento_calculo, nome)
+                return calcular(cache_key, args, kwargs)
             
-            return result
+            if entrada is not _AUSENTE:
+                # Valor antigo disponível: recalcular só se nenhuma outra thread estiver recalculando
+                with _voos.voo(cache_key, esperar=False) as adquirido:
+                    if adquirido:
+                        _metricas.contar(evento_calculo, nome)
+                        return calcular(cache_key, args, kwargs)
+                _metricas.contar('stale_hits' if expirado else 'hits', nome)
+                return result
+            
+            # Sem valor: esperar quem já está calculando e reaproveitar o resultado
+            with _voos.voo(cache_key):
+                entrada = _cache.get(cache_key, _AUSENTE)
+                if entrada is not _AUSENTE:
+                    _metricas.contar('hits', nome)
+                    return entrada[0]
+                _metricas.contar('misses', nome)
+                return calcular(cache_key, args, kwargs)
         return wrapper
     return decorator
 
+def cache_get(chave, padrao=None):
+    """Lê uma entrada do backend configurado (para valores mantidos fora do decorator)"""
+    return _cache.get(chave, padrao)
+
+def cache_set(chave, valor, ttl_segundos, tags=()):
+    """Grava uma entrada no backend configurado"""
+    _cache.set(chave, valor, ttl_segundos, tags)
+
 def clear_cache():
     """Limpa todo o cache"""
-    global _cache, _cache_expiry
     _cache.clear()
-    _cache_expiry.clear()
 
 def clear_user_cache(user_id):
-    """Limpa cache específico de um usuário"""
-    keys_to_remove = []
-    for key in _cache.keys():
-        if f"user_{user_id}" in key or str(user_id) in key:
-            keys_to_remove.append(key)
-    
-    for key in keys_to_remove:
-        if key in _cache:
-            del _cache[key]
-        if key in _cache_expiry:
-            del _cache_expiry[key]
+    """Limpa cache específico de um usuário (apenas as entradas com a tag dele)"""
+    return _cache.invalidar_tag(_tag_usuario(user_id))
 
 def get_cache_stats():
-    """Retorna estatísticas do cache"""
-    now = datetime.now()
-    valid_entries = sum(1 for expiry in _cache_expiry.values() if expiry > now)
-    expired_entries = len(_cache_expiry) - valid_entries
-    
-    return {
-        "total_entries": len(_cache),
-        "valid_entries": valid_entries,
-        "expired_entries": expired_entries,
-        "cache_size_mb": len(str(_cache)) / (1024 * 1024)
-    }
+    """Retorna estatísticas do cache e as métricas por função"""
+    return {**_cache.stats(), "functions": _metricas.resumo()}
+
+def get_cache_metrics():
+    """Métricas do cache no formato texto do Prometheus"""
+    return _metricas.prometheus()
 
 # Cache específico para consultas de humor
 class HumorCache:
     @staticmethod
-    @cache_result(expiry_minutes=10)
+    @cache_result(expiry_minutes=10, stale_minutes=5, early_refresh_beta=1)
     def get_user_stats(user_id):
         """Cache para estatísticas do usuário"""
-        from src.models.humor import RegistroHumor
+        from src.models.resumo_humor import ResumoDiarioHumor
+        from src.models.tag import Tag, RegistroHumorTag
         
-        registros = RegistroHumor.query.filter_by(usuario_id=user_id).all()
+        resumo = ResumoDiarioHumor.agregar_periodo(user_id)
         
-        if not registros:
+        if not resumo["total_registros"]:
             return {
                 "total_registros": 0,
                 "media_humor": 0,
@@ -87,45 +300,22 @@ class HumorCache:
                 "fatores_frequentes": []
             }
         
-        # Calcular estatísticas
-        humores = [r.nivel_humor for r in registros]
-        media_humor = sum(humores) / len(humores)
-        
-        # Emoções mais frequentes
-        todas_emocoes = []
-        for registro in registros:
-            if registro.emocoes:
-                try:
-                    emocoes = json.loads(registro.emocoes)
-                    todas_emocoes.extend(emocoes)
-                except:
-                    pass
+        # Calcular estatísticas (a partir dos resumos diários)
+        media_humor = resumo["media_humor"]
         
-        from collections import Counter
-        emocoes_counter = Counter(todas_emocoes)
+        # Emoções e fatores mais frequentes (agregação feita no banco)
         emocoes_frequentes = [
             {"emocao": emocao, "count": count} 
-            for emocao, count in emocoes_counter.most_common(5)
+            for emocao, count in RegistroHumorTag.frequencias(user_id, Tag.EMOCAO, limite=5)
         ]
         
-        # Fatores mais frequentes
-        todos_fatores = []
-        for registro in registros:
-            if registro.fatores_influencia:
-                try:
-                    fatores = json.loads(registro.fatores_influencia)
-                    todos_fatores.extend(fatores)
-                except:
-                    pass
-        
-        fatores_counter = Counter(todos_fatores)
         fatores_frequentes = [
             {"fator": fator, "count": count} 
-            for fator, count in fatores_counter.most_common(5)
+            for fator, count in RegistroHumorTag.frequencias(user_id, Tag.FATOR, limite=5)
         ]
         
         return {
-            "total_registros": len(registros),
+            "total_registros": resumo["total_registros"],
             "media_humor": round(media_humor, 2),
             "emocoes_frequentes": emocoes_frequentes,
             "fatores_frequentes": fatores_frequentes
@@ -148,81 +338,66 @@ class HumorCache:
         """Invalida cache específico do usuário"""
         clear_user_cache(user_id)
 
-# Cache para analytics
+# Cache para analytics: chave (usuário, janela, dia), invalidada por janela
+TAG_JANELA = "usuario:{user_id}:janela:{dias}"
+
 class AnalyticsCache:
     @staticmethod
-    @cache_result(expiry_minutes=30)
+    def _janela(funcao, user_id, days, *args):
+        """Janelas de JANELAS_CACHE passam pelo cache; as demais são calculadas na hora, com a janela exata"""
+        dias = int(days)
+        if not janela_cacheavel(dias):
+            funcao = funcao.__wrapped__
+        return funcao(str(user_id), dias, *args)
+    
+    @staticmethod
     def get_correlation_data(user_id, days=30):
         """Cache para dados de correlação"""
-        from src.models.humor import RegistroHumor
-        from datetime import datetime, timedelta
-        from collections import defaultdict
-        
-        data_limite = datetime.now().date() - timedelta(days=days)
-        registros = RegistroHumor.query.filter(
-            RegistroHumor.usuario_id == user_id,
-            RegistroHumor.data_registro >= data_limite
-        ).all()
-        
-        if not registros:
-            return {
-                "atividades": [],
-                "emocoes": [],
-                "fatores_influencia": []
-            }
-        
-        # Processar correlações (lógica similar à rota analytics)
-        atividades_humor = defaultdict(list)
-        emocoes_humor = defaultdict(list)
-        fatores_humor = defaultdict(list)
-        
-        for registro in registros:
-            nivel_humor = registro.nivel_humor
-            
-            # Atividades
-            if registro.atividades:
-                try:
-                    atividades = json.loads(registro.atividades)
-                    for atividade in atividades:
-                        atividades_humor[atividade].append(nivel_humor)
-                except:
-                    pass
-            
-            # Emoções
-            if registro.emocoes:
-                try:
-                    emocoes = json.loads(registro.emocoes)
-                    for emocao in emocoes:
-                        emocoes_humor[emocao].append(nivel_humor)
-                except:
-                    pass
-            
-            # Fatores
-            if registro.fatores_influencia:
-                try:
-                    fatores = json.loads(registro.fatores_influencia)
-                    for fator in fatores:
-                        fatores_humor[fator].append(nivel_humor)
-                except:
-                    pass
-        
-        def calcular_correlacao(dados_dict, min_ocorrencias=2):
-            correlacoes = []
-            for item, humores in dados_dict.items():
-                if len(humores) >= min_ocorrencias:
-                    media_humor = sum(humores) / len(humores)
-                    correlacoes.append({
-                        "item": item,
-                        "media_humor": round(media_humor, 2),
-                        "frequencia": len(humores),
-                        "impacto": "positivo" if media_humor >= 4 else "neutro" if media_humor >= 3 else "negativo"
-                    })
-            
-            return sorted(correlacoes, key=lambda x: x["media_humor"], reverse=True)
-        
-        return {
-            "atividades": calcular_correlacao(atividades_humor),
-            "emocoes": calcular_correlacao(emocoes_humor),
-            "fatores_influencia": calcular_correlacao(fatores_humor)
-        }
-
+        return AnalyticsCache._janela(AnalyticsCache._correlacoes, user_id, days, date.today())
+    
+    @staticmethod
+    def get_trends(user_id, days=30, granularidade="dia"):
+        """Cache para tendências do humor"""
+        return AnalyticsCache._janela(AnalyticsCache._tendencias, user_id, days, granularidade, date.today())
+    
+    @staticmethod
+    def get_full_report(user_id, days=30):
+        """Cache para o relatório completo"""
+        return AnalyticsCache._janela(AnalyticsCache._relatorio, user_id, days, date.today())
+    
+    @staticmethod
+    def get_suggestions(user_id, days=7):
+        """Cache para as sugestões de lembretes"""
+        return AnalyticsCache._janela(AnalyticsCache._sugestoes, user_id, days, date.today())
+    
+    @staticmethod
+    @cache_result(expiry_minutes=30, tags=(TAG_JANELA,), stale_minutes=10, early_refresh_beta=1)
+    def _correlacoes(user_id, dias, hoje):
+        from src.utils.analises import analisar_correlacoes
+        return analisar_correlacoes(user_id, dias, hoje)
+    
+    @staticmethod
+    @cache_result(expiry_minutes=30, tags=(TAG_JANELA,), stale_minutes=10, early_refresh_beta=1)
+    def _tendencias(user_id, dias, granularidade, hoje):
+        from src.utils.analises import analisar_tendencias
+        return analisar_tendencias(user_id, dias, granularidade, hoje)
+    
+    @staticmethod
+    @cache_result(expiry_minutes=30, tags=(TAG_JANELA,), stale_minutes=10, early_refresh_beta=1)
+    def _relatorio(user_id, dias, hoje):
+        from src.utils.analises import gerar_relatorio
+        return gerar_relatorio(user_id, dias, hoje)
+    
+    @staticmethod
+    @cache_result(expiry_minutes=30, tags=(TAG_JANELA,), stale_minutes=10, early_refresh_beta=1)
+    def _sugestoes(user_id, dias, hoje):
+        from src.utils.analises import gerar_sugestoes
+        return gerar_sugestoes(user_id, dias, hoje)
+    
+    @staticmethod
+    def invalidate_windows(user_id, data_registro):
+        """Invalida apenas as janelas do usuário que contêm a data do registro"""
+        if isinstance(data_registro, datetime):
+            data_registro = data_registro.date()
+        for dias in janelas_afetadas(data_registro, date.today()):
+            _cache.invalidar_tag(TAG_JANELA.format(user_id=str(user_id), dias=dias))
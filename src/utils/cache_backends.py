@@ -0,0 +1,487 @@
+"""
+Backends de armazenamento do cache de resultados (src/utils/cache.py).
+
+Todos implementam a mesma interface (BackendCache):
+- CacheLRU: memória do processo, limitado por entradas e bytes (padrão);
+- CacheSQLite: arquivo SQLite local compartilhado pelos workers do mesmo host.
+"""
+from collections import OrderedDict
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+
+# Limites padrão do cache
+CACHE_MAX_ENTRADAS = 4096
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_SHARDS = 16
+# Tags com a geração guardada no CacheLRU (as invalidadas há mais tempo são descartadas)
+CACHE_MAX_GERACOES = 4096
+
+# Segundos entre atualizações do último acesso de uma entrada no CacheSQLite
+INTERVALO_ACESSO = 60
+
+
+def estimar_tamanho(valor, _vistos=None):
+    """Estimativa aproximada, em bytes, da memória ocupada por um valor cacheado"""
+    if _vistos is None:
+        _vistos = set()
+    if id(valor) in _vistos:
+        return 0
+    _vistos.add(id(valor))
+
+    tamanho = sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            tamanho += estimar_tamanho(chave, _vistos) + estimar_tamanho(item, _vistos)
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        for item in valor:
+            tamanho += estimar_tamanho(item, _vistos)
+    return tamanho
+
+
+def grupo_da_chave(chave):
+    """Função dona da chave (primeiro item das chaves do decorator), usada nas métricas"""
+    if isinstance(chave, tuple) and chave:
+        return str(chave[0])
+    return ''
+
+
+class BackendCache:
+    """Interface comum dos backends de cache"""
+
+    # Callable(evento, grupo, quantidade) avisado das remoções ('evictions' e 'invalidations')
+    observador = None
+
+    def _notificar(self, evento, chaves):
+        contagem = {}
+        for chave in chaves:
+            grupo = grupo_da_chave(chave)
+            contagem[grupo] = contagem.get(grupo, 0) + 1
+        self._notificar_grupos(evento, contagem)
+
+    def _notificar_grupos(self, evento, grupos):
+        if self.observador is not None:
+            for grupo, quantidade in grupos.items():
+                self.observador(evento, grupo, quantidade)
+
+    def get(self, chave, padrao=None):
+        raise NotImplementedError
+
+    def set(self, chave, valor, ttl_segundos, tags=(), geracoes=None):
+        """
+        Armazena o valor. Com geracoes (o retorno de self.geracoes(tags) lido
+        antes de calcular o valor), não grava se alguma tag foi invalidada nesse
+        meio tempo: o valor calculado já estaria desatualizado.
+        """
+        raise NotImplementedError
+
+    def geracoes(self, tags):
+        """Contadores de invalidação das tags, na ordem recebida"""
+        raise NotImplementedError
+
+    def delete(self, chave):
+        raise NotImplementedError
+
+    def invalidar_tag(self, tag):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        raise NotImplementedError
+
+
+class _Shard:
+    """Partição do cache com seu próprio lock, ordem LRU, contagem de bytes e índice de tags"""
+
+    def __init__(self, max_entradas, max_bytes):
+        self.lock = threading.Lock()
+        self.entradas = OrderedDict()  # chave -> (valor, expira_em, tamanho, tags)
+        self.indice = {}  # tag -> conjunto de chaves
+        self.bytes = 0
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+
+    def _desindexar(self, chave, tags):
+        for tag in tags:
+            chaves = self.indice.get(tag)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self.indice[tag]
+
+    def inserir(self, chave, valor, expira_em, tamanho, tags):
+        if chave in self.entradas:
+            self.remover(chave)
+        self.entradas[chave] = (valor, expira_em, tamanho, tags)
+        self.bytes += tamanho
+        for tag in tags:
+            self.indice.setdefault(tag, set()).add(chave)
+
+    def remover(self, chave):
+        _, _, tamanho, tags = self.entradas.pop(chave)
+        self.bytes -= tamanho
+        self._desindexar(chave, tags)
+
+    def liberar_espaco(self):
+        """Remove as entradas menos usadas até respeitar os limites do shard e retorna suas chaves"""
+        removidas = []
+        while self.entradas and (len(self.entradas) > self.max_entradas or self.bytes > self.max_bytes):
+            chave, (_, _, tamanho, tags) = self.entradas.popitem(last=False)
+            self.bytes -= tamanho
+            self._desindexar(chave, tags)
+            removidas.append(chave)
+        return removidas
+
+
+class CacheLRU(BackendCache):
+    """
+    Cache em memória limitado por quantidade de entradas e por bytes, com
+    remoção LRU, expiração pelo relógio monotônico e um lock por shard.
+    """
+
+    def __init__(self, max_entradas=CACHE_MAX_ENTRADAS, max_bytes=CACHE_MAX_BYTES, shards=CACHE_SHARDS,
+                 max_geracoes=CACHE_MAX_GERACOES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._shards = [
+            _Shard(max(1, max_entradas // shards), max(1, max_bytes // shards))
+            for _ in range(shards)
+        ]
+        # Geração de uma tag = número sequencial da sua última invalidação. Só as
+        # max_geracoes invalidadas mais recentemente ficam guardadas; as demais
+        # valem _geracao_piso (a maior geração já descartada), que só cresce: um
+        # set iniciado antes de uma invalidação nunca volta a ver a geração que leu
+        self._geracoes = OrderedDict()  # tag -> geração, da invalidação mais antiga à mais recente
+        self._max_geracoes = max_geracoes
+        self._sequencia = 0
+        self._geracao_piso = 0
+        self._lock_geracoes = threading.Lock()
+
+    def _shard(self, chave):
+        return self._shards[hash(chave) % len(self._shards)]
+
+    def get(self, chave, padrao=None):
+        shard = self._shard(chave)
+        with shard.lock:
+            entrada = shard.entradas.get(chave)
+            if entrada is None:
+                return padrao
+            valor, expira_em, _, _ = entrada
+            if time.monotonic() >= expira_em:
+                shard.remover(chave)
+                return padrao
+            shard.entradas.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor, ttl_segundos, tags=(), geracoes=None):
+        """Armazena um valor; as tags permitem invalidá-lo depois com invalidar_tag"""
+        tamanho = estimar_tamanho(chave) + estimar_tamanho(valor)
+        shard = self._shard(chave)
+        if tamanho > shard.max_bytes:
+            # Valor maior que o shard inteiro: não vale a pena cachear
+            return
+        with shard.lock:
+            # Conferido com o lock do shard: invalidar_tag incrementa a geração
+            # antes de percorrer os shards, então ou o valor é recusado aqui ou
+            # é removido logo depois pela invalidação
+            if geracoes is not None and self.geracoes(tags) != tuple(geracoes):
+                return
+            shard.inserir(chave, valor, time.monotonic() + ttl_segundos, tamanho, frozenset(tags))
+            removidas = shard.liberar_espaco()
+        self._notificar('evictions', removidas)
+
+    def geracoes(self, tags):
+        with self._lock_geracoes:
+            return tuple(self._geracoes.get(tag, self._geracao_piso) for tag in tags)
+
+    def delete(self, chave):
+        shard = self._shard(chave)
+        with shard.lock:
+            if chave in shard.entradas:
+                shard.remover(chave)
+
+    def invalidar_tag(self, tag):
+        """
+        Remove as entradas marcadas com a tag, consultando o índice de cada shard
+        (custo proporcional às entradas da tag, não ao tamanho do cache).
+        Retorna a quantidade de entradas removidas.
+        """
+        with self._lock_geracoes:
+            self._sequencia += 1
+            self._geracoes[tag] = self._sequencia
+            self._geracoes.move_to_end(tag)
+            while len(self._geracoes) > self._max_geracoes:
+                _, self._geracao_piso = self._geracoes.popitem(last=False)
+        removidas = []
+        for shard in self._shards:
+            with shard.lock:
+                for chave in list(shard.indice.get(tag, ())):
+                    shard.remover(chave)
+                    removidas.append(chave)
+        self._notificar('invalidations', removidas)
+        return len(removidas)
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.entradas.clear()
+                shard.indice.clear()
+                shard.bytes = 0
+
+    def stats(self):
+        agora = time.monotonic()
+        total = validas = total_bytes = 0
+        for shard in self._shards:
+            with shard.lock:
+                total += len(shard.entradas)
+                validas += sum(1 for _, expira_em, _, _ in shard.entradas.values() if expira_em > agora)
+                total_bytes += shard.bytes
+        return {
+            "total_entries": total,
+            "valid_entries": validas,
+            "expired_entries": total - validas,
+            "cache_size_mb": total_bytes / (1024 * 1024),
+            "max_entries": self.max_entradas,
+            "max_size_mb": self.max_bytes / (1024 * 1024)
+        }
+
+
+class CacheSQLite(BackendCache):
+    """
+    Cache compartilhado entre processos em um arquivo SQLite (modo WAL).
+
+    Todos os workers do host que apontam para o mesmo arquivo enxergam as
+    mesmas entradas, e uma invalidação feita por um deles vale para todos.
+    A expiração usa o relógio de parede (comum aos processos) e a remoção
+    por limite segue a ordem do último acesso (LRU aproximado).
+
+    Leituras não abrem transação de escrita: o último acesso só é regravado
+    quando tem mais de INTERVALO_ACESSO segundos. A quantidade de entradas e
+    de bytes fica em cache_totais, mantida por triggers, para que cada escrita
+    confira os limites sem percorrer a tabela.
+    """
+
+    def __init__(self, caminho, max_entradas=CACHE_MAX_ENTRADAS, max_bytes=CACHE_MAX_BYTES):
+        self.caminho = caminho
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._conexao().executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entradas (
+                chave TEXT PRIMARY KEY,
+                grupo TEXT NOT NULL,
+                valor BLOB NOT NULL,
+                expira_em REAL NOT NULL,
+                ultimo_acesso REAL NOT NULL,
+                tamanho INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_entradas_expira_em ON cache_entradas (expira_em);
+            CREATE INDEX IF NOT EXISTS ix_cache_entradas_ultimo_acesso ON cache_entradas (ultimo_acesso);
+            CREATE TABLE IF NOT EXISTS cache_tags (
+                tag TEXT NOT NULL,
+                chave TEXT NOT NULL REFERENCES cache_entradas (chave) ON DELETE CASCADE,
+                PRIMARY KEY (tag, chave)
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_tags_chave ON cache_tags (chave);
+            CREATE TABLE IF NOT EXISTS cache_geracoes (
+                tag TEXT PRIMARY KEY,
+                geracao INTEGER NOT NULL
+            );
+
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS cache_totais (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                entradas INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO cache_totais (id, entradas, bytes)
+                SELECT 1, COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache_entradas;
+            CREATE TRIGGER IF NOT EXISTS tr_cache_entradas_insert AFTER INSERT ON cache_entradas BEGIN
+                UPDATE cache_totais SET entradas = entradas + 1, bytes = bytes + NEW.tamanho;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tr_cache_entradas_delete AFTER DELETE ON cache_entradas BEGIN
+                UPDATE cache_totais SET entradas = entradas - 1, bytes = bytes - OLD.tamanho;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tr_cache_entradas_update AFTER UPDATE OF tamanho ON cache_entradas BEGIN
+                UPDATE cache_totais SET bytes = bytes - OLD.tamanho + NEW.tamanho;
+            END;
+            COMMIT;
+        """)
+
+    def _conexao(self):
+        """Uma conexão por thread e por processo (conexões não sobrevivem ao fork)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            diretorio = os.path.dirname(self.caminho)
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+            conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute('PRAGMA foreign_keys=ON')
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def _transacao(self):
+        return _Transacao(self._conexao())
+
+    @staticmethod
+    def _serializar_chave(chave):
+        # As chaves do decorator são tuplas de valores simples; repr é estável entre processos
+        return repr(chave)
+
+    def get(self, chave, padrao=None):
+        chave = self._serializar_chave(chave)
+        agora = time.time()
+        conexao = self._conexao()
+        # Leitura em autocommit: em WAL não espera nem bloqueia as escritas
+        linha = conexao.execute(
+            'SELECT valor, expira_em, ultimo_acesso FROM cache_entradas WHERE chave = ?', (chave,)
+        ).fetchone()
+        if linha is None or linha[1] <= agora:
+            # Entradas expiradas são removidas pela próxima escrita
+            return padrao
+        if agora - linha[2] >= INTERVALO_ACESSO:
+            conexao.execute('UPDATE cache_entradas SET ultimo_acesso = ? WHERE chave = ?', (agora, chave))
+        return pickle.loads(linha[0])
+
+    def set(self, chave, valor, ttl_segundos, tags=(), geracoes=None):
+        grupo = grupo_da_chave(chave)
+        chave = self._serializar_chave(chave)
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dados) > self.max_bytes:
+            return
+        agora = time.time()
+        with self._transacao() as conexao:
+            # Na mesma transação do INSERT: nenhuma invalidação entra entre a conferência e a gravação
+            if geracoes is not None and self._geracoes(conexao, tags) != tuple(geracoes):
+                return
+            # Upsert em vez de INSERT OR REPLACE: o REPLACE não dispara o trigger de DELETE
+            conexao.execute(
+                'INSERT INTO cache_entradas (chave, grupo, valor, expira_em, ultimo_acesso, tamanho) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (chave) DO UPDATE SET grupo = excluded.grupo, valor = excluded.valor, '
+                'expira_em = excluded.expira_em, ultimo_acesso = excluded.ultimo_acesso, tamanho = excluded.tamanho',
+                (chave, grupo, dados, agora + ttl_segundos, agora, len(dados))
+            )
+            conexao.execute('DELETE FROM cache_tags WHERE chave = ?', (chave,))
+            conexao.executemany(
+                'INSERT OR IGNORE INTO cache_tags (tag, chave) VALUES (?, ?)',
+                [(tag, chave) for tag in set(tags)]
+            )
+            removidas = self._liberar_espaco(conexao, agora)
+        self._notificar_grupos('evictions', removidas)
+
+    def geracoes(self, tags):
+        return self._geracoes(self._conexao(), tags)
+
+    @staticmethod
+    def _geracoes(conexao, tags):
+        if not tags:
+            return ()
+        marcadores = ', '.join('?' * len(tags))
+        encontradas = dict(conexao.execute(
+            f'SELECT tag, geracao FROM cache_geracoes WHERE tag IN ({marcadores})', tuple(tags)
+        ).fetchall())
+        return tuple(encontradas.get(tag, 0) for tag in tags)
+
+    def _liberar_espaco(self, conexao, agora):
+        """Remove entradas expiradas e, se ainda preciso, as menos acessadas"""
+        conexao.execute('DELETE FROM cache_entradas WHERE expira_em <= ?', (agora,))
+        total, total_bytes = conexao.execute('SELECT entradas, bytes FROM cache_totais').fetchone()
+        if total <= self.max_entradas and total_bytes <= self.max_bytes:
+            return {}
+        excedente = max(total - self.max_entradas, 0)
+        bytes_excedentes = total_bytes - self.max_bytes
+        removidas = []
+        grupos = {}
+        for chave, grupo, tamanho in conexao.execute(
+            'SELECT chave, grupo, tamanho FROM cache_entradas ORDER BY ultimo_acesso'
+        ):
+            if excedente <= 0 and bytes_excedentes <= 0:
+                break
+            removidas.append((chave,))
+            grupos[grupo] = grupos.get(grupo, 0) + 1
+            excedente -= 1
+            bytes_excedentes -= tamanho
+        conexao.executemany('DELETE FROM cache_entradas WHERE chave = ?', removidas)
+        return grupos
+
+    def delete(self, chave):
+        with self._transacao() as conexao:
+            conexao.execute('DELETE FROM cache_entradas WHERE chave = ?', (self._serializar_chave(chave),))
+
+    def invalidar_tag(self, tag):
+        with self._transacao() as conexao:
+            conexao.execute(
+                'INSERT INTO cache_geracoes (tag, geracao) VALUES (?, 1) '
+                'ON CONFLICT (tag) DO UPDATE SET geracao = geracao + 1', (tag,)
+            )
+            grupos = dict(conexao.execute(
+                'SELECT e.grupo, COUNT(*) FROM cache_tags t JOIN cache_entradas e ON e.chave = t.chave '
+                'WHERE t.tag = ? GROUP BY e.grupo', (tag,)
+            ).fetchall())
+            conexao.execute(
+                'DELETE FROM cache_entradas WHERE chave IN (SELECT chave FROM cache_tags WHERE tag = ?)', (tag,)
+            )
+        self._notificar_grupos('invalidations', grupos)
+        return sum(grupos.values())
+
+    def clear(self):
+        with self._transacao() as conexao:
+            conexao.execute('DELETE FROM cache_entradas')
+
+    def stats(self):
+        # Totais mantidos pelos triggers; as expiradas são contadas pelo índice de expira_em.
+        # BEGIN simples (não IMMEDIATE): um snapshot de leitura, sem o lock de escrita
+        conexao = self._conexao()
+        conexao.execute('BEGIN')
+        try:
+            total, total_bytes = conexao.execute('SELECT entradas, bytes FROM cache_totais').fetchone()
+            expiradas = conexao.execute(
+                'SELECT COUNT(*) FROM cache_entradas WHERE expira_em <= ?', (time.time(),)
+            ).fetchone()[0]
+        finally:
+            conexao.execute('COMMIT')
+        validas = total - expiradas
+        return {
+            "total_entries": total,
+            "valid_entries": validas,
+            "expired_entries": total - validas,
+            "cache_size_mb": total_bytes / (1024 * 1024),
+            "max_entries": self.max_entradas,
+            "max_size_mb": self.max_bytes / (1024 * 1024)
+        }
+
+
+class _Transacao:
+    """Executa o bloco em uma transação BEGIN IMMEDIATE (escritas serializadas entre processos)"""
+
+    def __init__(self, conexao):
+        self.conexao = conexao
+
+    def __enter__(self):
+        self.conexao.execute('BEGIN IMMEDIATE')
+        return self.conexao
+
+    def __exit__(self, tipo, *_):
+        self.conexao.execute('ROLLBACK' if tipo else 'COMMIT')
+        return False
+
+
+BACKENDS = ('memoria', 'sqlite')
+
+
+def criar_backend(nome, **opcoes):
+    """Cria o backend configurado ('memoria' ou 'sqlite')"""
+    if nome == 'memoria':
+        return CacheLRU(**opcoes)
+    if nome == 'sqlite':
+        return CacheSQLite(**opcoes)
+    raise ValueError(f"Backend de cache desconhecido: {nome}. Use: {', '.join(BACKENDS)}")
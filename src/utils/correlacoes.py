@@ -0,0 +1,94 @@
+from math import sqrt
+
+# Valor crítico da normal para o intervalo de confiança de 95%
+Z_95 = 1.96
+
+
+def calcular_efeito(n_tag, soma_tag, soma_quadrados_tag, n_total, soma_total, soma_quadrados_total):
+    """
+    Calcula o efeito de uma tag sobre o humor a partir das estatísticas suficientes
+    (n, Σx, Σx²) dos registros com a tag e de todos os registros do período.
+
+    Retorna a média com a tag, a diferença em relação aos registros sem a tag,
+    a correlação ponto-bisserial e o intervalo de confiança de 95% da diferença.
+    """
+    media_tag = soma_tag / n_tag
+    efeito = {
+        "media_humor": media_tag,
+        "diferenca_media": None,
+        "correlacao": None,
+        "intervalo_confianca": None
+    }
+
+    # Registros do período sem a tag (linha de base)
+    n_resto = n_total - n_tag
+    if n_resto <= 0:
+        return efeito
+    soma_resto = soma_total - soma_tag
+    soma_quadrados_resto = soma_quadrados_total - soma_quadrados_tag
+    media_resto = soma_resto / n_resto
+    diferenca = media_tag - media_resto
+    efeito["diferenca_media"] = diferenca
+
+    # Correlação ponto-bisserial: diferença das médias sobre o desvio padrão populacional
+    variancia_total = soma_quadrados_total / n_total - (soma_total / n_total) ** 2
+    if variancia_total > 0:
+        proporcao = n_tag / n_total
+        efeito["correlacao"] = diferenca / sqrt(variancia_total) * sqrt(proporcao * (1 - proporcao))
+
+    # Intervalo de confiança da diferença das médias (variâncias amostrais separadas)
+    if n_tag > 1 and n_resto > 1:
+        variancia_tag = max((soma_quadrados_tag - soma_tag ** 2 / n_tag) / (n_tag - 1), 0)
+        variancia_resto = max((soma_quadrados_resto - soma_resto ** 2 / n_resto) / (n_resto - 1), 0)
+        erro_padrao = sqrt(variancia_tag / n_tag + variancia_resto / n_resto)
+        efeito["intervalo_confianca"] = [diferenca - Z_95 * erro_padrao, diferenca + Z_95 * erro_padrao]
+
+    return efeito
+
+
+def calcular_correlacoes(usuario_id, data_inicio=None, min_ocorrencias=2):
+    """
+    Correlações humor ↔ atividades, emoções e fatores de um usuário, lidas das
+    estatísticas suficientes (O(número de tags), sem percorrer o histórico).
+    """
+    from src.models.estatistica_tag import EstatisticaTag
+    from src.models.resumo_humor import ResumoDiarioHumor
+    from src.models.tag import Tag
+
+    resumo = ResumoDiarioHumor.agregar_periodo(usuario_id, data_inicio)
+    n_total = resumo["total_registros"]
+
+    def arredondar(valor):
+        return round(valor, 2) if valor is not None else None
+
+    def correlacoes_do_tipo(tipo):
+        correlacoes = []
+        if not n_total:
+            return correlacoes
+        for item, n, soma, soma_quadrados in EstatisticaTag.por_tipo(usuario_id, tipo, data_inicio):
+            if n < min_ocorrencias:
+                continue
+            efeito = calcular_efeito(
+                n, soma, soma_quadrados,
+                n_total, resumo["soma_humor"], resumo["soma_quadrados_humor"]
+            )
+            media_humor = efeito["media_humor"]
+            intervalo = efeito["intervalo_confianca"]
+            correlacoes.append({
+                "item": item,
+                "media_humor": round(media_humor, 2),
+                "frequencia": n,
+                "impacto": "positivo" if media_humor >= 4 else "neutro" if media_humor >= 3 else "negativo",
+                "diferenca_media": arredondar(efeito["diferenca_media"]),
+                "correlacao": arredondar(efeito["correlacao"]),
+                "intervalo_confianca": [round(limite, 2) for limite in intervalo] if intervalo else None
+            })
+
+        # Ordenar por média de humor (decrescente)
+        return sorted(correlacoes, key=lambda x: x["media_humor"], reverse=True)
+
+    return {
+        "atividades": correlacoes_do_tipo(Tag.ATIVIDADE),
+        "emocoes": correlacoes_do_tipo(Tag.EMOCAO),
+        "fatores_influencia": correlacoes_do_tipo(Tag.FATOR)
+    }
@@ -0,0 +1,90 @@
+"""
+Motor de disponibilidade dos psicólogos em lote.
+
+Busca os horários ocupados de todos os psicólogos em uma única consulta,
+expande as datas de cada dia da semana uma vez por requisição e subtrai os
+horários ocupados por data com conjuntos.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from src.extensions import db
+from src.models.agendamento import Agendamento, STATUS_ATIVOS
+
+# Quantos dias à frente a disponibilidade é oferecida
+JANELA_DIAS = 30
+
+# Dia da semana (chave da disponibilidade) -> weekday() (0=Segunda, 6=Domingo)
+DIAS_SEMANA = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+
+def datas_por_dia_semana(hoje):
+    """Datas (e seu formato ISO) da janela agrupadas por weekday()"""
+    datas = defaultdict(list)
+    for i in range(JANELA_DIAS):
+        data = hoje + timedelta(days=i)
+        datas[data.weekday()].append((data, data.isoformat()))
+    return datas
+
+
+def horarios_ocupados(psicologo_ids, hoje):
+    """
+    Horários ocupados da janela em uma única consulta:
+    {psicologo_id: {data: {"HH:MM", ...}}}
+    """
+    ocupados = defaultdict(lambda: defaultdict(set))
+    if not psicologo_ids:
+        return ocupados
+    consulta = db.select(
+        Agendamento.psicologo_id,
+        Agendamento.data_agendamento,
+        Agendamento.hora_agendamento
+    ).where(
+        Agendamento.psicologo_id.in_(psicologo_ids),
+        Agendamento.status.in_(STATUS_ATIVOS),
+        Agendamento.data_agendamento >= hoje,
+        Agendamento.data_agendamento < hoje + timedelta(days=JANELA_DIAS)
+    )
+    for psicologo_id, data, hora in db.session.execute(consulta):
+        ocupados[psicologo_id][data].add(hora.strftime("%H:%M"))
+    return ocupados
+
+
+def filtrar_disponibilidade(disponibilidade, ocupados, datas_semana):
+    """
+    Expande a disponibilidade semanal ({"monday": ["09:00", ...]}) nas datas da
+    janela, sem os horários ocupados: {"monday": {"2024-06-03": ["09:00", ...]}}
+    """
+    disponibilidade_filtrada = {}
+    for dia_semana, horarios_do_dia in disponibilidade.items():
+        weekday = DIAS_SEMANA.get(dia_semana)
+        if weekday is None:
+            continue
+
+        horarios_disponiveis_por_data = {}
+        for data, data_iso in datas_semana[weekday]:
+            ocupados_na_data = ocupados.get(data)
+            horarios = (
+                [hora for hora in horarios_do_dia if hora not in ocupados_na_data]
+                if ocupados_na_data else list(horarios_do_dia)
+            )
+            if horarios:
+                horarios_disponiveis_por_data[data_iso] = horarios
+
+        if horarios_disponiveis_por_data:
+            disponibilidade_filtrada[dia_semana] = horarios_disponiveis_por_data
+    return disponibilidade_filtrada
+
+
+def calcular_disponibilidades(psicologos, hoje=None):
+    """Disponibilidade filtrada de vários psicólogos: {psicologo_id: disponibilidade}"""
+    hoje = hoje or date.today()
+    datas_semana = datas_por_dia_semana(hoje)
+    ocupados = horarios_ocupados([p.id for p in psicologos], hoje)
+    return {
+        p.id: filtrar_disponibilidade(p.disponibilidade or {}, ocupados.get(p.id, {}), datas_semana)
+        for p in psicologos
+    }
@@ -0,0 +1,188 @@
+"""
+Camada de arquivos estáticos do frontend (SPA em src/static).
+
+A pasta é lida uma vez na inicialização para um manifesto em memória (tipo,
+ETag e variantes pré-comprimidas de cada arquivo); o index.html fica em memória.
+Arquivos com hash no nome recebem cache de longa duração (immutable); os demais
+são revalidados pelo ETag. Os arquivos com hash vêm do manifesto do build do
+Vite quando ele existe; sem manifesto, o nome precisa terminar em um hash
+reconhecível (ver tem_hash_no_nome).
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+
+from flask import Response, current_app, request, send_file
+
+# Manifestos do build do Vite (build.manifest), relativos à pasta: Vite 5+ e versões anteriores
+MANIFESTOS_BUILD = (".vite/manifest.json", "manifest.json")
+
+# Último segmento do nome antes da extensão (ex: "4f9a2c1b" em index-4f9a2c1b.js)
+PADRAO_SEGMENTO_FINAL = re.compile(r"^.+[.-]([A-Za-z0-9_]+)\.[A-Za-z0-9]+$")
+# Hash hexadecimal (webpack, rollup antigo) ou base64url de 8 caracteres (rollup/Vite),
+# sempre com letras e dígitos; o base64 também exige maiúsculas e minúsculas para
+# não confundir palavras como "version2"
+PADRAO_HASH_HEX = re.compile(r"^(?=.*\d)(?=.*[a-f])[0-9a-f]{8,64}$")
+PADRAO_HASH_BASE64 = re.compile(r"^(?=.*\d)(?=.*[a-z])(?=.*[A-Z])[A-Za-z0-9_]{8}$")
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "public, no-cache"
+
+# Extensões das variantes pré-comprimidas, na ordem de preferência
+VARIANTES = (("br", ".br"), ("gzip", ".gz"))
+
+# Intervalo mínimo entre verificações de mtime no modo de desenvolvimento
+INTERVALO_RECARGA = 1.0
+
+
+def tem_hash_no_nome(nome):
+    """Se o último segmento do nome do arquivo é um hash de conteúdo"""
+    encontrado = PADRAO_SEGMENTO_FINAL.match(nome)
+    if encontrado is None:
+        return False
+    segmento = encontrado.group(1)
+    return bool(PADRAO_HASH_HEX.match(segmento) or PADRAO_HASH_BASE64.match(segmento))
+
+
+def ler_manifesto_build(pasta):
+    """Arquivos gerados com hash segundo o manifesto do Vite, ou None se não houver manifesto"""
+    for relativo in MANIFESTOS_BUILD:
+        try:
+            with open(os.path.join(pasta, relativo), encoding="utf-8") as arquivo:
+                dados = json.load(arquivo)
+        except (OSError, ValueError):
+            continue
+        # Um manifest.json de PWA também é um objeto, mas sem entradas com "file"
+        entradas = [entrada for entrada in dados.values() if isinstance(entrada, dict) and "file" in entrada] \
+            if isinstance(dados, dict) else []
+        if not entradas:
+            continue
+        arquivos = set()
+        for entrada in entradas:
+            arquivos.add(entrada["file"])
+            arquivos.update(entrada.get("css", ()))
+            arquivos.update(entrada.get("assets", ()))
+        return arquivos
+    return None
+
+
+def _hash_arquivo(caminho):
+    sha1 = hashlib.sha1()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(65536), b""):
+            sha1.update(bloco)
+    return sha1.hexdigest()
+
+
+class ManifestoEstatico:
+    """
+    Manifesto em memória dos arquivos estáticos.
+
+    Args:
+        pasta (str): Pasta dos arquivos (src/static)
+        recarregar (bool): Reler a pasta quando algum mtime mudar. None segue
+            o modo debug da aplicação.
+    """
+
+    def __init__(self, pasta, recarregar=None):
+        self.pasta = pasta
+        self.recarregar = recarregar
+        self._lock = threading.Lock()
+        self._ultima_verificacao = 0.0
+        self.escanear()
+
+    def _arquivos(self):
+        """Caminhos relativos (com /) de todos os arquivos da pasta"""
+        if not os.path.isdir(self.pasta):
+            return
+        for raiz, _, nomes in os.walk(self.pasta):
+            for nome in nomes:
+                caminho = os.path.join(raiz, nome)
+                yield os.path.relpath(caminho, self.pasta).replace(os.sep, "/"), caminho
+
+    def _assinatura(self):
+        """Maior mtime e quantidade de arquivos, para detectar mudanças no modo de desenvolvimento"""
+        mtimes = [os.path.getmtime(caminho) for _, caminho in self._arquivos()]
+        return (max(mtimes, default=0), len(mtimes))
+
+    def escanear(self):
+        """Monta o manifesto: tipo, ETag, política de cache e variantes comprimidas de cada arquivo"""
+        arquivos = dict(self._arquivos())
+        com_hash = ler_manifesto_build(self.pasta)
+        manifesto = {}
+        for relativo, caminho in arquivos.items():
+            if any(relativo.endswith(extensao) for _, extensao in VARIANTES):
+                continue
+            imutavel = relativo in com_hash if com_hash is not None else tem_hash_no_nome(os.path.basename(relativo))
+            manifesto[relativo] = {
+                "caminho": caminho,
+                "mimetype": mimetypes.guess_type(relativo)[0] or "application/octet-stream",
+                "etag": _hash_arquivo(caminho),
+                "cache_control": CACHE_IMUTAVEL if imutavel else CACHE_REVALIDAR,
+                "variantes": {
+                    codificacao: arquivos[relativo + extensao]
+                    for codificacao, extensao in VARIANTES
+                    if relativo + extensao in arquivos
+                }
+            }
+
+        index = None
+        if "index.html" in manifesto:
+            with open(manifesto["index.html"]["caminho"], "rb") as arquivo:
+                conteudo = arquivo.read()
+            index = {"conteudo": conteudo, "etag": hashlib.sha1(conteudo).hexdigest()}
+
+        self._manifesto = manifesto
+        self._index = index
+        self._assinatura_atual = self._assinatura()
+
+    def _verificar_recarga(self):
+        recarregar = self.recarregar if self.recarregar is not None else current_app.debug
+        if not recarregar:
+            return
+        agora = time.monotonic()
+        if agora - self._ultima_verificacao < INTERVALO_RECARGA:
+            return
+        with self._lock:
+            self._ultima_verificacao = agora
+            if self._assinatura() != self._assinatura_atual:
+                self.escanear()
+
+    def index(self):
+        """Resposta com o index.html em memória (ou None se não existir)"""
+        self._verificar_recarga()
+        index = self._index
+        if index is None:
+            return None
+        resposta = Response(index["conteudo"], mimetype="text/html")
+        resposta.set_etag(index["etag"])
+        resposta.headers["Cache-Control"] = "no-cache"
+        return resposta.make_conditional(request)
+
+    def servir(self, caminho):
+        """Resposta para um arquivo do manifesto (ou None se não existir)"""
+        self._verificar_recarga()
+        entrada = self._manifesto.get(caminho)
+        if entrada is None:
+            return None
+        if caminho == "index.html":
+            return self.index()
+
+        # Variante pré-comprimida aceita pelo cliente (br antes de gzip)
+        arquivo, etag, codificacao = entrada["caminho"], entrada["etag"], None
+        for nome, variante in entrada["variantes"].items():
+            if request.accept_encodings[nome]:
+                arquivo, etag, codificacao = variante, f"{entrada['etag']}-{nome}", nome
+                break
+
+        resposta = send_file(arquivo, mimetype=entrada["mimetype"], etag=etag, conditional=True)
+        if codificacao:
+            resposta.headers["Content-Encoding"] = codificacao
+        if entrada["variantes"]:
+            resposta.vary.add("Accept-Encoding")
+        resposta.headers["Cache-Control"] = entrada["cache_control"]
+        return resposta
@@ -0,0 +1,70 @@
+"""
+GET condicional (ETag / If-None-Match) para rotas de leitura.
+
+A versão de cada recurso vem de consultas baratas de agregação (contagem,
+maior id e maior data de criação/atualização); quando o cliente envia o
+ETag da versão atual, a rota responde 304 sem executar a consulta cara.
+"""
+from functools import wraps
+import hashlib
+
+from flask import Response, make_response, request
+
+from src.extensions import db
+
+CACHE_CONTROL_PRIVADO = "private, no-cache"
+CACHE_CONTROL_PUBLICO = "public, no-cache"
+
+
+def versao_colecao(modelo, *filtros, coluna_tempo=None):
+    """
+    Versão de um conjunto de linhas: (quantidade, maior id, maior data).
+    Muda a cada inserção, exclusão ou atualização que altere a coluna de tempo.
+    """
+    coluna_tempo = coluna_tempo if coluna_tempo is not None else modelo.data_criacao
+    consulta = db.select(
+        db.func.count(modelo.id),
+        db.func.max(modelo.id),
+        db.func.max(coluna_tempo)
+    ).where(*filtros)
+    quantidade, maior_id, maior_data = db.session.execute(consulta).one()
+    return (quantidade, maior_id, str(maior_data))
+
+
+def gerar_etag(*versoes):
+    """ETag forte a partir da rota, dos parâmetros da URL e das versões do recurso"""
+    conteudo = repr((request.path, sorted(request.args.items(multi=True)), versoes))
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+
+def etag_condicional(versao, privado=True):
+    """
+    Decorator para GETs: calcula a versão do recurso com versao() e responde
+    304 se o If-None-Match do cliente corresponder ao ETag; senão executa a rota
+    e anexa o ETag à resposta 200.
+
+    Args:
+        versao (callable): Função sem argumentos (chamada no contexto da
+            requisição, após a autenticação) que retorna a versão do recurso
+        privado (bool): Respostas autenticadas usam "private, no-cache"
+    """
+    cache_control = CACHE_CONTROL_PRIVADO if privado else CACHE_CONTROL_PUBLICO
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            etag = gerar_etag(versao())
+
+            if request.if_none_match.contains_weak(etag):
+                resposta = Response(status=304)
+                resposta.set_etag(etag)
+                resposta.headers["Cache-Control"] = cache_control
+                return resposta
+
+            resposta = make_response(func(*args, **kwargs))
+            if resposta.status_code == 200:
+                resposta.set_etag(etag)
+                resposta.headers["Cache-Control"] = cache_control
+            return resposta
+        return wrapper
+    return decorator
@@ -0,0 +1,118 @@
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from src.extensions import db
+
+JANELAS_PADRAO = (7, 30, 90)
+MAX_JANELAS = 6
+MAX_DIAS_JANELA = 365
+
+# Janelas cacheadas pelas rotas de analytics; outros valores são calculados sem cache
+# (a janela pedida é sempre respeitada, e valores arbitrários não fragmentam o cache)
+JANELAS_CACHE = (7, 14, 30, 60, 90, 180, MAX_DIAS_JANELA)
+
+
+def janela_cacheavel(dias):
+    """Indica se 'dias' é uma das janelas de JANELAS_CACHE"""
+    return dias in JANELAS_CACHE
+
+
+def janelas_afetadas(data, hoje):
+    """Janelas de JANELAS_CACHE que incluem um registro da data informada"""
+    distancia = max((hoje - data).days, 0)
+    return [janela for janela in JANELAS_CACHE if janela >= distancia]
+
+
+def interpretar_janelas(valor):
+    """
+    Converte o parâmetro 'janelas' (ex: "7,30,90") em uma tupla ordenada de dias.
+    Lança ValueError para valores inválidos.
+    """
+    if not valor:
+        return JANELAS_PADRAO
+    janelas = sorted({int(parte) for parte in valor.split(',') if parte.strip()})
+    if not janelas or len(janelas) > MAX_JANELAS:
+        raise ValueError(f"Informe de 1 a {MAX_JANELAS} janelas")
+    if janelas[0] < 1 or janelas[-1] > MAX_DIAS_JANELA:
+        raise ValueError(f"As janelas devem ter entre 1 e {MAX_DIAS_JANELA} dias")
+    return tuple(janelas)
+
+
+def resumir_janelas(usuario_id, janelas, hoje, limite_tags=5):
+    """
+    Resumo, distribuição e tags mais frequentes para várias janelas aninhadas
+    (ex: 7, 30 e 90 dias) lendo apenas a maior janela uma única vez.
+
+    Cada linha diária é somada ao bucket da menor janela que a contém; no fim,
+    os buckets são acumulados da menor para a maior janela.
+    """
+    from src.models.resumo_humor import ResumoDiarioHumor
+    from src.models.estatistica_tag import EstatisticaTagDiaria
+    from src.models.tag import Tag
+
+    janelas = tuple(sorted(janelas))
+    data_inicio = hoje - timedelta(days=janelas[-1])
+
+    def indice_janela(data):
+        # Registros com data futura entram em todas as janelas
+        return bisect_left(janelas, max((hoje - data).days, 0))
+
+    # Resumos diários da maior janela
+    campos = ('total_registros', 'soma_humor', 'soma_sono', 'registros_sono', 'soma_estresse', 'registros_estresse')
+    buckets = [Counter() for _ in janelas]
+    for resumo in ResumoDiarioHumor.por_dia(usuario_id, data_inicio):
+        bucket = buckets[indice_janela(resumo.data)]
+        for campo in campos:
+            bucket[campo] += getattr(resumo, campo)
+        bucket['dias_com_registro'] += 1
+        for nivel in ResumoDiarioHumor.NIVEIS_HUMOR:
+            bucket[nivel] += getattr(resumo, f'humor_{nivel}')
+
+    # Contagens diárias das tags da maior janela
+    tags = [defaultdict(Counter) for _ in janelas]
+    consulta = db.session.query(
+        Tag.tipo, Tag.nome, EstatisticaTagDiaria.data, EstatisticaTagDiaria.n
+    ).join(EstatisticaTagDiaria, EstatisticaTagDiaria.tag_id == Tag.id).filter(
+        EstatisticaTagDiaria.usuario_id == usuario_id,
+        EstatisticaTagDiaria.data >= data_inicio,
+        Tag.tipo.in_([Tag.ATIVIDADE, Tag.EMOCAO, Tag.FATOR])
+    )
+    for tipo, nome, data, n in consulta.all():
+        tags[indice_janela(data)][tipo][nome] += n
+
+    # Acumular das janelas menores para as maiores
+    for i in range(1, len(janelas)):
+        buckets[i].update(buckets[i - 1])
+        for tipo, contagem in tags[i - 1].items():
+            tags[i][tipo].update(contagem)
+
+    def top(contagem):
+        return [
+            {"item": nome, "frequencia": frequencia}
+            for nome, frequencia in sorted(contagem.items(), key=lambda item: (-item[1], item[0]))[:limite_tags]
+        ]
+
+    resultado = []
+    for dias, bucket, tags_janela in zip(janelas, buckets, tags):
+        total = bucket['total_registros']
+        resultado.append({
+            "dias": dias,
+            "data_inicio": (hoje - timedelta(days=dias)).isoformat(),
+            "resumo": {
+                "total_registros": total,
+                "dias_com_registro": bucket['dias_com_registro'],
+                "media_humor": round(bucket['soma_humor'] / total, 2) if total else None,
+                "qualidade_sono_media": round(bucket['soma_sono'] / bucket['registros_sono'], 2) if bucket['registros_sono'] else None,
+                "nivel_estresse_medio": round(bucket['soma_estresse'] / bucket['registros_estresse'], 2) if bucket['registros_estresse'] else None
+            },
+            "distribuicao_percentual": {
+                str(nivel): round(bucket[nivel] / total * 100, 1)
+                for nivel in ResumoDiarioHumor.NIVEIS_HUMOR
+                if total and bucket[nivel]
+            },
+            "atividades_frequentes": top(tags_janela[Tag.ATIVIDADE]),
+            "emocoes_frequentes": top(tags_janela[Tag.EMOCAO]),
+            "fatores_influencia_frequentes": top(tags_janela[Tag.FATOR])
+        })
+    return resultado
@@ -0,0 +1,229 @@
+"""
+Migrações versionadas para bancos já existentes.
+
+db.create_all() só cria tabelas novas (com seus índices) e nunca altera as
+existentes. As mudanças de esquema em tabelas já implantadas ficam aqui, em
+ordem, e a tabela schema_versao registra quais já foram aplicadas. Cada
+migração é idempotente (ex.: CREATE INDEX IF NOT EXISTS, ADD COLUMN só das
+colunas que faltam), então pode rodar com segurança em bancos novos, em que
+create_all já criou tudo.
+"""
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.extensions import db
+
+TABELA_VERSAO = "schema_versao"
+
+
+def _criar_indices(conexao, *nomes):
+    """Cria, se ainda não existirem, os índices declarados nos modelos com esses nomes"""
+    indices = {indice.name: indice for tabela in db.metadata.sorted_tables for indice in tabela.indexes}
+    for nome in nomes:
+        indices[nome].create(conexao, checkfirst=True)
+
+
+def _adicionar_colunas(conexao, tabela, *nomes):
+    """Adiciona à tabela existente as colunas (anuláveis) declaradas no modelo que ela ainda não tem"""
+    existentes = {coluna["name"] for coluna in db.inspect(conexao).get_columns(tabela.name)}
+    for nome in nomes:
+        if nome in existentes:
+            continue
+        coluna = tabela.c[nome]
+        tipo = coluna.type.compile(dialect=conexao.dialect)
+        conexao.execute(db.text(f"ALTER TABLE {tabela.name} ADD COLUMN {nome} {tipo}"))
+
+
+def _minimo_maximo_sono_estresse(conexao):
+    """Colunas de mínimo e máximo de sono e estresse dos resumos diários, preenchidas a partir dos registros"""
+    from src.models.humor import RegistroHumor
+    from src.models.resumo_humor import ResumoDiarioHumor
+
+    resumos = ResumoDiarioHumor.__table__
+    registros = RegistroHumor.__table__
+    _adicionar_colunas(conexao, resumos, "min_sono", "max_sono", "min_estresse", "max_estresse")
+
+    def agregado(funcao, coluna):
+        return db.select(funcao(db.case((coluna > 0, coluna)))).where(
+            registros.c.usuario_id == resumos.c.usuario_id,
+            registros.c.data_registro == resumos.c.data
+        ).scalar_subquery()
+
+    conexao.execute(resumos.update().values(
+        min_sono=agregado(db.func.min, registros.c.qualidade_sono),
+        max_sono=agregado(db.func.max, registros.c.qualidade_sono),
+        min_estresse=agregado(db.func.min, registros.c.nivel_estresse),
+        max_estresse=agregado(db.func.max, registros.c.nivel_estresse),
+    ))
+
+
+# (versão, descrição, função(conexao)) em ordem crescente de versão
+MIGRACOES = [
+    (1, "Índices únicos de horário ativo dos agendamentos", lambda conexao: _criar_indices(
+        conexao,
+        "uq_agendamentos_psicologo_horario_ativo",
+        "uq_agendamentos_aluno_horario_ativo",
+    )),
+    (2, "Índices compostos das listagens paginadas", lambda conexao: _criar_indices(
+        conexao,
+        "ix_avaliacoes_usuario_data",
+        "ix_agendamentos_aluno_data",
+        "ix_agendamentos_psicologo_data",
+        "ix_compartilhamentos_aluno_data",
+        "ix_compartilhamentos_psicologo_data",
+        "ix_registros_humor_usuario_data",
+    )),
+    (3, "Índices de disponibilidade e de compartilhamentos não visualizados", lambda conexao: _criar_indices(
+        conexao,
+        "ix_agendamentos_data_status",
+        "ix_compartilhamentos_psicologo_visualizado",
+    )),
+    (4, "Mínimo e máximo de sono e estresse nos resumos diários de humor", _minimo_maximo_sono_estresse),
+]
+
+
+def agendamentos_ativos_duplicados():
+    """
+    Agendamentos ativos que repetem o horário de outro do mesmo psicólogo ou do
+    mesmo aluno (deixados pela corrida anterior aos índices únicos): bloqueiam a
+    migração 1. Retorna [(agendamento mantido, [agendamentos duplicados])]; o
+    mantido é o mais antigo (menor id) do horário.
+    """
+    from src.models.agendamento import Agendamento, STATUS_ATIVOS
+
+    grupos = []
+    for coluna in (Agendamento.psicologo_id, Agendamento.aluno_id):
+        chave = (coluna, Agendamento.data_agendamento, Agendamento.hora_agendamento)
+        repetidos = db.session.query(*chave).filter(
+            Agendamento.status.in_(STATUS_ATIVOS)
+        ).group_by(*chave).having(db.func.count() > 1).all()
+        for valor, data, hora in repetidos:
+            agendamentos = Agendamento.query.filter(
+                coluna == valor,
+                Agendamento.data_agendamento == data,
+                Agendamento.hora_agendamento == hora,
+                Agendamento.status.in_(STATUS_ATIVOS)
+            ).order_by(Agendamento.id).all()
+            grupos.append((agendamentos[0], agendamentos[1:]))
+    return grupos
+
+
+def cancelar_agendamentos_duplicados():
+    """
+    Cancela os agendamentos ativos duplicados, mantendo o mais antigo de cada
+    horário, para que a migração 1 possa ser aplicada. Retorna os ids cancelados.
+    """
+    cancelados = []
+    # Um cancelamento pode resolver também o conflito do outro índice: recalcula até não sobrar nenhum
+    while True:
+        grupos = agendamentos_ativos_duplicados()
+        if not grupos:
+            break
+        _, duplicados = grupos[0]
+        for agendamento in duplicados:
+            agendamento.status = 'Cancelado'
+            cancelados.append(agendamento.id)
+        db.session.commit()
+    return cancelados
+
+
+def _garantir_tabela_versao(conexao):
+    conexao.execute(db.text(
+        f"CREATE TABLE IF NOT EXISTS {TABELA_VERSAO} ("
+        " versao INTEGER PRIMARY KEY,"
+        " descricao VARCHAR(200) NOT NULL,"
+        " aplicada_em TIMESTAMP NOT NULL)"
+    ))
+
+
+def versoes_aplicadas():
+    with db.engine.begin() as conexao:
+        _garantir_tabela_versao(conexao)
+        return {versao for (versao,) in conexao.execute(db.text(f"SELECT versao FROM {TABELA_VERSAO}"))}
+
+
+def migracoes_pendentes():
+    """[(versão, descrição)] das migrações ainda não aplicadas"""
+    aplicadas = versoes_aplicadas()
+    return [(versao, descricao) for versao, descricao, _ in MIGRACOES if versao not in aplicadas]
+
+
+def registrar_migracoes_aplicadas():
+    """
+    Registra todas as migrações como aplicadas sem rodá-las. Só para um banco
+    que create_all acabou de criar do zero, que já tem o esquema atual; outro
+    worker pode ter registrado as versões ao mesmo tempo, e nesse caso nada muda.
+    """
+    try:
+        with db.engine.begin() as conexao:
+            _garantir_tabela_versao(conexao)
+            aplicadas = {versao for (versao,) in conexao.execute(db.text(f"SELECT versao FROM {TABELA_VERSAO}"))}
+            for versao, descricao, _ in MIGRACOES:
+                if versao not in aplicadas:
+                    conexao.execute(
+                        db.text(f"INSERT INTO {TABELA_VERSAO} (versao, descricao, aplicada_em) VALUES (:versao, :descricao, :agora)"),
+                        {"versao": versao, "descricao": descricao, "agora": datetime.utcnow()}
+                    )
+    except IntegrityError:
+        pass
+
+
+def pendencias_do_banco():
+    """
+    O que src/init_db.py ainda precisa fazer neste banco, verificado sem alterá-lo
+    e sem consultas pesadas (para rodar na inicialização da aplicação): migrações
+    não aplicadas e agregados vazios apesar de haver registros de humor.
+
+    Returns:
+        list: descrições das pendências (vazia se o banco está em dia)
+    """
+    from src.models.estatistica_tag import EstatisticaTag
+    from src.models.humor import RegistroHumor
+    from src.models.resumo_humor import ResumoDiarioHumor
+    from src.models.tag import RegistroHumorTag
+
+    pendencias = [f"migração {versao} ({descricao})" for versao, descricao in migracoes_pendentes()]
+
+    def tem_linhas(modelo):
+        return db.session.execute(db.select(db.exists().select_from(modelo.__table__))).scalar()
+
+    agregados = [
+        (RegistroHumor, ResumoDiarioHumor, "resumos diários de humor"),
+        (RegistroHumor, RegistroHumorTag, "tags dos registros de humor"),
+        (RegistroHumorTag, EstatisticaTag, "estatísticas por tag"),
+    ]
+    for origem, agregado, descricao in agregados:
+        if tem_linhas(origem) and not tem_linhas(agregado):
+            pendencias.append(f"tabela {agregado.__tablename__} vazia ({descricao})")
+    return pendencias
+
+
+def aplicar_migracoes():
+    """
+    Aplica as migrações pendentes e registra cada versão logo após concluí-la
+    (como são idempotentes, uma migração interrompida pode simplesmente rodar de
+    novo). Uma migração que falha (ex.: índice único com dados duplicados) não é
+    registrada: o erro vai para o log da aplicação, as seguintes continuam (são
+    independentes) e ela é tentada de novo na próxima execução.
+
+    Returns:
+        list: versões aplicadas nesta chamada
+    """
+    aplicadas = versoes_aplicadas()
+    novas = []
+    for versao, descricao, migrar in MIGRACOES:
+        if versao in aplicadas:
+            continue
+        try:
+            with db.engine.begin() as conexao:
+                migrar(conexao)
+                conexao.execute(
+                    db.text(f"INSERT INTO {TABELA_VERSAO} (versao, descricao, aplicada_em) VALUES (:versao, :descricao, :agora)"),
+                    {"versao": versao, "descricao": descricao, "agora": datetime.utcnow()}
+                )
+            novas.append(versao)
+        except (IntegrityError, OperationalError) as e:
+            current_app.logger.error("Migração %s (%s) não aplicada: %s", versao, descricao, e.orig)
+    return novas
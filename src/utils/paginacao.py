@@ -0,0 +1,117 @@
+"""
+Paginação por chave (keyset) para rotas de listagem.
+
+O cursor é opaco para o cliente: guarda os valores das colunas de ordenação
+do último item da página (JSON em base64 url-safe). A próxima página começa
+logo depois dele, sem OFFSET, então o custo não cresce com a profundidade.
+
+A paginação só é aplicada quando a requisição informa `limit` ou `cursor`;
+sem eles a rota devolve a lista completa, como antes. O próximo cursor vai no
+corpo (`next_cursor`) quando a resposta é um objeto, ou no cabeçalho
+X-Next-Cursor quando é uma lista.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+
+from flask import make_response, request
+
+from src.extensions import db
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+CABECALHO_CURSOR = "X-Next-Cursor"
+
+_CONVERSORES = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+}
+
+
+class CursorInvalido(ValueError):
+    """Parâmetros de paginação malformados (a rota deve responder 400)"""
+
+
+def codificar_cursor(valores):
+    bruto = json.dumps(
+        [valor.isoformat() if isinstance(valor, (datetime, date, time)) else valor for valor in valores],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, colunas):
+    """Valores do cursor convertidos para os tipos Python das colunas de ordenação"""
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+        if not isinstance(valores, list) or len(valores) != len(colunas):
+            raise ValueError
+        convertidos = []
+        for valor, coluna in zip(valores, colunas):
+            conversor = _CONVERSORES.get(coluna.type.python_type)
+            convertidos.append(conversor(valor) if conversor and valor is not None else valor)
+        return convertidos
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor de paginação inválido")
+
+
+def parametros_paginacao():
+    """(limite, cursor) da requisição; (None, None) quando a rota não deve paginar"""
+    limite = request.args.get("limit")
+    cursor = request.args.get("cursor")
+    if limite is None and cursor is None:
+        return None, None
+    try:
+        limite = int(limite) if limite is not None else LIMITE_PADRAO
+    except ValueError:
+        raise CursorInvalido("O parâmetro limit deve ser um número inteiro")
+    if limite < 1:
+        raise CursorInvalido("O parâmetro limit deve ser maior que zero")
+    return min(limite, LIMITE_MAXIMO), cursor or None
+
+
+def _depois_do_cursor(colunas, valores, descendente):
+    """
+    Condição "vem depois de (valores)" na ordem das colunas (ex.: decrescente):
+    c1 < v1 OR (c1 = v1 AND c2 < v2) OR ...
+    """
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(colunas, valores)):
+        anteriores = [c == v for c, v in zip(colunas[:i], valores[:i])]
+        condicoes.append(db.and_(*anteriores, coluna < valor if descendente else coluna > valor))
+    return db.or_(*condicoes)
+
+
+def paginar(consulta, colunas, limite=None, cursor=None, descendente=True):
+    """
+    Ordena a consulta pelas colunas (a última deve ser única, ex.: id) e aplica
+    limite/cursor quando informados. Nunca usa OFFSET: com um índice composto
+    (filtro, colunas...) qualquer página custa o mesmo que a primeira.
+
+    Returns:
+        tuple: (itens, próximo cursor ou None)
+    """
+    consulta = consulta.order_by(*(coluna.desc() if descendente else coluna.asc() for coluna in colunas))
+    if limite is None:
+        return consulta.all(), None
+
+    if cursor:
+        valores = decodificar_cursor(cursor, colunas)
+        consulta = consulta.filter(_depois_do_cursor(colunas, valores, descendente))
+
+    itens = consulta.limit(limite + 1).all()
+    if len(itens) <= limite:
+        return itens, None
+    itens = itens[:limite]
+    ultimo = itens[-1]
+    return itens, codificar_cursor([getattr(ultimo, coluna.key) for coluna in colunas])
+
+
+def com_cursor(resposta, proximo_cursor):
+    """Rotas que devolvem uma lista JSON informam o próximo cursor no cabeçalho X-Next-Cursor"""
+    resposta = make_response(resposta)
+    if proximo_cursor:
+        resposta.headers[CABECALHO_CURSOR] = proximo_cursor
+    return resposta
@@ -0,0 +1,30 @@
+from src.extensions import db
+
+GRANULARIDADES = ('dia', 'semana', 'mes')
+
+
+def expressao_periodo(coluna, granularidade):
+    """
+    Expressão SQL que leva uma coluna de data ao início do seu período
+    (o próprio dia, a segunda-feira da semana ou o primeiro dia do mês).
+    """
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade inválida. Use: {', '.join(GRANULARIDADES)}")
+    if granularidade == 'dia':
+        return coluna
+
+    dialeto = db.engine.dialect.name
+    if dialeto == 'sqlite':
+        if granularidade == 'semana':
+            # 'weekday 0' avança até o domingo; voltando 6 dias chega à segunda-feira
+            return db.func.date(coluna, 'weekday 0', '-6 days')
+        return db.func.strftime('%Y-%m-01', coluna)
+    if dialeto == 'postgresql':
+        campo = 'week' if granularidade == 'semana' else 'month'
+        return db.cast(db.func.date_trunc(campo, coluna), db.Date)
+    raise ValueError(f"Agrupamento por {granularidade} não suportado no banco {dialeto}")
+
+
+def formatar_periodo(valor):
+    """Normaliza o início do período retornado pelo banco para 'YYYY-MM-DD'"""
+    return valor.isoformat()[:10] if hasattr(valor, 'isoformat') else str(valor)[:10]
@@ -0,0 +1,152 @@
+"""
+Snapshot versionado da resposta pública GET /psicologos.
+
+O corpo JSON serializado fica pronto em memória e só é refeito quando a versão
+muda (agendamento criado, alterado ou excluído, psicólogo alterado, cadastro ou
+exclusão de conta) ou quando o dia vira.
+
+A versão é um contador no banco (VersaoDados), incrementado por um listener de
+before_flush na mesma transação da escrita: todos os workers enxergam a mudança
+assim que ela é confirmada, com uma leitura por chave primária por requisição.
+O mesmo listener mantém contadores do cadastro dos psicólogos e da agenda de
+cada psicólogo, usados para atualizar só a parte afetada do índice de horários
+(agenda_bits).
+"""
+import hashlib
+import threading
+from datetime import date
+
+from flask import Response, current_app, request
+from sqlalchemy import event
+
+from src.extensions import db
+from src.models.agendamento import Agendamento
+from src.models.user import User
+from src.models.versao_dados import VersaoDados
+from src.utils.cache import cache_get, cache_set
+
+CHAVE_SNAPSHOT = ("psicologos", "snapshot")
+
+# O snapshot é refeito pelo menos uma vez por dia (virada de data)
+TTL_SEGUNDOS = 24 * 60 * 60
+
+_lock = threading.Lock()
+_local = None  # (versao, dia, etag, corpo) do último snapshot usado por este processo
+
+
+def listar_psicologos():
+    """Lista de psicólogos ativos com a disponibilidade filtrada (corpo da resposta)"""
+    from src.models.user import User
+    from src.utils.disponibilidade import calcular_disponibilidades
+
+    psicologos = User.query.filter_by(tipo_usuario="psicologo", ativo=True).all()
+
+    # Horários ocupados de todos os psicólogos em uma única consulta
+    disponibilidades = calcular_disponibilidades(psicologos)
+
+    psicologos_list = []
+    for p in psicologos:
+        psicologos_list.append({
+            "id": p.id,
+            "name": p.nome,
+            "specialty": p.especialidades[0] if p.especialidades else "Geral", # Assumindo que especialidades é uma lista
+            "availability": disponibilidades[p.id],
+            "description": "", # Será preenchido no frontend ou por outra lógica
+            "modes": p.modalidades_atendimento if p.modalidades_atendimento else []
+        })
+    return psicologos_list
+
+
+def _alteracoes(sessao):
+    """
+    O que o flush altera em GET /psicologos e nos horários livres: (se muda o
+    cadastro de algum psicólogo, ids dos psicólogos com agendamentos alterados)
+    """
+    perfis, agendas = False, set()
+    alterados = list(sessao.new) + [
+        obj for obj in sessao.dirty if isinstance(obj, (Agendamento, User)) and sessao.is_modified(obj)
+    ]
+    for obj in alterados:
+        if isinstance(obj, Agendamento):
+            agendas.add(obj.psicologo_id)
+        elif isinstance(obj, User) and obj.tipo_usuario == "psicologo":
+            perfis = True
+    for obj in sessao.deleted:
+        if isinstance(obj, Agendamento):
+            agendas.add(obj.psicologo_id)
+        # Excluir qualquer conta pode liberar horários (agendamentos removidos em cascata)
+        elif isinstance(obj, User):
+            perfis = True
+    # Agendamento associado só pelo relacionamento, ainda sem psicologo_id
+    if None in agendas:
+        agendas.discard(None)
+        perfis = True
+    return perfis, agendas
+
+
+@event.listens_for(db.session, "before_flush")
+def _incrementar_versao(sessao, contexto, instancias):
+    perfis, agendas = _alteracoes(sessao)
+    if perfis or agendas:
+        VersaoDados.incrementar(VersaoDados.PSICOLOGOS, sessao)
+    if perfis:
+        VersaoDados.incrementar(VersaoDados.PERFIS_PSICOLOGOS, sessao)
+    # Em ordem, para que transações concorrentes travem as linhas na mesma sequência
+    for psicologo_id in sorted(agendas):
+        VersaoDados.incrementar(VersaoDados.agenda(psicologo_id), sessao)
+
+
+def invalidar_snapshot_psicologos():
+    """
+    Nova versão na transação atual (chamar antes do commit). Só é necessário para
+    escritas fora do ORM (UPDATE/INSERT em lote); as do ORM são detectadas no flush.
+    Sem saber o que mudou, o índice de horários (agenda_bits) é refeito por inteiro.
+    """
+    VersaoDados.incrementar(VersaoDados.PSICOLOGOS)
+    VersaoDados.incrementar(VersaoDados.PERFIS_PSICOLOGOS)
+
+
+def versao_psicologos():
+    """Versão atual dos dados de psicólogos e agendamentos (muda a cada escrita confirmada)"""
+    return VersaoDados.ler(VersaoDados.PSICOLOGOS)
+
+
+def obter_snapshot():
+    """(etag, corpo) da versão atual, refazendo o snapshot se necessário"""
+    global _local
+    # A versão é lida antes da consulta: uma invalidação concorrente gera outra
+    # versão e o snapshot montado agora não será reaproveitado por engano
+    versao, dia = versao_psicologos(), date.today().isoformat()
+
+    snapshot = _local
+    if snapshot and snapshot[:2] == (versao, dia):
+        return snapshot[2], snapshot[3]
+
+    with _lock:
+        # Outro worker pode já ter montado esta versão no backend compartilhado
+        snapshot = cache_get(CHAVE_SNAPSHOT)
+        if not (snapshot and tuple(snapshot[:2]) == (versao, dia)):
+            corpo = current_app.json.response(listar_psicologos()).get_data()
+            # Pelo conteúdo: contadores recomeçam se o banco for recriado
+            etag = hashlib.sha1(corpo).hexdigest()
+            snapshot = (versao, dia, etag, corpo)
+            cache_set(CHAVE_SNAPSHOT, snapshot, TTL_SEGUNDOS)
+        _local = tuple(snapshot)
+    return _local[2], _local[3]
+
+
+def aquecer_snapshot_psicologos():
+    """Monta o snapshot na inicialização para que a primeira requisição já saia da memória"""
+    obter_snapshot()
+
+
+def resposta_psicologos():
+    """Resposta de GET /psicologos a partir do snapshot (304 se o ETag do cliente for o atual)"""
+    etag, corpo = obter_snapshot()
+    if request.if_none_match.contains_weak(etag):
+        resposta = Response(status=304)
+    else:
+        resposta = Response(corpo, mimetype="application/json")
+    resposta.set_etag(etag)
+    resposta.headers["Cache-Control"] = "public, no-cache"
+    return resposta
@@ -0,0 +1,42 @@
+"""
+INSERT ... ON CONFLICT para os agregados mantidos a cada escrita, os dicionários de tags e os contadores de versão.
+
+Um UPDATE seguido de INSERT quando nenhuma linha foi atualizada não é atômico:
+duas primeiras escritas concorrentes da mesma chave atualizam 0 linhas e as duas
+inserem, e a segunda falha na restrição única. O upsert do próprio banco resolve
+o conflito dentro do comando.
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.extensions import db
+
+_INSERT_POR_DIALETO = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def _insert(modelo, valores):
+    dialeto = db.engine.dialect.name
+    if dialeto not in _INSERT_POR_DIALETO:
+        raise ValueError(f"Upsert não suportado no banco {dialeto}")
+    return _INSERT_POR_DIALETO[dialeto](modelo.__table__).values(**valores)
+
+
+def inserir_ou_atualizar(modelo, valores, chaves, atualizacao, sessao=None):
+    """
+    Insere a linha `valores` ou, se já existir uma com as mesmas `chaves` (as
+    colunas de uma restrição única), aplica a ela `atualizacao` ({coluna: expressão}).
+    Executa na transação da sessão (db.session se não informada), sem commit.
+    """
+    sessao = sessao if sessao is not None else db.session
+    comando = _insert(modelo, valores).on_conflict_do_update(
+        index_elements=list(chaves),
+        set_={coluna.key: expressao for coluna, expressao in atualizacao.items()}
+    )
+    sessao.execute(comando)
+
+
+def inserir_se_ausente(modelo, valores, chaves):
+    """Insere a linha `valores`, a menos que já exista uma com as mesmas `chaves` (sem commit)"""
+    db.session.execute(_insert(modelo, valores).on_conflict_do_nothing(index_elements=list(chaves)))